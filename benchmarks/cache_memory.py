@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Compare the memory and the time taken by looking objects up in the
+SQLite storage engine holding all of them in memory and in the one keeping
+a bounded working set.
+
+Usage: ./benchmarks/cache_memory.py [number of objects] [cache size]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models import storage  # noqa: E402
+from models.engine.cached_storage import CachedStorage  # noqa: E402
+from models.engine.db_storage import DBStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def measure(engine, ids):
+    """Return the seconds and the memory taken by reloading engine and
+    looking the ids up, and the memory still taken at the end."""
+    storage.all().clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine.reload()
+    for id in ids:
+        engine.get(Place, id)
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, current, peak
+
+
+def main(count, cache_size):
+    """Run the benchmark over count places, looking them up a few times
+    with most of the lookups on a few of them, like real traffic."""
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'hbnb.db')
+        engine = DBStorage(db_path)
+        storage.all().clear()
+        ids = []
+        for i in range(count):
+            place = Place()
+            place.name = 'place {}'.format(i)
+            place.description = 'a nice place to stay ' * 4
+            ids.append(place.id)
+        engine.save()
+        engine.close()
+        lookups = [ids[min(int(random.expovariate(10 / count)), count - 1)]
+                   for _ in range(count * 2)]
+
+        for name, engine in [
+                ('all in memory', DBStorage(db_path)),
+                ('cached', CachedStorage(db_path, cache_size=cache_size))]:
+            seconds, current, peak = measure(engine, lookups)
+            print('{:>14}: {:.2f}s, {:.1f} MiB kept, peak {:.1f} MiB'.format(
+                name, seconds, current / (1 << 20), peak / (1 << 20)))
+            if isinstance(engine, CachedStorage):
+                print('{:>14}  {}'.format('', engine.cache_info()))
+            engine.close()
+        storage.all().clear()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
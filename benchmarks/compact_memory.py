@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Compare the memory taken by places built with the model class and with
+its compact class, e.g.
+
+    with 0 attribute(s) not declared by Place:
+         Place: 401 bytes/object built, 465 once serialized
+       compact: 373 bytes/object built, 373 once serialized
+    with 1 attribute(s) not declared by Place:
+         Place: 401 bytes/object built, 465 once serialized
+       compact: 429 bytes/object built, 429 once serialized
+
+The compact places are only smaller without extra attributes, whose
+tuple costs more than the shared-key instance dict of Place.
+
+Usage: ./benchmarks/compact_memory.py [number of objects]
+"""
+import os
+import sys
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models.compact import compact_class  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def measure(cls, count, **extra):
+    """Return the bytes per object taken by count places of cls, once built
+    and once serialized."""
+    tracemalloc.start()
+    places = [cls(id=str(uuid.uuid4()),
+                  created_at='2023-07-14T21:36:54.182978',
+                  updated_at='2023-07-14T21:36:54.182978',
+                  name='place {}'.format(i), city_id='city', user_id='user',
+                  number_rooms=3, max_guest=4, price_by_night=120,
+                  latitude=30.0, longitude=31.2, **extra)
+              for i in range(count)]
+    built = tracemalloc.get_traced_memory()[0]
+    # to_dict() and __str__() materialize the instance dict of Place
+    for place in places:
+        place.to_dict()
+    serialized = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built / count, serialized / count
+
+
+def main(count):
+    """Run the benchmark over count places."""
+    for extra in [{}, {'extra_attr': 'set by update'}]:
+        print('with {} attribute(s) not declared by Place:'.format(
+            len(extra)))
+        for name, cls in [('Place', Place),
+                          ('compact', compact_class(Place))]:
+            built, serialized = measure(cls, count, **extra)
+            print('{:>10}: {:.0f} bytes/object built, {:.0f} once '
+                  'serialized'.format(name, built, serialized))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
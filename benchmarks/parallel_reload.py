@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""Compare the time of reading all the shards of the sharded storage
+engine in the main process and with worker processes splitting the shards
+into the records of the objects, the objects being built in the main
+process which holds them.
+
+The workers are slower: pickling the records back to the main process
+costs more than splitting them, e.g. on a single CPU
+
+    200000 objects in 7 shards, 70774606 bytes
+        serial: 5.83s, 200000 objects
+      parallel: 12.28s, 200000 objects
+
+which is why `ShardedStorage` reads the shards in the main process.
+
+Usage: ./benchmarks/parallel_reload.py [number of objects] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models import storage  # noqa: E402
+from models.engine.formats import get_format  # noqa: E402
+from models.engine.sharded_storage import ShardedStorage  # noqa: E402
+
+
+def split_shard(format_name, path):
+    """Return the (key, record, None) of the objects of the shard at path,
+    split apart without decoding them. Run by the worker processes."""
+    fmt = get_format(format_name)
+    with open(path, 'rb' if fmt.binary else 'r') as f:
+        return [(key, record, None) for key, record in fmt.split(f)]
+
+
+def read_serial(sharded):
+    """Read all the shards in the main process."""
+    sharded.reload()
+    # the shards are read on demand
+    sharded.all()
+
+
+def read_parallel(sharded, workers):
+    """Read all the shards with workers processes, merging their records
+    in the main process."""
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [(name, executor.submit(
+            split_shard, sharded.format.name, sharded.shard_path(name)))
+            for name in sharded.shards()]
+        for name, future in futures:
+            sharded._merge_records(future.result(), name)
+
+
+def measure(directory, workers):
+    """Return the seconds taken to build all the objects of the shards."""
+    storage.all().clear()
+    sharded = ShardedStorage(directory)
+    start = time.perf_counter()
+    if workers:
+        read_parallel(sharded, workers)
+    else:
+        read_serial(sharded)
+    return time.perf_counter() - start
+
+
+def main(count, workers):
+    """Run the benchmark over count objects spread over the classes."""
+    classes = list(storage.classes().values())
+    with tempfile.TemporaryDirectory() as tmp:
+        sharded = ShardedStorage(tmp)
+        storage.all().clear()
+        for i in range(count):
+            obj = classes[i % len(classes)]()
+            obj.name = 'object {}'.format(i)
+            obj.text = 'some words about the object ' * 4
+        sharded.save()
+        print('{} objects in {} shards, {} bytes'.format(
+            count, len(sharded.shards()), sum(
+                os.path.getsize(sharded.shard_path(name))
+                for name in sharded.shards())))
+
+        for name, n in [('serial', 0), ('parallel', workers)]:
+            seconds = measure(tmp, n)
+            print('{:>10}: {:.2f}s, {} objects'.format(
+                name, seconds, storage.count()))
+        storage.all().clear()
+        storage._pending_keys().clear()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count())
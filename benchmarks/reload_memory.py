@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""Compare the peak memory of loading the JSON file of the storage engine
+with a single `json.load` and with the streaming reload.
+
+Usage: ./benchmarks/reload_memory.py [number of objects]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def json_load_reload(path):
+    """Reload the objects of the file at path the way FileStorage used to,
+    with json.load."""
+    classes = storage.classes()
+    objs = storage.all()
+    with open(path) as f:
+        for key, value in json.load(f).items():
+            objs[key] = classes[value['__class__']](**value)
+
+
+def measure(reload):
+    """Return the seconds and the peak bytes taken by reload."""
+    storage.all().clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    reload()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main(count):
+    """Run the benchmark over count places."""
+    # the paths of the files are shared by the storages
+    paths = (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__journal_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        try:
+            bench = FileStorage(file_path=path)
+            storage.all().clear()
+            for i in range(count):
+                place = Place()
+                place.name = 'place {}'.format(i)
+                place.description = 'a nice place to stay ' * 4
+                place.number_rooms = i % 7 + 1
+                place.latitude = i / count
+            bench.save()
+            print('{} objects, {} bytes file'.format(
+                count, os.path.getsize(path)))
+
+            for name, reload in [('json.load', lambda: json_load_reload(path)),
+                                 ('streaming', bench.reload)]:
+                seconds, peak = measure(reload)
+                print('{:>10}: {:.2f}s, peak {:.1f} MiB'.format(
+                    name, seconds, peak / (1 << 20)))
+        finally:
+            storage.all().clear()
+            storage._pending_keys().clear()
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__journal_path) = paths
+            FileStorage._FileStorage__seen_file = None
+            FileStorage._FileStorage__seen_journal = None
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
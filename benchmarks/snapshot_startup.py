@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Compare the time and the memory taken by reloading a binary file and
+looking a few objects up, and by mapping a snapshot of the same objects.
+
+Usage: ./benchmarks/snapshot_startup.py [number of objects] [lookups]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.formats import get_format  # noqa: E402
+from models.engine.snapshot_storage import SnapshotStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def measure(engine, ids):
+    """Return the seconds taken by reloading engine, the seconds and the
+    memory taken by reloading it and looking the ids up."""
+    storage.all().clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine.reload()
+    startup = time.perf_counter() - start
+    for id in ids:
+        engine.get(Place, id)
+    seconds = time.perf_counter() - start
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return startup, seconds, current
+
+
+def main(count, lookups):
+    """Run the benchmark over count places, looking lookups of them up."""
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.all().clear()
+        ids = []
+        for i in range(count):
+            place = Place()
+            place.name = 'place {}'.format(i)
+            place.description = 'a nice place to stay ' * 4
+            ids.append(place.id)
+        paths = {}
+        for name in ['binary', 'snapshot']:
+            fmt = get_format(name)
+            paths[name] = os.path.join(tmp, 'file' + fmt.extensions[0])
+            with open(paths[name], 'wb') as f:
+                fmt.write(f, [(key, fmt.encode(obj))
+                              for key, obj in storage.all().items()])
+        storage.all().clear()
+        storage._pending_keys().clear()
+        ids = random.sample(ids, min(lookups, count))
+
+        for name, engine in [
+                ('binary reload', FileStorage(file_path=paths['binary'])),
+                ('snapshot', SnapshotStorage(paths['snapshot']))]:
+            startup, seconds, current = measure(engine, ids)
+            print('{:>14}: startup {:.4f}s, with the lookups {:.4f}s, '
+                  '{:.1f} MiB kept'.format(name, startup, seconds,
+                                           current / (1 << 20)))
+            if isinstance(engine, SnapshotStorage):
+                engine.close()
+        storage.all().clear()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""Compare radius queries over places answered by a linear scan and by the
+spatial index.
+
+Usage: ./benchmarks/spatial_index.py [number of places] [number of queries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models.engine.object_map import ObjectMap  # noqa: E402
+from models.engine.spatial import GridIndex, distance_km  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def linear_scan(objs, lat, lon, radius_km):
+    """Return the (distance, place) pairs within radius_km of a point."""
+    found = []
+    for place in objs.values():
+        distance = distance_km(lat, lon, place.latitude, place.longitude)
+        if distance <= radius_km:
+            found.append((distance, place))
+    found.sort(key=lambda pair: pair[0])
+    return found
+
+
+def main(count, queries, radius_km=10):
+    """Run the benchmark over count places."""
+    random.seed(0)
+    objs = ObjectMap()
+    start = time.perf_counter()
+    for i in range(count):
+        # places spread around a few cities, like real listings
+        lat = random.gauss(random.choice([30.0, 40.7, 48.8, -33.9]), 2)
+        lon = random.gauss(random.choice([31.2, -74.0, 2.3, 151.2]), 2)
+        objs['Place.{}'.format(i)] = Place(id=str(i), latitude=lat,
+                                           longitude=lon)
+    print('{} places built in {:.1f}s'.format(
+        count, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    index = GridIndex()
+    objs.add_listener(index, 'Place')
+    print('index built in {:.1f}s'.format(time.perf_counter() - start))
+
+    points = [(random.uniform(28, 50), random.uniform(-75, 35))
+              for _ in range(queries)]
+    for name, query in [('linear scan', lambda lat, lon: linear_scan(
+                            objs, lat, lon, radius_km)),
+                        ('grid index', lambda lat, lon: index.nearest(
+                            lat, lon, radius_km))]:
+        start = time.perf_counter()
+        found = sum(len(query(lat, lon)) for lat, lon in points)
+        print('{:>12}: {:.2f} ms/query, {} places found'.format(
+            name, (time.perf_counter() - start) * 1000 / queries, found))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
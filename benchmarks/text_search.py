@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""Compare searches over the text of reviews answered by a linear scan and
+by the full-text index.
+
+Usage: ./benchmarks/text_search.py [number of reviews] [number of queries]
+"""
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models.engine.object_map import ObjectMap  # noqa: E402
+from models.engine.text_index import TextIndex, tokenize  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def linear_scan(objs, terms, limit):
+    """Return the reviews having the most of the words of terms."""
+    words = set(tokenize(terms))
+    found = []
+    for review in objs.values():
+        count = sum(word in words for word in tokenize(review.text))
+        if count:
+            found.append((count, review))
+    found.sort(key=lambda pair: pair[0], reverse=True)
+    return found[:limit]
+
+
+def main(count, queries, limit=10):
+    """Run the benchmark over count reviews."""
+    random.seed(0)
+    # a few words are in many reviews and most in few, like real text
+    vocabulary = ['word{}'.format(i) for i in range(50000)]
+    weights = list(itertools.accumulate(
+        1 / (rank + 1) for rank in range(len(vocabulary))))
+    objs = ObjectMap()
+    start = time.perf_counter()
+    for i in range(count):
+        text = ' '.join(random.choices(
+            vocabulary, cum_weights=weights, k=20))
+        objs['Review.{}'.format(i)] = Review(id=str(i), text=text)
+    print('{} reviews built in {:.1f}s'.format(
+        count, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    index = TextIndex(Review.text_attrs)
+    objs.add_listener(index, 'Review')
+    print('index built in {:.1f}s, {} words'.format(
+        time.perf_counter() - start, len(index.postings)))
+
+    searches = [' '.join(random.choices(vocabulary[100:], k=2))
+                for _ in range(queries)]
+    for name, search in [('linear scan', lambda terms: linear_scan(
+                              objs, terms, limit)),
+                         ('text index', lambda terms: index.search(
+                              terms, limit))]:
+        start = time.perf_counter()
+        found = sum(len(search(terms)) for terms in searches)
+        print('{:>12}: {:.2f} ms/query, {} reviews found'.format(
+            name, (time.perf_counter() - start) * 1000 / queries, found))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -1,31 +1,38 @@
 #!/usr/bin/python3
 """The console entry point of the AirBnB clone"""
 import cmd
+import shlex
+import sys
+import time
 from typing import cast
 from models import storage
+from models.engine.relations import CASCADE, RESTRICT
 from utils import parse_str_dict, validate_args, cast_str_value, classes_to_str
-from utils import find_class_by_name, parse_command_syntax
-from models.base_model import BaseModel
-from models.user import User
-from models.place import Place
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.review import Review
+from utils import find_class_by_name, parse_command_syntax, parse_query
 
 
 class HBNBCommand(cmd.Cmd):
     """Class HBNBCommand to control the system without GUI"""
 
     prompt = '(hbnb) '
-    __classes = [BaseModel, User, State, City, Amenity, Place, Review]
+    __classes = list(storage.classes().values())
+    __class_names = classes_to_str(__classes)
     __no_mod_attrs = ['id', 'created_at', 'updated_at']
 
     def default(self, line):
+        query = parse_query(line)
+        if query:
+            self.run_query(*query)
+            return
         results = parse_command_syntax(line)
         if results:
             className, action, args = results
-            if className in classes_to_str(HBNBCommand.__classes):
+            if className in HBNBCommand.__class_names:
+                # the ids of bulk_update are passed to update joined by commas
+                if action == 'bulk_update' and args and \
+                        isinstance(args[0], list):
+                    action = 'update'
+                    args = [','.join(str(id) for id in args[0])] + args[1:]
                 if f'do_{action}' in dir(self):
                     if action == 'update' and len(args) == 3:
                         val = f'"{args[2]}"' if isinstance(
@@ -45,13 +52,56 @@ class HBNBCommand(cmd.Cmd):
             return
         print(f"*** Unknown syntax: {line}")
 
+    def run_query(self, className, calls):
+        """Prints the instances of a class matching a query, one per line
+        as they are found, with only their selected attributes if some are
+
+        Example:
+            Place.where(price_by_night<100, max_guest>=4).limit(20)
+            Place.where(city_id="0001").select(name).order_by(-name)"""
+        if className not in HBNBCommand.__class_names:
+            print("** class doesn't exist **")
+            return
+
+        query = storage.query(className)
+        try:
+            for method, args in calls:
+                getattr(query, method)(*args)
+            for obj in query:
+                if query.attrs is None:
+                    print(obj)
+                else:
+                    print("[{}] ({}) {}".format(
+                        className, obj.id, query.values(obj)))
+        except ValueError as error:
+            print("** {} **".format(error))
+
+    def precmd(self, line):
+        """Apply the changes other processes saved before every command"""
+        storage.refresh()
+        return line
+
     def emptyline(self):
         """Do nothing on empty line"""
         pass
 
+    @staticmethod
+    def __read_only():
+        """Print an error and return True if the storage can't save the
+        changes"""
+        if storage.read_only:
+            print("** read-only storage **")
+        return storage.read_only
+
     def do_create(self, arg):
-        """Creates a new instance of a model and saves it
-        Example: create BaseModel"""
+        """Creates new instances of a model, one by default, and saves them
+        create <classname> [count=<count>]
+
+        Example:
+            create BaseModel
+            create Place count=1000"""
+        if HBNBCommand.__read_only():
+            return
         args = arg.split()
         results = validate_args(args, HBNBCommand.__classes)
         if not results:
@@ -62,9 +112,21 @@ class HBNBCommand(cmd.Cmd):
         if not cls:
             return
 
-        obj = cls()
-        print(obj.id)
-        obj.save()
+        count = 1
+        # the other words are ignored
+        for word in args[1:]:
+            if word.startswith("count="):
+                value = word[len("count="):]
+                if not value.isdigit() or int(value) < 1:
+                    print("** not a valid value **")
+                    return
+                count = int(value)
+
+        with storage.batch():
+            objs = [cls() for _ in range(count)]
+            for obj in objs:
+                obj.save()
+        print('\n'.join(obj.id for obj in objs))
 
     def do_all(self, arg):
         """List all instances or list instances by class name
@@ -74,15 +136,13 @@ class HBNBCommand(cmd.Cmd):
             all BaseModel"""
         args = arg.split()
         classname = args[0] if len(args) > 0 else None
-        if classname is not None and classname not in classes_to_str(
-                HBNBCommand.__classes):
+        if classname is not None and \
+                classname not in HBNBCommand.__class_names:
             print("** class doesn't exist **")
             return
 
-        objs = storage.all()
-        data = [str(val) for key, val in objs.items()
-                if not classname or key.startswith(classname)]
-        print(data)
+        objs = storage.all(classname)
+        print([str(val) for val in objs.values()])
 
     def do_show(self, arg):
         """Shows an instance based on the class name and id
@@ -94,31 +154,56 @@ class HBNBCommand(cmd.Cmd):
         results = validate_args(
             args, HBNBCommand.__classes, hasId=True, validateInstance=True)
         if results:
-            print(results[2])
+            print(results[1])
 
     def do_destroy(self, arg):
-        """Deletes an instance based on the class name and id
-        destroy <classname> <id>
+        """Deletes instances based on the class name and ids, along with
+        their related instances, e.g. the reviews of a place, with
+        on_delete=cascade, or only if they have none with on_delete=restrict
+        destroy <classname> <id>[,<id>...] [on_delete=cascade|restrict]
 
         Example:
-            destroy BaseModel d9a1b3bc-c104-4347-8432-33971115763c"""
+            destroy BaseModel d9a1b3bc-c104-4347-8432-33971115763c
+            destroy User d9a1b3bc-c104-4347-8432-33971115763c on_delete=cascade
+            """
+        if HBNBCommand.__read_only():
+            return
         args = arg.split()
         results = validate_args(
-            args, HBNBCommand.__classes, hasId=True, validateInstance=True)
+            args[:2], HBNBCommand.__classes, hasId=True,
+            validateInstance=True, many=True)
         if not results:
             return
+        on_delete = None
+        # the other words are ignored
+        for word in args[2:]:
+            if word.startswith("on_delete="):
+                on_delete = word[len("on_delete="):]
+                if on_delete not in [CASCADE, RESTRICT]:
+                    print("** not a valid value **")
+                    return
 
-        className, objs, obj, _, _ = results
-        del objs[f'{className}.{cast(BaseModel, obj).id}']
-        storage.save()
+        _, objs, _, _ = results
+        # the batch is undone when an instance has related instances which
+        # restrict its deletion
+        try:
+            with storage.batch():
+                for obj in objs:
+                    storage.delete(obj, on_delete)
+                storage.save()
+        except ValueError as error:
+            print("** {} **".format(error))
 
     def do_update(self, arg):
-        """Updates an instance based on the class name and id
-        update <classname> <id> <attribute name> <attribute value>
+        """Updates instances based on the class name and ids
+        update <classname> <id>[,<id>...] <attribute name> <attribute value>
+        update <classname> <id>[,<id>...] <dictionary>
 
         Example:
             update BaseModel d9a1b3bc-c104-4347-8432-33971115763c msg "Hi You"
             """
+        if HBNBCommand.__read_only():
+            return
 
         args = arg.split()
         try:
@@ -131,11 +216,11 @@ class HBNBCommand(cmd.Cmd):
 
         results = validate_args(
             args, HBNBCommand.__classes, hasId=True, validateInstance=True,
-            hasAttrs=True)
+            hasAttrs=True, many=True)
         if not results:
             return
 
-        _, _, obj, key, val = results
+        _, objs, key, val = results
 
         # attributes not allowed to be modified
         if key in HBNBCommand.__no_mod_attrs:
@@ -153,8 +238,10 @@ class HBNBCommand(cmd.Cmd):
 
         val = cast_str_value(val)
         if type(val) in [int, str, float]:
-            setattr(obj, cast(str, key), val)
-            storage.save()
+            with storage.batch():
+                for obj in objs:
+                    setattr(obj, cast(str, key), val)
+                storage.save()
         else:
             print("** not a valid value **")
 
@@ -164,19 +251,18 @@ class HBNBCommand(cmd.Cmd):
 
         results = validate_args(
             arg.split(), HBNBCommand.__classes, hasId=True,
-            validateInstance=True)
+            validateInstance=True, many=True)
         if not results:
             return
 
-        _, _, obj, _, _ = results
-        attrs = parse_str_dict(arg[dictIndex:])
-        anyUpdates = False
-        for k, v in attrs:
-            if k in HBNBCommand.__no_mod_attrs:
-                continue
-            setattr(obj, k, v)
-            anyUpdates = True
-        if anyUpdates:
+        _, objs, _, _ = results
+        attrs = list(parse_str_dict(arg[dictIndex:]))
+        with storage.batch():
+            for obj in objs:
+                for k, v in attrs:
+                    if k in HBNBCommand.__no_mod_attrs:
+                        continue
+                    setattr(obj, k, v)
             storage.save()
 
     def do_count(self, arg):
@@ -189,16 +275,152 @@ class HBNBCommand(cmd.Cmd):
         if not results:
             return
 
-        className = results[0]
-        objs = storage.all()
-        print(len([key for key in objs.keys() if key.startswith(className)]))
+        print(storage.count(results[0]))
+
+    def do_search(self, arg):
+        """Prints the instances of a class whose text has the words
+        searched, the best matches first, 10 of them by default
+        search <classname> "<words>" [<count>]
+
+        Example:
+            search Place "quiet garden"
+            search Review "clean" 50"""
+        try:
+            args = shlex.split(arg)
+        except ValueError:
+            print("** not a valid value **")
+            return
+        results = validate_args(args, HBNBCommand.__classes)
+        if not results:
+            return
+        if len(args) < 2:
+            print("** words missing **")
+            return
+
+        limit = 10
+        if len(args) > 2:
+            if not args[2].isdigit() or int(args[2]) < 1:
+                print("** not a valid value **")
+                return
+            limit = int(args[2])
+
+        try:
+            found = storage.search(results[0], args[1], limit)
+        except ValueError as error:
+            print("** {} **".format(error))
+            return
+        for _, obj in found:
+            print(obj)
+
+    def do_aggregate(self, arg):
+        """Prints the number of instances of a class, and the sum, average,
+        minimum or maximum of their attributes, for every value of an
+        attribute if one is given
+        aggregate <classname> [<attribute>] [<function>=<attribute> ...]
+
+        Example:
+            aggregate Place city_id avg=price_by_night max=price_by_night
+            aggregate Review place_id"""
+        args = arg.split()
+        results = validate_args(args, HBNBCommand.__classes)
+        if not results:
+            return
+
+        group_by = None
+        aggregates = {}
+        for word in args[1:]:
+            function, equal, attr = word.partition('=')
+            if equal and function and attr:
+                aggregates[function] = attr
+            elif not equal and group_by is None:
+                group_by = word
+            else:
+                print("** not a valid value **")
+                return
+
+        try:
+            found = storage.aggregate(results[0], group_by, **aggregates)
+        except ValueError as error:
+            print("** {} **".format(error))
+            return
+        if group_by is None:
+            print(found)
+        else:
+            for group, values in found.items():
+                print("{}: {}".format(group, values))
 
     def do_quit(self, _):
         """Quit command to exit the program"""
+        # write the changes the flusher thread did not write yet
+        storage.flush()
         return True
 
     do_EOF = do_quit
 
+    def run_batch(self, lines, flush_every=0):
+        """Run the commands of lines in storage batches, so the changes are
+        saved once at the end, or every flush_every commands, instead of
+        after every command. It stops at the first quit or EOF command.
+
+        A command raising an exception has its changes undone and its line
+        reported to the standard error, and the next commands still run.
+
+        Args:
+            lines (iterable): the command lines
+            flush_every (int): number of commands between the saves, 0 to
+                only save at the end
+
+        Returns:
+            int: the number of commands run
+        """
+        lines = enumerate(lines, 1)
+        count = 0
+        stop = False
+        storage.refresh()
+        while not stop:
+            # a save at the end of every batch
+            with storage.batch():
+                for number, line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    count += 1
+                    try:
+                        # only undoes the changes of the command
+                        with storage.batch():
+                            stop = self.onecmd(line)
+                    except Exception as error:
+                        print('** line {}: {}: {} **'.format(
+                            number, line, error), file=sys.stderr)
+                    if stop:
+                        break
+                    if flush_every and count % flush_every == 0:
+                        break
+                else:
+                    stop = True
+        return count
+
 
 if __name__ == '__main__':
-    HBNBCommand().cmdloop()
+    if len(sys.argv) > 1:
+        # console.py --batch <file or -> [--flush-every <n>]
+        if len(sys.argv) not in [3, 5] or sys.argv[1] != '--batch' or \
+                len(sys.argv) == 5 and (sys.argv[3] != '--flush-every' or
+                                        not sys.argv[4].isdecimal()):
+            print('Usage: {} [--batch <file> [--flush-every <n>]]'.format(
+                sys.argv[0]), file=sys.stderr)
+            sys.exit(1)
+        flush_every = int(sys.argv[4]) if len(sys.argv) == 5 else 0
+        start = time.perf_counter()
+        if sys.argv[2] == '-':
+            count = HBNBCommand().run_batch(sys.stdin, flush_every)
+        else:
+            with open(sys.argv[2]) as f:
+                count = HBNBCommand().run_batch(f, flush_every)
+        storage.flush()
+        seconds = time.perf_counter() - start
+        print('{} commands in {:.2f}s ({:.0f} commands/s)'.format(
+            count, seconds, count / seconds if seconds else 0),
+            file=sys.stderr)
+    else:
+        HBNBCommand().cmdloop()
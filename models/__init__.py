@@ -1,8 +1,40 @@
 #!/usr/bin/python3
 """Initialise the models package."""
-
+from os import getenv
 from models.engine.file_storage import FileStorage
 
-storage = FileStorage()
+# the options all the storage engines take
+storage_options = {'lazy': getenv('HBNB_STORAGE_LAZY') == '1',
+                   'compact_models': getenv('HBNB_COMPACT_MODELS') == '1',
+                   'file_format': getenv('HBNB_STORAGE_FORMAT'),
+                   'write_behind':
+                   getenv('HBNB_STORAGE_WRITE_BEHIND') == '1'}
+
+if getenv('HBNB_TYPE_STORAGE') == 'db' and \
+        getenv('HBNB_STORAGE_CACHE_SIZE'):
+    from models.engine.cached_storage import CachedStorage
+    storage = CachedStorage(
+        db_path=getenv('HBNB_STORAGE_FILE') or 'hbnb.db',
+        cache_size=int(getenv('HBNB_STORAGE_CACHE_SIZE')), **storage_options)
+elif getenv('HBNB_TYPE_STORAGE') == 'db':
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(db_path=getenv('HBNB_STORAGE_FILE') or 'hbnb.db',
+                        **storage_options)
+elif getenv('HBNB_TYPE_STORAGE') == 'sharded':
+    from models.engine.sharded_storage import ShardedStorage
+    storage = ShardedStorage(
+        directory=getenv('HBNB_STORAGE_FILE') or 'hbnb_storage',
+        **storage_options)
+elif getenv('HBNB_TYPE_STORAGE') == 'snapshot':
+    from models.engine.snapshot_storage import SnapshotStorage
+    storage = SnapshotStorage(
+        file_path=getenv('HBNB_STORAGE_FILE') or 'file.snap',
+        compact_models=storage_options['compact_models'])
+else:
+    storage = FileStorage(journal=getenv('HBNB_STORAGE_JOURNAL') == '1',
+                          file_path=getenv('HBNB_STORAGE_FILE'),
+                          keep_snapshots=int(
+                              getenv('HBNB_STORAGE_SNAPSHOTS') or 0),
+                          **storage_options)
 
 storage.reload()
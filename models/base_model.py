@@ -9,6 +9,11 @@ from models import storage
 class BaseModel:
     """Define all common attributes/methods for all classes in project."""
 
+    # the attributes the storage engine keeps an index of
+    indexed_attrs = ()
+    # the attributes searched by `storage.search()`
+    text_attrs = ()
+
     def __init__(self, *args, **kwargs):
         """Initiate a BaseModel instance."""
         if kwargs:
@@ -16,25 +21,39 @@ class BaseModel:
                 if key == '__class__':
                     continue
 
-                if key in ['created_at', 'updated_at']:
+                # the binary format decodes the dates itself
+                if key in ['created_at', 'updated_at'] and \
+                        isinstance(value, str):
                     value = datetime.fromisoformat(value)
 
-                setattr(self, key, value)
+                # not tracked, the instance is not stored yet
+                super().__setattr__(key, value)
         else:
             self.id = str(uuid.uuid4())
             self.created_at = datetime.now()
             self.updated_at = self.created_at
             storage.new(self)
 
+    def __setattr__(self, name, value):
+        """Set an attribute and mark the instance as modified."""
+        old = getattr(self, name, None)
+        super().__setattr__(name, value)
+        storage.mark_dirty(self, name, old)
+
     def __str__(self):
         """Return a string representation of the instance."""
         return "[{}] ({}) {}".format(
-            self.__class__.__name__, self.id, self.__dict__)
+            self.__class__.__name__, self.id, self._attributes())
+
+    def _attributes(self):
+        """Return the dict of the attributes set on the instance."""
+        return self.__dict__
 
     def save(self):
         """Update the attribute `updated_at` with the current datetime."""
-        self.updated_at = datetime.now()
-        storage.save()
+        with storage.batch():
+            self.updated_at = datetime.now()
+            storage.save()
 
     def to_dict(self):
         """Return a dictionary containing all attributes of the instance."""
@@ -42,7 +61,7 @@ class BaseModel:
 
         ins_dict.update({'__class__': self.__class__.__name__})
 
-        for key, value in self.__dict__.items():
+        for key, value in self._attributes().items():
             if value:
                 if key in ['created_at', 'updated_at']:
                     ins_dict.update({key: getattr(self, key).isoformat()})
@@ -2,10 +2,15 @@
 """This module defines the City class."""
 
 from models.base_model import BaseModel
+from models.engine.relations import Relationship
 
 
 class City(BaseModel):
     """Define City."""
 
+    indexed_attrs = ('state_id',)
+
     state_id = ''
     name = ''
+
+    places = Relationship('Place', 'city_id')
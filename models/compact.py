@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+"""This module defines the compact representation of the model classes."""
+
+import uuid
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# model class -> its compact class
+_compact_classes = {}
+
+
+class _CompactAttributes:
+    """Route the attributes of the compact classes to their slots.
+
+    It comes right after `BaseModel` in the MRO of the compact classes, so
+    the attributes `BaseModel` sets through `super().__setattr__()` land in
+    a slot when there's one, or in `_extra` otherwise. `_extra` is a tuple
+    of alternated names and values, allocated for every instance with
+    extra attributes, so it costs more than the shared-key `__dict__` of
+    the model classes: with an attribute added by `update`, a compact
+    place takes about 430 bytes against 400 for a `Place`.
+    """
+
+    __slots__ = ()
+
+    def __extra(self):
+        """Return the extra attributes tuple."""
+        try:
+            return object.__getattribute__(self, '_extra')
+        except AttributeError:
+            return ()
+
+    def __setattr__(self, name, value):
+        """Set a slot, or an extra attribute if there's no slot for it."""
+        if name in self._slot_names:
+            object.__setattr__(self, name, value)
+            return
+        extra = self.__extra()
+        for i in range(0, len(extra), 2):
+            if extra[i] == name:
+                extra = extra[:i + 1] + (value,) + extra[i + 2:]
+                break
+        else:
+            extra += (name, value)
+        object.__setattr__(self, '_extra', extra)
+
+    def __delattr__(self, name):
+        """Delete a slot or an extra attribute."""
+        if name in self._slot_names:
+            object.__delattr__(self, name)
+            return
+        extra = self.__extra()
+        for i in range(0, len(extra), 2):
+            if extra[i] == name:
+                object.__setattr__(self, '_extra', extra[:i] + extra[i + 2:])
+                return
+        raise AttributeError(name)
+
+    def __getattr__(self, name):
+        """Return an extra attribute, or the class default of a declared
+        attribute not set yet."""
+        extra = self.__extra()
+        for i in range(0, len(extra), 2):
+            if extra[i] == name:
+                return extra[i + 1]
+        if name in self._defaults:
+            return self._defaults[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            self.__class__.__name__, name))
+
+
+def _attributes(self):
+    """Return the dict of the attributes set on the instance."""
+    attrs = {}
+    for name in self._slot_names:
+        try:
+            attrs[name] = object.__getattribute__(self, name)
+        except AttributeError:
+            pass
+    try:
+        extra = object.__getattribute__(self, '_extra')
+    except AttributeError:
+        extra = ()
+    for i in range(0, len(extra), 2):
+        attrs[extra[i]] = extra[i + 1]
+    return attrs
+
+
+def _get_id(self):
+    """Return the id of the instance."""
+    value = self._id
+    if isinstance(value, bytes):
+        return str(uuid.UUID(bytes=value))
+    return value
+
+
+def _set_id(self, value):
+    """Set the id, packed into 16 bytes if it's a UUID."""
+    try:
+        packed = uuid.UUID(value)
+        if str(packed) == value:
+            value = packed.bytes
+    except (TypeError, ValueError, AttributeError):
+        pass
+    object.__setattr__(self, '_id', value)
+
+
+def _datetime_property(slot):
+    """Return a property keeping a naive datetime as microseconds in slot."""
+
+    def get(self):
+        """Return the datetime."""
+        value = object.__getattribute__(self, slot)
+        if isinstance(value, int):
+            return _EPOCH + value * _MICROSECOND
+        return value
+
+    def set(self, value):
+        """Set the datetime, packed into an int if it's a naive one."""
+        if isinstance(value, datetime) and value.tzinfo is None:
+            value = (value - _EPOCH) // _MICROSECOND
+        object.__setattr__(self, slot, value)
+
+    return property(get, set)
+
+
+def _declared_attrs(cls):
+    """Return the names and default values of the attributes declared by
+    the model class cls and its parents."""
+    from models.base_model import BaseModel
+
+    defaults = {}
+    for klass in reversed(cls.__mro__):
+        if not issubclass(klass, BaseModel) or klass is BaseModel:
+            continue
+        for name, value in vars(klass).items():
+            # properties and relationships are descriptors
+            if name.startswith('_') or \
+                    name in ['indexed_attrs', 'text_attrs'] or \
+                    callable(value) or hasattr(type(value), '__get__'):
+                continue
+            defaults[name] = value
+    return defaults
+
+
+def compact_class(cls):
+    """Return the compact class of the model class cls.
+
+    The compact class is a subclass of cls with the same name. Its
+    instances never use an instance dict: the id, the dates and the
+    attributes declared by cls are kept in slots, the id as 16 bytes when
+    it's a UUID and the dates as microseconds, and the other attributes in
+    an `_extra` tuple. `to_dict()`, `__str__()` and the kwargs constructor
+    behave the same, except that the attributes are listed in the slots
+    order.
+
+    The gain is small, about 370 bytes per place against 400 for a
+    `Place` (465 once serialized, which builds its instance dict), and
+    lost when the instances have attributes not declared by cls, see
+    `benchmarks/compact_memory.py`.
+    """
+    compact = _compact_classes.get(cls)
+    if compact is not None:
+        return compact
+
+    defaults = _declared_attrs(cls)
+    compact = type(cls.__name__, (cls, _CompactAttributes), {
+        '__slots__': ('_id', '_created_at', '_updated_at', '_extra') +
+        tuple(defaults.keys()),
+        '__module__': cls.__module__,
+        '__qualname__': cls.__qualname__,
+        '__doc__': cls.__doc__,
+        '_slot_names': ('id', 'created_at', 'updated_at') +
+        tuple(defaults.keys()),
+        '_defaults': defaults,
+        'id': property(_get_id, _set_id),
+        'created_at': _datetime_property('_created_at'),
+        'updated_at': _datetime_property('_updated_at'),
+        # BaseModel comes first in the MRO, so it's set on the class itself
+        '_attributes': _attributes,
+    })
+    _compact_classes[cls] = compact
+    return compact
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+"""This module defines the aggregates of the attributes of the stored
+objects, e.g. the average price of the places of every city."""
+from collections import Counter
+
+# the count of the objects is always computed
+FUNCTIONS = ('sum', 'avg', 'min', 'max')
+
+
+def is_number(value):
+    """Return whether value is an int or a float, but not a bool."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _Stats:
+    """The running count, sum, minimum and maximum of the numbers of an
+    attribute of a group of objects."""
+
+    __slots__ = ('count', 'total', 'low', 'high', 'values')
+
+    def __init__(self, removable):
+        """Initiate a _Stats instance, keeping the count of every value
+        when they may be removed, to find the new minimum or maximum."""
+        self.count = 0
+        self.total = 0
+        self.low = None
+        self.high = None
+        self.values = Counter() if removable else None
+
+    def add(self, value):
+        """Count the number value."""
+        self.count += 1
+        self.total += value
+        if self.low is None or value < self.low:
+            self.low = value
+        if self.high is None or value > self.high:
+            self.high = value
+        if self.values is not None:
+            self.values[value] += 1
+
+    def remove(self, value):
+        """Uncount the number value."""
+        self.count -= 1
+        self.total -= value
+        self.values[value] -= 1
+        if self.values[value]:
+            return
+        del self.values[value]
+        if not self.values:
+            self.total = 0
+            self.low = self.high = None
+            return
+        if value == self.low:
+            self.low = min(self.values)
+        if value == self.high:
+            self.high = max(self.values)
+
+
+class Aggregate:
+    """The count of the stored objects of a class, and the sum, average,
+    minimum or maximum of some of their attributes, by the value of the
+    attribute group_by.
+
+    The objects are added one at a time, so the aggregates are computed in
+    a single pass without keeping the objects. It's also an `ObjectMap`
+    listener, so a materialized aggregate follows the objects added,
+    updated and deleted through the storage engine. The values which are
+    not numbers are left out of the sums, averages, minimums and maximums,
+    the objects whose group_by value can't be a dict key are left out.
+
+    Example:
+        >>> aggregate = Aggregate('city_id', avg='price_by_night')
+        >>> for place in storage.all(Place).values():
+        ...     aggregate.add(None, place)
+        >>> aggregate.results()
+        {'0001': {'count': 12, 'avg': 74.5}, ...}
+    """
+
+    def __init__(self, group_by=None, removable=False, **aggregates):
+        """Initiate an Aggregate instance.
+
+        Args:
+            group_by (str): the attribute grouping the objects, None to
+                aggregate all of them together
+            removable (bool): whether the objects may be removed, which
+                keeps the count of every value aggregated
+            aggregates (dict): function -> attribute, the functions being
+                sum, avg, min and max
+
+        Raises:
+            ValueError: if a function is not known
+        """
+        for function in aggregates:
+            if function not in FUNCTIONS:
+                raise ValueError('unknown aggregate {}'.format(function))
+        self.group_by = group_by
+        self.removable = removable
+        self.aggregates = aggregates
+        self.attrs = set(aggregates.values())
+        # group value -> [number of objects, {attribute: _Stats}]
+        self.groups = {}
+
+    def __values(self, obj, name=None, old=None):
+        """Return the group value and the values of the aggregated
+        attributes of obj, taking old as the value of the attribute
+        name."""
+        def value(attr):
+            return old if attr == name else getattr(obj, attr, None)
+
+        return (None if self.group_by is None else value(self.group_by),
+                {attr: value(attr) for attr in self.attrs})
+
+    def __add(self, group, values):
+        """Add the values of an object to its group."""
+        try:
+            counts = self.groups.get(group)
+        except TypeError:
+            return
+        if counts is None:
+            counts = self.groups[group] = [0, {
+                attr: _Stats(self.removable) for attr in self.attrs}]
+        counts[0] += 1
+        for attr, value in values.items():
+            if is_number(value):
+                counts[1][attr].add(value)
+
+    def __remove(self, group, values):
+        """Remove the values of an object from its group."""
+        try:
+            counts = self.groups.get(group)
+        except TypeError:
+            return
+        if counts is None:
+            return
+        counts[0] -= 1
+        if not counts[0]:
+            del self.groups[group]
+            return
+        for attr, value in values.items():
+            if is_number(value):
+                counts[1][attr].remove(value)
+
+    def add(self, key, obj):
+        """Aggregate the object stored under key."""
+        self.__add(*self.__values(obj))
+
+    def remove(self, key, obj):
+        """Remove the object stored under key from the aggregates."""
+        self.__remove(*self.__values(obj))
+
+    def clear(self):
+        """Remove all the objects from the aggregates."""
+        self.groups.clear()
+
+    def changed(self, key, obj, name, old):
+        """Move the object to its new group or values if the attribute
+        changed is aggregated."""
+        if name == self.group_by or name in self.attrs:
+            self.__remove(*self.__values(obj, name, old))
+            self.__add(*self.__values(obj))
+
+    def results(self):
+        """Return the dict of the group values to the dict of their count
+        and aggregates, or only the latter if there's no group_by."""
+        results = {}
+        for group, (count, stats) in self.groups.items():
+            result = results[group] = {'count': count}
+            for function, attr in self.aggregates.items():
+                numbers = stats[attr]
+                if not numbers.count:
+                    result[function] = None
+                elif function == 'sum':
+                    result[function] = numbers.total
+                elif function == 'avg':
+                    result[function] = numbers.total / numbers.count
+                elif function == 'min':
+                    result[function] = numbers.low
+                else:
+                    result[function] = numbers.high
+        if self.group_by is None:
+            return results.get(None, dict(
+                {'count': 0}, **dict.fromkeys(self.aggregates)))
+        return results
@@ -0,0 +1,316 @@
+#!/usr/bin/python3
+"""This module defines the storage engine keeping a bounded working set of
+the objects stored in a SQLite database."""
+import weakref
+from collections import OrderedDict
+from itertools import islice
+from models.engine.db_storage import DBStorage
+from models.engine.object_map import ObjectMap
+
+
+class _WorkingSet:
+    """Follow the objects in memory, the least recently used first, and the
+    objects still referenced elsewhere, evicted or not.
+
+    It's an `ObjectMap` listener of all the classes.
+    """
+
+    def __init__(self):
+        """Initiate a _WorkingSet instance."""
+        # key -> None, the least recently used first
+        self.recent = OrderedDict()
+        # key -> object, as long as the object is alive
+        self.alive = weakref.WeakValueDictionary()
+
+    def add(self, key, obj):
+        """Keep the object stored under key as the most recently used."""
+        self.recent[key] = None
+        self.recent.move_to_end(key)
+        self.alive[key] = obj
+
+    def remove(self, key, obj):
+        """Forget the object stored under key."""
+        self.recent.pop(key, None)
+        self.alive.pop(key, None)
+
+    def clear(self):
+        """Forget all the objects."""
+        self.recent.clear()
+        self.alive.clear()
+
+    def changed(self, key, obj, name, old):
+        """Keep the changed object as the most recently used."""
+        self.recent.move_to_end(key)
+
+
+class CachedStorage(DBStorage):
+    """This class keeps at most `cache_size` instances in memory, the ones
+    used last, the others staying in the SQLite database of `DBStorage`.
+
+    `get()` reads the objects missing from memory from the database, and
+    the least recently used ones are evicted past `cache_size`, the dirty
+    ones being written back first, all at once. The objects changed inside
+    `batch()` stay in memory until the end of the batch, so it can still
+    undo the changes. An object evicted while it's still referenced
+    elsewhere is looked up again as the same instance, and changing or
+    deleting it brings it back into memory.
+
+    `all()`, `count()` and `find()` read the database, the objects in
+    memory taking precedence, without keeping the objects they read in
+    memory. `all()` returns a new dict then, even without a class. The
+    indexes and the materialized aggregates following all the objects of a
+    class (`columns()`, `spatial()`, `search()`) are not available.
+
+    `hits`, `misses`, `evictions` and `writebacks` count the lookups
+    answered from memory, the lookups which read the database, the objects
+    evicted and the dirty objects written to the database to evict the
+    least recently used ones.
+    """
+
+    def __init__(self, db_path='hbnb.db', cache_size=10000, lazy=False,
+                 compact_models=False, file_format=None, write_behind=False,
+                 flush_interval=1.0, flush_after=100):
+        """Initiate a CachedStorage instance.
+
+        Args:
+            db_path (str): the path of the database file
+            cache_size (int): the number of objects kept in memory
+            lazy (bool): unused, the objects are always read on their first
+                lookup
+            compact_models (bool): build the objects with the compact
+                classes
+            file_format (str): the name of the format of the records, JSON
+                if it's None
+            write_behind (bool): write the changes from a background
+                thread
+            flush_interval (float): seconds between the background writes
+            flush_after (int): number of changed objects after which they
+                are written without waiting for the interval
+
+        Raises:
+            ValueError: if cache_size is less than 1
+        """
+        if cache_size < 1:
+            raise ValueError('cache_size must be at least 1')
+        super().__init__(db_path, compact_models=compact_models,
+                         file_format=file_format, write_behind=write_behind,
+                         flush_interval=flush_interval,
+                         flush_after=flush_after)
+        self.cache_size = cache_size
+        self.hits = self.misses = self.evictions = self.writebacks = 0
+        self.__working_set = _WorkingSet()
+        self.__objects().add_listener(self.__working_set)
+
+    def __objects(self):
+        """Return the ObjectMap of the objects in memory."""
+        return super().all()
+
+    def cache_info(self):
+        """Return the dict of the counters, and of the number of objects in
+        memory."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'writebacks': self.writebacks,
+                'size': len(self.__working_set.recent),
+                'cache_size': self.cache_size}
+
+    def get(self, cls, id):
+        """Return the object of cls with the given id, or None, reading it
+        from the database if it's not in memory."""
+        key = '{}.{}'.format(CachedStorage._class_name(cls), id)
+        objs = self.__objects()
+        obj = objs.get(key)
+        if obj is not None:
+            self.hits += 1
+            self.__working_set.recent.move_to_end(key)
+            return obj
+
+        obj = self.__working_set.alive.get(key)
+        if obj is not None:
+            self.hits += 1
+            objs[key] = obj
+        else:
+            self.misses += 1
+            # deleted since the last save
+            if key in self._pending_keys():
+                return None
+            record = self._fetch(key)
+            if record is None:
+                return None
+            self._reload_object(key, record)
+            obj = objs[key]
+        self.__shrink()
+        return obj
+
+    def new(self, obj):
+        """Add the obj to the objects in memory, evicting the least recently
+        used ones past cache_size."""
+        super().new(obj)
+        self.__shrink()
+
+    def mark_dirty(self, obj, name=None, old=None):
+        """Mark obj as modified since the last save if it's stored, bringing
+        it back into memory if it was evicted."""
+        readmitted = self.__readmit(obj)
+        super().mark_dirty(obj, name, old)
+        if readmitted:
+            self.__shrink()
+
+    def delete(self, obj=None, on_delete=None):
+        """Delete obj, along with the objects its cascading relationships
+        relate to it, bringing it back into memory if it was evicted."""
+        if obj is not None:
+            self.__readmit(obj)
+        super().delete(obj, on_delete)
+
+    def _related(self, relationship, obj):
+        """Return the list of the objects relationship relates to obj,
+        brought into memory so they can be deleted along with it."""
+        related = super()._related(relationship, obj)
+        objs = self.__objects()
+        for other in related:
+            key = '{}.{}'.format(type(other).__name__, other.id)
+            if key not in objs:
+                objs[key] = other
+        return related
+
+    def __readmit(self, obj):
+        """Bring obj back into memory if it was evicted, and return whether
+        it was."""
+        key = '{}.{}'.format(type(obj).__name__, getattr(obj, 'id', None))
+        objs = self.__objects()
+        if key in objs or self.__working_set.alive.get(key) is not obj:
+            return False
+        objs[key] = obj
+        return True
+
+    def all(self, cls=None):
+        """Return a new dict of all the objects, or of the objects of cls,
+        read from the database."""
+        return self.__scan(CachedStorage._class_name(cls))
+
+    def count(self, cls=None):
+        """Return the number of objects, or of the objects of cls."""
+        name = CachedStorage._class_name(cls)
+        count = self._stored_count(name)
+        objs = self.__objects()
+        for key in self._pending_keys():
+            if name is not None and ObjectMap.class_name(key) != name:
+                continue
+            stored = self._fetch(key) is not None
+            if key in objs and not stored:
+                count += 1
+            elif key not in objs and stored:
+                count -= 1
+        return count
+
+    def iter_find(self, cls, **equalities):
+        """Yield the objects of cls whose attributes equal the given values,
+        read from the database."""
+        name = CachedStorage._class_name(cls)
+        for obj in self.__scan(name, equalities).values():
+            if all(getattr(obj, attr, None) == value
+                   for attr, value in equalities.items()):
+                yield obj
+
+    def __scan(self, name=None, equalities=None):
+        """Return the dict of all the objects, or of the objects of the
+        class name which may match the equalities, the objects in memory or
+        still referenced taking precedence over their rows, and the objects
+        not saved yet added.
+
+        The objects read are only kept alive by the dict returned.
+        """
+        objs = self.__objects()
+        alive = self.__working_set.alive
+        pending = self._pending_keys()
+        found = {}
+        for key, record in self._rows(name, equalities):
+            obj = objs.get(key)
+            if obj is None:
+                # deleted since the last save
+                if key in pending:
+                    continue
+                obj = alive.get(key)
+            if obj is None:
+                value = self.format.decode(record)
+                obj = self.classes()[value['__class__']](**value)
+                alive[key] = obj
+            found[key] = obj
+        for key in pending:
+            obj = objs.get(key)
+            if obj is not None and key not in found and \
+                    (name is None or ObjectMap.class_name(key) == name):
+                found[key] = obj
+        return found
+
+    def _add_listener(self, listener, name):
+        """Refuse the indexes and the aggregates following all the objects
+        of a class, they are not all in memory.
+
+        Raises:
+            ValueError: always
+        """
+        raise ValueError(
+            'only {} objects are kept in memory'.format(self.cache_size))
+
+    def save(self):
+        """Write the changes made since the last save to the database, as
+        `FileStorage.save()` does, then evict the objects past
+        cache_size."""
+        super().save()
+        self.__shrink()
+
+    def __shrink(self):
+        """Evict the least recently used objects past cache_size, writing
+        the dirty objects back first. The dirty objects stay in memory if
+        they can't be written yet, inside a batch or in write-behind
+        mode."""
+        recent = self.__working_set.recent
+        over = len(recent) - self.cache_size
+        if over <= 0:
+            return
+        pending = self._pending_keys()
+        if any(key in pending for key in islice(recent, over)):
+            dirty = len(pending)
+            super().save()
+            if not pending:
+                self.writebacks += dirty
+
+        victims = list(islice((key for key in recent if key not in pending),
+                              over))
+        for key in victims:
+            obj = self._unload(key)
+            # an evicted object is the same instance while it's referenced
+            self.__working_set.alive[key] = obj
+            self.evictions += 1
+
+    def _read_objects(self):
+        """Forget the objects in memory not changed since the last save,
+        they are read from the database on their next lookup."""
+        self._database_changed()
+        self.__drop_saved()
+
+    def _refresh(self):
+        """Forget the objects in memory not changed since the last save if
+        other processes committed to the database."""
+        if not self._database_changed():
+            return False
+        self.__drop_saved()
+        return True
+
+    def __drop_saved(self):
+        """Forget the objects not changed since the last save, even the
+        ones still referenced, so they are read again."""
+        pending = self._pending_keys()
+        for key in [key for key in self.__working_set.recent
+                    if key not in pending]:
+            self._unload(key)
+        self.__working_set.alive.clear()
+        for key, obj in self.__objects().items():
+            self.__working_set.alive[key] = obj
+
+    def close(self):
+        """Write the changes waiting to be written, close the connection to
+        the database and stop following the objects."""
+        super().close()
+        self.__objects().remove_listener(self.__working_set)
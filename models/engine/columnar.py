@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""This module defines the columnar view of the numeric attributes of the
+stored objects, used for vectorized filtering with NumPy."""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def numeric_attrs(cls):
+    """Return the names of the attributes cls declares with an int or a
+    float default value, in declaration order."""
+    attrs = []
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if not name.startswith('_') and name not in attrs and \
+                    isinstance(value, (int, float)) and \
+                    not isinstance(value, bool):
+                attrs.append(name)
+    return attrs
+
+
+class ColumnStore:
+    """Keep the numeric attributes of the stored objects of a class in
+    NumPy arrays, one per attribute, alongside the list of their keys.
+
+    It's an `ObjectMap` listener, so it follows the objects added, updated
+    and deleted through the storage engine. Values which are not numbers
+    are kept as NaN, so they never match a range.
+    """
+
+    def __init__(self, attrs, capacity=1024):
+        """Initiate a ColumnStore instance.
+
+        Args:
+            attrs (list[str]): the names of the numeric attributes
+            capacity (int): the initial size of the arrays
+        """
+        if numpy is None:
+            raise ImportError('ColumnStore requires numpy')
+        self.attrs = list(attrs)
+        self.keys = []
+        self.objs = []
+        self.rows = {}
+        self.capacity = capacity
+        self.columns = {attr: numpy.empty(capacity) for attr in self.attrs}
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.keys)
+
+    def column(self, attr):
+        """Return the array of the values of attr, one per row."""
+        return self.columns[attr][:len(self.keys)]
+
+    @staticmethod
+    def __number(value):
+        """Return value as a float, or NaN if it's not a number."""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        return numpy.nan
+
+    def add(self, key, obj):
+        """Add a row for the object stored under key."""
+        row = len(self.keys)
+        if row == self.capacity:
+            self.capacity *= 2
+            for attr in self.attrs:
+                self.columns[attr] = numpy.resize(
+                    self.columns[attr], self.capacity)
+        self.keys.append(key)
+        self.objs.append(obj)
+        self.rows[key] = row
+        for attr in self.attrs:
+            self.columns[attr][row] = ColumnStore.__number(
+                getattr(obj, attr, None))
+
+    def remove(self, key, obj):
+        """Remove the row of the object stored under key, moving the last
+        row in its place."""
+        row = self.rows.pop(key)
+        last = len(self.keys) - 1
+        if row != last:
+            self.keys[row] = self.keys[last]
+            self.objs[row] = self.objs[last]
+            self.rows[self.keys[row]] = row
+            for column in self.columns.values():
+                column[row] = column[last]
+        self.keys.pop()
+        self.objs.pop()
+
+    def clear(self):
+        """Remove all the rows."""
+        self.keys.clear()
+        self.objs.clear()
+        self.rows.clear()
+
+    def changed(self, key, obj, name, old):
+        """Update the row of the object if a column attribute changed."""
+        if name in self.columns:
+            self.columns[name][self.rows[key]] = ColumnStore.__number(
+                getattr(obj, name, None))
+
+    def mask(self, **ranges):
+        """Return the boolean array of the rows within all the ranges.
+
+        Args:
+            ranges (dict[str, tuple]): attribute -> (low, high), both
+                bounds are inclusive and None means unbounded
+        """
+        mask = numpy.ones(len(self.keys), dtype=bool)
+        for attr, (low, high) in ranges.items():
+            column = self.column(attr)
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        return mask
+
+    def select(self, order_by=None, descending=False, limit=None,
+               **ranges):
+        """Return the list of the objects within all the ranges.
+
+        Args:
+            order_by (str): the column to sort the objects by
+            descending (bool): sort from the greatest value
+            limit (int): the maximum number of objects returned
+            ranges (dict[str, tuple]): attribute -> (low, high)
+
+        Example:
+            >>> places.select(price_by_night=(None, 100),
+            >>>               max_guest=(4, None), order_by='price_by_night')
+        """
+        rows = numpy.flatnonzero(self.mask(**ranges))
+        if order_by is not None:
+            values = self.column(order_by)[rows]
+            if descending:
+                values = -values
+            rows = rows[numpy.argsort(values, kind='stable')]
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.objs[row] for row in rows]
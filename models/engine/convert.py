@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""This module converts a snapshot file of the storage engine from a file
+format to another, the changes appended to its journal included.
+
+Usage:
+    python3 -m models.engine.convert <source file> <destination file>
+"""
+import os
+import sys
+from models.engine.formats import format_for, get_format
+
+
+def convert(src, dst, src_format=None, dst_format=None):
+    """Convert the snapshot file src into dst, and return the number of
+    objects converted. The changes of the journal of src, `<src>.journal`,
+    are applied to its objects, so dst holds all the objects saved.
+
+    Args:
+        src (str): the path of the file to convert
+        dst (str): the path of the converted file
+        src_format (str): the name of the format of src, by extension if
+            it's None
+        dst_format (str): the name of the format of dst, by extension if
+            it's None
+    """
+    src_format = get_format(src_format) if src_format else format_for(src)
+    dst_format = get_format(dst_format) if dst_format else format_for(dst)
+    # key -> dict of the object, or None if it was deleted
+    changes = {}
+    if os.path.exists(src + '.journal'):
+        with open(src + '.journal', 'rb') as f:
+            for _, key, value, _ in src_format.read_journal(f):
+                changes[key] = value
+    entries = []
+    with open(src, 'rb' if src_format.binary else 'r') as f:
+        for key, value, _ in src_format.read(f):
+            value = changes.pop(key, value)
+            if value is not None:
+                entries.append((key, dst_format.encode_dict(value)))
+    # the objects created since the journal was last folded into src
+    entries.extend((key, dst_format.encode_dict(value))
+                   for key, value in changes.items() if value is not None)
+    with open(dst, 'wb' if dst_format.binary else 'w') as f:
+        dst_format.write(f, entries)
+    return len(entries)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Usage: {} <source file> <destination file>'.format(
+            sys.argv[0]), file=sys.stderr)
+        sys.exit(1)
+    print('{} objects converted'.format(convert(sys.argv[1], sys.argv[2])))
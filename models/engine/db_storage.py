@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+"""This module defines the SQLite storage engine of the project."""
+import json
+import sqlite3
+from models.engine.file_storage import FileStorage
+from models.engine.object_map import ObjectMap
+
+
+class DBStorage(FileStorage):
+    """This class stores the instances in a SQLite database.
+
+    The objects are kept in memory as by `FileStorage`, the database has a
+    row per object with the record of the object in the file format (JSON
+    by default). `save()` only upserts the rows of the objects created or
+    updated since the last save and deletes the rows of the deleted ones,
+    in a single transaction, and the database runs in WAL mode so a save
+    does not rewrite the database file.
+
+    `refresh()` merges the changes other processes committed, which SQLite
+    reports through `PRAGMA data_version`.
+
+    `reload()` reads every row, so all the objects stay in memory and the
+    memory taken grows with the database as it does with a file: the
+    database is where the objects are saved, not where they are looked
+    up. `CachedStorage` reads the objects from the database when they are
+    looked up and only keeps the ones used last in memory.
+    """
+
+    def __init__(self, db_path='hbnb.db', lazy=False, compact_models=False,
+                 file_format=None, write_behind=False, flush_interval=1.0,
+                 flush_after=100):
+        """Initiate a DBStorage instance.
+
+        Args:
+            db_path (str): the path of the database file
+            lazy (bool): build the objects on first access after reload
+            compact_models (bool): build the objects with the compact
+                classes
+            file_format (str): the name of the format of the records, JSON
+                if it's None
+            write_behind (bool): write the changes from a background
+                thread
+            flush_interval (float): seconds between the background writes
+            flush_after (int): number of changed objects after which they
+                are written without waiting for the interval
+        """
+        super().__init__(lazy=lazy, compact_models=compact_models,
+                         file_format=file_format or 'json',
+                         write_behind=write_behind,
+                         flush_interval=flush_interval,
+                         flush_after=flush_after)
+        self.db_path = db_path
+        self.__data_version = None
+        # the flusher thread writes through the connection too, the flushes
+        # are serialized by the storage lock
+        self.__connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        # WAL mode stays consistent after a crash with NORMAL, only the last
+        # transactions may be lost on a power failure
+        self.__connection.execute('PRAGMA synchronous=NORMAL')
+        with self.__connection:
+            self.__connection.execute(
+                'CREATE TABLE IF NOT EXISTS objects ('
+                'class TEXT NOT NULL, id TEXT NOT NULL, data NOT NULL, '
+                'PRIMARY KEY (class, id)) WITHOUT ROWID')
+
+    def _flush(self):
+        """Write the changes made since the last save to the database."""
+        with self.__connection:
+            for key, record in self._pending_records():
+                name = ObjectMap.class_name(key)
+                id = key[len(name) + 1:]
+                if record is None:
+                    self.__connection.execute(
+                        'DELETE FROM objects WHERE class = ? AND id = ?',
+                        (name, id))
+                else:
+                    self.__connection.execute(
+                        'INSERT OR REPLACE INTO objects (class, id, data) '
+                        'VALUES (?, ?, ?)', (name, id, record))
+
+    def compact(self):
+        """Save, then fold the WAL file back into the database."""
+        self._flush()
+        self.__connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def _read_objects(self):
+        """Read the objects of the database."""
+        self._database_changed()
+        for key, record in self._rows():
+            self._reload_object(key, record)
+
+    def _refresh(self):
+        """Apply the changes other processes committed to the database."""
+        if not self._database_changed():
+            return False
+        self._merge_records((key, record, None)
+                            for key, record in self._rows())
+        return True
+
+    def _database_changed(self):
+        """Return whether other processes committed to the database since
+        the last call."""
+        version = self.__get_data_version()
+        if version == self.__data_version:
+            return False
+        self.__data_version = version
+        return True
+
+    def _rows(self, name=None, equalities=None):
+        """Yield the (key, record) of the rows of all the objects, or of the
+        objects of the class name.
+
+        In the JSON format, the equalities (a dict of attribute -> value)
+        to strings and numbers are tested by SQLite, so only the rows of
+        the objects which may match are read, the caller still has to test
+        the equalities.
+        """
+        query = 'SELECT class, id, data FROM objects'
+        conditions = []
+        params = []
+        if name is not None:
+            conditions.append('class = ?')
+            params.append(name)
+        if equalities and self.format.name == 'json':
+            for attr, value in equalities.items():
+                if isinstance(value, (str, int, float)) and \
+                        not isinstance(value, bool):
+                    conditions.append('json_extract(data, ?) = ?')
+                    params.extend(['$.' + json.dumps(attr), value])
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        for name, id, record in self.__connection.execute(query, params):
+            yield '{}.{}'.format(name, id), record
+
+    def _fetch(self, key):
+        """Return the record of the object stored under key in the
+        database, or None."""
+        name = ObjectMap.class_name(key)
+        row = self.__connection.execute(
+            'SELECT data FROM objects WHERE class = ? AND id = ?',
+            (name, key[len(name) + 1:])).fetchone()
+        return None if row is None else row[0]
+
+    def _stored_count(self, name=None):
+        """Return the number of rows of all the objects, or of the objects
+        of the class name."""
+        if name is None:
+            row = self.__connection.execute(
+                'SELECT COUNT(*) FROM objects').fetchone()
+        else:
+            row = self.__connection.execute(
+                'SELECT COUNT(*) FROM objects WHERE class = ?',
+                (name,)).fetchone()
+        return row[0]
+
+    def __get_data_version(self):
+        """Return the number SQLite changes when another connection commits
+        to the database."""
+        return self.__connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        """Write the changes waiting to be written and close the connection
+        to the database."""
+        super().close()
+        self.__connection.close()
@@ -1,39 +1,793 @@
 #!/usr/bin/python3
 """This module defines the storage engine for the project."""
-import json
+import atexit
 import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from models.engine.formats import format_for, get_format
+from models.engine.indexes import AttributeIndex
+from models.engine.object_map import ObjectMap
+from models.engine.relations import CASCADE, RESTRICT, relationships
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 
 class FileStorage:
-    """This class serializes instances to a JSON file and vice versa."""
+    """This class serializes instances to a file and vice versa.
 
+    The file is a JSON file, or a binary one (see `models.engine.formats`)
+    when its extension or the `file_format` given says so.
+
+    In journal mode, `save()` appends the changes made since the last save
+    to a journal file instead of rewriting the whole file; `reload()`
+    replays that journal on top of the file (the snapshot) and `compact()`
+    folds it back into the snapshot.
+
+    The record of every object is cached between saves, so only the
+    objects marked dirty since the last save are serialized again.
+
+    The attributes listed in the `indexed_attrs` of the model classes are
+    indexed, so `find()` can look objects up by them without a scan.
+
+    In lazy mode, `reload()` only keeps the record of every object and
+    builds an object the first time it's looked up, so `count()` and
+    `save()` never have to build the objects they did not already build.
+
+    Inside `batch()`, `save()` is deferred to the end of the batch, and the
+    changes made in the batch are undone if an exception escapes it.
+
+    The file is written aside, synced to the disk and renamed over the
+    previous one, which is kept as `<file>.1` when `keep_snapshots` is set,
+    the older ones being shifted up to `<file>.<keep_snapshots>`. When the
+    file is not valid, `reload()` falls back to the newest valid snapshot
+    and copies it over the file.
+
+    Several processes can share the file: the writes hold an advisory lock
+    on `<file>.lock` and first merge the changes the other processes saved,
+    which `refresh()` also does. A change is detected by the size, the
+    modification time and the inode of the file, and only the objects
+    whose record changed are built again; in journal mode only the records
+    appended to the journal since the last read are read.
+
+    In write-behind mode, `save()` returns at once and a background thread
+    writes the changes every `flush_interval` seconds, or as soon as
+    `flush_after` objects are waiting to be written. The objects must only
+    be changed inside `batch()` then, which holds the lock of the flushes.
+    """
+
+    # whether the changes can't be saved
+    read_only = False
     __file_path = 'file.json'
-    __objects = {}
+    __journal_path = 'file.json.journal'
+    __objects = ObjectMap()
+    # keys of the objects created, updated or deleted since the last save
+    __pending = set()
+    # key -> (object, format, record of the object) as of the last save
+    __cache = {}
+    # (class name, attribute) -> AttributeIndex
+    __indexes = {}
+    # class name -> ColumnStore
+    __column_stores = {}
+    # class name -> GridIndex
+    __spatial_indexes = {}
+    # class name -> TextIndex
+    __text_indexes = {}
+    # (class name, group_by, aggregates) -> materialized Aggregate
+    __aggregates = {}
+    # number of records in the journal file
+    __journal_size = 0
+    # class name -> {key: record} of the objects not built yet
+    __unloaded = {}
+    # class name -> model class
+    __classes = None
+    # number of nested batches running
+    __batch_depth = 0
+    # the changes made in the running batches, see __rollback()
+    __undo = []
+    # held by the batches and the flushes
+    __lock = threading.RLock()
+    # number of nested holders of the lock on the file
+    __file_lock_depth = 0
+    # (inode, modification time, size) of the file as last read or written
+    __seen_file = None
+    # (inode, offset) of the end of the journal as last read or written
+    __seen_journal = None
+
+    def __init__(self, journal=False, compact_threshold=1000, lazy=False,
+                 compact_models=False, file_path=None, file_format=None,
+                 write_behind=False, flush_interval=1.0, flush_after=100,
+                 keep_snapshots=0):
+        """Initiate a FileStorage instance.
+
+        Args:
+            journal (bool): append changes to a journal file on save
+            compact_threshold (int): number of journal records after which
+                the journal is folded back into the snapshot
+            lazy (bool): build the objects on first access after reload
+            compact_models (bool): build the objects with the compact
+                classes
+            file_path (str): the path of the file, file.json by default
+            file_format (str): the name of the format of the file, by the
+                extension of the file if it's None
+            write_behind (bool): write the changes from a background
+                thread
+            flush_interval (float): seconds between the background writes
+            flush_after (int): number of changed objects after which they
+                are written without waiting for the interval
+            keep_snapshots (int): number of previous files kept
+        """
+        if file_path:
+            FileStorage.__file_path = file_path
+            FileStorage.__journal_path = file_path + '.journal'
+            FileStorage.__seen_file = FileStorage.__seen_journal = None
+        if file_format:
+            self.format = get_format(file_format)
+        else:
+            self.format = format_for(FileStorage.__file_path)
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.lazy = lazy
+        self.compact_models = compact_models
+        self.__compact_classes = None
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_after = flush_after
+        self.keep_snapshots = keep_snapshots
+        self.__flusher = None
+        self.__wakeup = threading.Event()
+        self.__stopping = False
+        if write_behind:
+            atexit.register(self.close)
+
+    def all(self, cls=None):
+        """Return the dictionary of objects, or a copy of the one holding the
+        objects of cls only.
+
+        Args:
+            cls (type|str): the class, or the class name, to filter by
+        """
+        if cls is None:
+            for name in list(FileStorage.__unloaded.keys()):
+                self._hydrate(name)
+            return FileStorage.__objects
+        name = FileStorage._class_name(cls)
+        self._hydrate(name)
+        return dict(FileStorage.__objects.by_class.get(name, {}))
+
+    def count(self, cls=None):
+        """Return the number of objects, or of the objects of cls."""
+        if cls is None:
+            return FileStorage.__objects.count() + sum(
+                len(records) for records in FileStorage.__unloaded.values())
+        name = FileStorage._class_name(cls)
+        return FileStorage.__objects.count(name) + len(
+            FileStorage.__unloaded.get(name, ()))
+
+    def get(self, cls, id):
+        """Return the object of cls with the given id, or None."""
+        key = '{}.{}'.format(FileStorage._class_name(cls), id)
+        records = FileStorage.__unloaded.get(FileStorage._class_name(cls))
+        if records and key in records:
+            return self.__load(key, records.pop(key))
+        return FileStorage.__objects.get(key)
+
+    def _hydrate(self, name):
+        """Build the objects of the class name not built yet."""
+        records = FileStorage.__unloaded.pop(name, None)
+        if records:
+            for key, record in records.items():
+                self.__load(key, record)
+
+    def __load(self, key, record, value=None):
+        """Build and store the object stored under key from its record, or
+        from its already decoded value."""
+        if value is None:
+            value = self.format.decode(record)
+        obj = self.classes()[value['__class__']](**value)
+        FileStorage.__objects[key] = obj
+        # the record read is the cached record of the object
+        if FileStorage.__cacheable(value):
+            FileStorage.__cache[key] = (obj, self.format, record)
+        return obj
+
+    def add_index(self, cls, attr):
+        """Index the objects of cls by the attribute attr."""
+        name = FileStorage._class_name(cls)
+        if (name, attr) in FileStorage.__indexes:
+            return
+        index = FileStorage.__indexes[(name, attr)] = AttributeIndex(attr)
+        FileStorage.__objects.add_listener(index, name)
+
+    def find(self, cls, **equalities):
+        """Return the list of the objects of cls whose attributes equal the
+        given values, using the attribute indexes when there are ones.
+
+        Example:
+            >>> storage.find(Place, city_id=city.id, max_guest=4)
+        """
+        return list(self.iter_find(cls, **equalities))
+
+    def iter_find(self, cls, **equalities):
+        """Yield the objects of cls whose attributes equal the given values
+        one at a time, like find() without building their list.
+
+        The objects of cls must not be added or deleted while they're
+        iterated.
+        """
+        name = FileStorage._class_name(cls)
+        self._hydrate(name)
+        candidates = None
+        for attr, value in equalities.items():
+            index = FileStorage.__indexes.get((name, attr))
+            if index is None:
+                continue
+            try:
+                objs = index.lookup(value)
+            except TypeError:
+                continue
+            if candidates is None or len(objs) < len(candidates):
+                candidates = objs
+        if candidates is None:
+            candidates = FileStorage.__objects.by_class.get(name, {})
+
+        for obj in candidates.values():
+            if all(getattr(obj, attr, None) == value
+                   for attr, value in equalities.items()):
+                yield obj
+
+    def columns(self, cls, create=True):
+        """Return the ColumnStore keeping the numeric attributes of the
+        objects of cls, creating it on first use (requires numpy).
+
+        Args:
+            cls (type|str): the class, or the class name
+            create (bool): create the store if there's none, else return
+                None then
+
+        Example:
+            >>> storage.columns(Place).select(price_by_night=(None, 100))
+        """
+        from models.engine.columnar import ColumnStore, numeric_attrs
+
+        name = FileStorage._class_name(cls)
+        store = FileStorage.__column_stores.get(name)
+        if store is None and not create:
+            return None
+        # the objects built later are added by the store as a listener
+        self._hydrate(name)
+        if store is None:
+            store = ColumnStore(numeric_attrs(self.classes()[name]))
+            self._add_listener(store, name)
+            FileStorage.__column_stores[name] = store
+        return store
 
-    def all(self):
-        """Return the dictionary of objects."""
-        return FileStorage.__objects
+    def query(self, cls):
+        """Return a Query over the objects of cls.
+
+        Example:
+            >>> storage.query(Place).where('max_guest', '>=', 4).limit(20)
+        """
+        from models.engine.query import Query
+
+        return Query(self, FileStorage._class_name(cls))
+
+    def spatial(self, cls):
+        """Return the GridIndex of the objects of cls by their latitude and
+        longitude, creating it on first use.
+
+        Example:
+            >>> storage.spatial(Place).nearest(30.04, 31.23, radius_km=5)
+        """
+        from models.engine.spatial import GridIndex
+
+        name = FileStorage._class_name(cls)
+        # the objects built later are added by the index as a listener
+        self._hydrate(name)
+        index = FileStorage.__spatial_indexes.get(name)
+        if index is None:
+            index = GridIndex()
+            self._add_listener(index, name)
+            FileStorage.__spatial_indexes[name] = index
+        return index
+
+    def search(self, cls, terms, limit=10):
+        """Return the list of the (score, object) pairs of the objects of
+        cls whose `text_attrs` have the words of terms, the best ranked
+        first. The TextIndex of the class is created on first use.
+
+        Raises:
+            ValueError: if cls has no text attributes
+
+        Example:
+            >>> storage.search(Place, 'quiet garden', limit=5)
+        """
+        from models.engine.text_index import TextIndex
+
+        name = FileStorage._class_name(cls)
+        attrs = getattr(self.classes().get(name), 'text_attrs', ())
+        if not attrs:
+            raise ValueError('{} has no text attributes'.format(name))
+        # the objects built later are added by the index as a listener
+        self._hydrate(name)
+        index = FileStorage.__text_indexes.get(name)
+        if index is None:
+            index = TextIndex(attrs)
+            self._add_listener(index, name)
+            FileStorage.__text_indexes[name] = index
+        return index.search(terms, limit)
+
+    def aggregate(self, cls, group_by=None, materialize=False,
+                  **aggregates):
+        """Return the count of the objects of cls, and the aggregates of
+        their attributes, by the value of the attribute group_by.
+
+        They are computed in a single pass over the objects, unless they
+        are materialized: the Aggregate is then kept up to date as the
+        objects change, and returned by the next calls asking for it.
+
+        Args:
+            cls (type|str): the class, or the class name
+            group_by (str): the attribute grouping the objects, None to
+                aggregate all of them together
+            materialize (bool): keep the aggregates up to date
+            aggregates (dict): function -> attribute, the functions being
+                sum, avg, min and max
+
+        Returns:
+            dict: group value -> {'count': count, function: value}, or only
+                the latter dict if there's no group_by
+
+        Raises:
+            ValueError: if a function is not known
+
+        Example:
+            >>> storage.aggregate(Place, group_by='city_id',
+            ...                   avg='price_by_night')
+            {'0001': {'count': 12, 'avg': 74.5}, ...}
+        """
+        from models.engine.aggregates import Aggregate
+
+        name = FileStorage._class_name(cls)
+        spec = (name, group_by, tuple(sorted(aggregates.items())))
+        # the objects built later are added by a materialized aggregate as a
+        # listener
+        self._hydrate(name)
+        aggregate = FileStorage.__aggregates.get(spec)
+        if aggregate is None:
+            aggregate = Aggregate(group_by, materialize, **aggregates)
+            if materialize:
+                self._add_listener(aggregate, name)
+                FileStorage.__aggregates[spec] = aggregate
+            else:
+                for key, obj in self.all(name).items():
+                    aggregate.add(key, obj)
+        return aggregate.results()
+
+    def _add_listener(self, listener, name):
+        """Notify listener of the changes to the objects of the class name,
+        for the indexes and the aggregates which follow all of them."""
+        FileStorage.__objects.add_listener(listener, name)
+
+    @staticmethod
+    def _class_name(cls):
+        """Return the name of cls, which may be a class, a class name or
+        None."""
+        return cls if cls is None or isinstance(cls, str) else cls.__name__
 
     def new(self, obj):
         """Add the obj to __objects with key <obj class name>.id."""
-        obj_cls_name = obj.__class__.__name__
-        FileStorage.__objects['{}.{}'.format(obj_cls_name, obj.id)] = obj
+        key = '{}.{}'.format(obj.__class__.__name__, obj.id)
+        if FileStorage.__batch_depth:
+            FileStorage.__undo.append(
+                ('new', key, FileStorage.__objects.get(key)))
+        FileStorage.__discard_unloaded(key)
+        FileStorage.__objects[key] = obj
+        FileStorage.__pending.add(key)
+
+    @staticmethod
+    def __discard_unloaded(key):
+        """Forget the record of the object stored under key, if it was not
+        built yet."""
+        name = ObjectMap.class_name(key)
+        records = FileStorage.__unloaded.get(name)
+        if records and records.pop(key, None) is not None and not records:
+            del FileStorage.__unloaded[name]
+
+    def mark_dirty(self, obj, name=None, old=None):
+        """Mark obj as modified since the last save if it's stored.
+
+        Args:
+            obj (BaseModel): the modified object
+            name (str): the name of the modified attribute, if known
+            old (object): the value of the attribute before the change
+        """
+        key = '{}.{}'.format(obj.__class__.__name__, getattr(obj, 'id', None))
+        if FileStorage.__objects.get(key) is obj:
+            FileStorage.__pending.add(key)
+            if name is not None:
+                if FileStorage.__batch_depth:
+                    FileStorage.__undo.append(('set', key, obj, name, old))
+                FileStorage.__objects.changed(key, name, old)
+
+    def delete(self, obj=None, on_delete=None):
+        """Delete obj from __objects if it's inside, along with the objects
+        its cascading relationships relate to it.
+
+        Args:
+            obj (BaseModel): the object deleted
+            on_delete (str): what the relationships declaring no on_delete
+                do, CASCADE to delete the related objects too, RESTRICT to
+                refuse deleting an object with related objects, None to
+                leave them as they are
+
+        Raises:
+            ValueError: if on_delete is not known, or if a restricting
+                relationship relates objects to obj, or to an object deleted
+                along with it, nothing is deleted then
+
+        Example:
+            >>> storage.delete(user, on_delete=CASCADE)
+        """
+        if on_delete not in [None, CASCADE, RESTRICT]:
+            raise ValueError('unknown on_delete {}'.format(on_delete))
+        if obj is None:
+            return
+        key = '{}.{}'.format(obj.__class__.__name__, obj.id)
+        if key not in FileStorage.__objects:
+            return
+        for key, obj in self.__deleted_with(key, obj, on_delete).items():
+            if FileStorage.__objects.pop(key, None) is not None:
+                if FileStorage.__batch_depth:
+                    FileStorage.__undo.append(('delete', key, obj))
+                FileStorage.__cache.pop(key, None)
+                FileStorage.__pending.add(key)
+
+    def __deleted_with(self, key, obj, on_delete):
+        """Return the dict of obj and of the objects deleted along with it
+        by key, looked up through the relationships of their classes, those
+        declaring no on_delete doing what on_delete says.
+
+        Raises:
+            ValueError: if a restricting relationship relates objects to one
+                of them
+        """
+        objs = {key: obj}
+        todo = [obj]
+        while todo:
+            current = todo.pop()
+            for relationship in relationships(type(current)):
+                action = relationship.on_delete or on_delete
+                if action is None:
+                    continue
+                related = self._related(relationship, current)
+                if not related:
+                    continue
+                if action == RESTRICT:
+                    raise ValueError('{} {} has {}'.format(
+                        type(current).__name__, current.id,
+                        relationship.name))
+                for other in related:
+                    key = '{}.{}'.format(type(other).__name__, other.id)
+                    if key not in objs:
+                        objs[key] = other
+                        todo.append(other)
+        return objs
+
+    def _related(self, relationship, obj):
+        """Return the list of the stored objects relationship relates to
+        obj."""
+        return relationship.related(self, obj)
+
+    @contextmanager
+    def batch(self):
+        """Defer the saves made in the block to its end, where the changes
+        are all saved at once if there are any, and undo the changes made in
+        the block if an exception escapes it. Batches can be nested, only
+        the outermost one saves.
+
+        Example:
+            >>> with storage.batch():
+            ...     for name in names:
+            ...         state = State()
+            ...         state.name = name
+            ...         state.save()
+        """
+        with FileStorage.__lock:
+            mark = len(FileStorage.__undo)
+            FileStorage.__batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.__rollback(mark)
+                raise
+            finally:
+                FileStorage.__batch_depth -= 1
+            if not FileStorage.__batch_depth:
+                FileStorage.__undo.clear()
+                if FileStorage.__pending:
+                    self.save()
+
+    def __rollback(self, mark):
+        """Undo the changes logged in __undo after mark, the last first."""
+        changes = FileStorage.__undo[mark:]
+        for change in reversed(changes):
+            key = change[1]
+            if change[0] == 'new':
+                if change[2] is None:
+                    FileStorage.__objects.pop(key, None)
+                else:
+                    FileStorage.__objects[key] = change[2]
+            elif change[0] == 'delete':
+                FileStorage.__objects[key] = change[2]
+            else:
+                _, _, obj, name, old = change
+                # None is also the old value of an attribute that was not
+                # set, which the class does not declare then
+                if old is None and not hasattr(type(obj), name):
+                    current = getattr(obj, name, None)
+                    if hasattr(obj, name):
+                        delattr(obj, name)
+                    if FileStorage.__objects.get(key) is obj:
+                        FileStorage.__objects.changed(key, name, current)
+                else:
+                    setattr(obj, name, old)
+            FileStorage.__pending.add(key)
+        # drop the changes logged while undoing too
+        del FileStorage.__undo[mark:]
 
     def save(self):
-        """Serialize __objects to the JSON file."""
-        # __object is a dict of objects
-        # so we need to convert the objects to dicts first
+        """Serialize __objects to the file, at the end of the outermost
+        batch inside a batch, or from the flusher thread in write-behind
+        mode."""
+        if FileStorage.__batch_depth:
+            return
+        if not self.write_behind:
+            with FileStorage.__lock:
+                self._flush()
+            return
 
-        dict_of_obj_dicts = {}
+        if self.__flusher is None:
+            self.__flusher = threading.Thread(
+                target=self.__run_flusher, name='storage-flusher',
+                daemon=True)
+            self.__flusher.start()
+        if len(FileStorage.__pending) >= self.flush_after:
+            self.__wakeup.set()
 
-        for key, value in FileStorage.__objects.items():
-            dict_of_obj_dicts[key] = value.to_dict()
+    def flush(self):
+        """Write the changes waiting to be written, if any."""
+        with FileStorage.__lock:
+            if FileStorage.__pending:
+                self._flush()
 
-        with open(FileStorage.__file_path, 'w') as f:
-            json.dump(dict_of_obj_dicts, f)
+    def close(self):
+        """Stop the flusher thread, if it runs, and write the changes
+        waiting to be written."""
+        flusher = self.__flusher
+        if flusher is not None:
+            self.__stopping = True
+            self.__wakeup.set()
+            flusher.join()
+            self.__flusher = None
+            self.__stopping = False
+        self.flush()
 
-    def reload(self):
-        """Deserialize the JSON file, if exists, to __objects."""
+    def __run_flusher(self):
+        """Write the changes until the storage is closed."""
+        while not self.__stopping:
+            self.__wakeup.wait(self.flush_interval)
+            self.__wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # the changes stay pending, so the next flush retries them
+                print('** storage flush failed: {} **'.format(e),
+                      file=sys.stderr)
+
+    def _flush(self):
+        """Write the changes made since the last save."""
+        if not self.journal:
+            self.compact()
+            return
+
+        with self._file_lock():
+            self.__merge_changes()
+            self.__append_journal()
+            if FileStorage.__journal_size >= self.compact_threshold:
+                self.compact()
+
+    def compact(self):
+        """Write all the objects to the file and drop the journal."""
+        with self._file_lock():
+            self.__merge_changes()
+            self.__compact()
+
+    def __compact(self):
+        """Write all the objects to the file and drop the journal, holding
+        the lock on the file."""
+        # flush the pending changes to the journal first, so a crash before
+        # the journal is removed can not replay older values over the
+        # snapshot
+        if os.path.exists(FileStorage.__journal_path):
+            self.__append_journal()
+
+        # a link keeps the current file in place until it's replaced
+        self.__rotate_snapshots()
+        self._write_file(FileStorage.__file_path, self._entries())
+
+        # forget the objects deleted since the last save
+        if len(FileStorage.__cache) > len(FileStorage.__objects):
+            for key in list(FileStorage.__cache.keys()):
+                if key not in FileStorage.__objects:
+                    del FileStorage.__cache[key]
+
+        if os.path.exists(FileStorage.__journal_path):
+            os.remove(FileStorage.__journal_path)
+        FileStorage.__journal_size = 0
+        FileStorage.__pending.clear()
+        FileStorage.__seen_file = FileStorage._stat(FileStorage.__file_path)
+        FileStorage.__seen_journal = None
+
+    def _entries(self, name=None):
+        """Return the (key, record) of all the objects, or of the objects
+        of the class name."""
+        if name is None:
+            objs = FileStorage.__objects.items()
+            unloaded = FileStorage.__unloaded.values()
+        else:
+            objs = FileStorage.__objects.by_class.get(name, {}).items()
+            unloaded = [FileStorage.__unloaded.get(name, {})]
+        entries = [(key, self.__serialize(key, obj)) for key, obj in objs]
+        for records in unloaded:
+            entries.extend(records.items())
+        return entries
+
+    def _write_file(self, path, entries):
+        """Write the (key, record) entries to the file at path.
+
+        The file is written aside, synced to the disk and renamed over the
+        previous one, so it's never left half written.
+        """
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb' if self.format.binary else 'w') as f:
+            self.format.write(f, entries)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        FileStorage.__sync_directory(path)
+
+    def __append_journal(self):
+        """Append a record for every pending change to the journal file."""
+        if not FileStorage.__pending:
+            return
+
+        with open(FileStorage.__journal_path, 'ab') as f:
+            for key, record in self._pending_records():
+                f.write(self.format.journal_entry(key, record))
+                FileStorage.__journal_size += 1
+            f.flush()
+            os.fsync(f.fileno())
+            FileStorage.__seen_journal = (os.fstat(f.fileno()).st_ino,
+                                          f.tell())
+
+    def __rotate_snapshots(self):
+        """Keep the current file as the first snapshot, shifting the older
+        ones."""
+        path = FileStorage.__file_path
+        if not self.keep_snapshots or not os.path.exists(path):
+            return
+        for i in range(self.keep_snapshots - 1, 0, -1):
+            if os.path.exists('{}.{}'.format(path, i)):
+                os.replace('{}.{}'.format(path, i),
+                           '{}.{}'.format(path, i + 1))
+        if os.path.exists(path + '.1'):
+            os.remove(path + '.1')
+        try:
+            os.link(path, path + '.1')
+        except OSError:
+            shutil.copyfile(path, path + '.1')
+
+    @staticmethod
+    def __restore(snapshot, path):
+        """Copy the snapshot over the file at path, for the next reloads to
+        read it too, keeping the file aside as `<path>.corrupt` so it's not
+        rotated over a valid snapshot."""
+        shutil.copyfile(path, path + '.corrupt')
+        temp_path = path + '.tmp'
+        shutil.copyfile(snapshot, temp_path)
+        with open(temp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        FileStorage.__sync_directory(path)
+        FileStorage.__seen_file = FileStorage._stat(path)
+
+    @staticmethod
+    def __sync_directory(path):
+        """Sync the directory of path, so a rename in it is on the disk."""
+        try:
+            fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _pending_keys(self):
+        """Return the set of the keys of the objects created, updated or
+        deleted since the last save."""
+        return FileStorage.__pending
+
+    def _unload(self, key):
+        """Drop the object stored under key from memory, leaving it as it
+        was saved, and return it."""
+        FileStorage.__cache.pop(key, None)
+        return FileStorage.__objects.pop(key)
+
+    def _pending_records(self):
+        """Yield the (key, record) of the objects created, updated or
+        deleted since the last save, record is None for the deleted ones.
+        The changes are forgotten once they were all yielded."""
+        for key in FileStorage.__pending:
+            obj = FileStorage.__objects.get(key)
+            if obj is None:
+                FileStorage.__cache.pop(key, None)
+                yield key, None
+            else:
+                yield key, self.__serialize(key, obj)
+        FileStorage.__pending.clear()
+
+    def __serialize(self, key, obj):
+        """Return the record of obj, reusing the cached one if obj was not
+        modified since the last save."""
+        cached = FileStorage.__cache.get(key)
+        if cached is not None and cached[0] is obj and \
+                cached[1] is self.format and \
+                key not in FileStorage.__pending:
+            return cached[2]
+
+        record = self.format.encode(obj)
+        if FileStorage.__cacheable(obj._attributes()):
+            FileStorage.__cache[key] = (obj, self.format, record)
+        else:
+            FileStorage.__cache.pop(key, None)
+        return record
+
+    @staticmethod
+    def __cacheable(obj_dict):
+        """Return whether the record of an object can be cached.
+
+        Lists and dicts can be modified in place without marking the object
+        dirty, so objects holding them are never cached.
+        """
+        return not any(isinstance(value, (list, dict))
+                       for value in obj_dict.values())
+
+    def classes(self):
+        """Return the dict of the model classes by name, the compact ones in
+        compact mode."""
+        if FileStorage.__classes is None:
+            FileStorage.__classes = FileStorage.__model_classes()
+        if not self.compact_models:
+            return FileStorage.__classes
+
+        if self.__compact_classes is None:
+            from models.compact import compact_class
+            self.__compact_classes = {
+                name: compact_class(cls)
+                for name, cls in FileStorage.__classes.items()}
+        return self.__compact_classes
+
+    @staticmethod
+    def __model_classes():
+        """Return the dict of the model classes by name."""
         from models.base_model import BaseModel
         from models.user import User
         from models.place import Place
@@ -42,14 +796,268 @@ class FileStorage:
         from models.state import State
         from models.review import Review
 
-        # A dictionary to map classes names from `str` to `type`
-        classes_names = {'BaseModel': BaseModel, 'User': User, 'Place': Place,
-                         'City': City, 'Amenity': Amenity, 'State': State,
-                         'Review': Review}
-
-        if os.path.exists(FileStorage.__file_path):
-            with open(FileStorage.__file_path, 'r') as f:
-                for value in json.load(f).values():
-                    # values are dicts
-                    # so we need to convert them to instances
-                    self.new(classes_names[value['__class__']](**value))
+        return {'BaseModel': BaseModel, 'User': User, 'Place': Place,
+                'City': City, 'Amenity': Amenity, 'State': State,
+                'Review': Review}
+
+    def reload(self):
+        """Deserialize the file, if exists, to __objects."""
+        for cls in self.classes().values():
+            for attr in cls.indexed_attrs:
+                self.add_index(cls, attr)
+        self._read_objects()
+
+    def _read_objects(self):
+        """Read the objects of the file, or of the newest valid snapshot if
+        it's not valid, and replay the journal."""
+        # the lock file is only created once there's something to read
+        if not os.path.exists(FileStorage.__file_path) and \
+                not os.path.exists(FileStorage.__journal_path):
+            FileStorage.__seen_file = FileStorage.__seen_journal = None
+            FileStorage.__journal_size = 0
+            return
+        with self._file_lock():
+            self.__read_files()
+
+    def __read_files(self):
+        """Read the objects of the file and of the journal, holding the
+        lock on the file."""
+        path = FileStorage.__file_path
+        FileStorage.__seen_file = FileStorage._stat(path)
+        if os.path.exists(path):
+            start = time.perf_counter()
+            try:
+                self.__read_snapshot(path)
+            except (ValueError, KeyError) as error:
+                for i in range(1, self.keep_snapshots + 1):
+                    snapshot = '{}.{}'.format(path, i)
+                    if not os.path.exists(snapshot):
+                        continue
+                    try:
+                        self.__read_snapshot(snapshot)
+                    except (ValueError, KeyError):
+                        continue
+                    FileStorage.__restore(snapshot, path)
+                    print('** {} is not valid ({}), recovered {} objects '
+                          'from {} in {:.3f}s **'.format(
+                              path, error, self.count(), snapshot,
+                              time.perf_counter() - start), file=sys.stderr)
+                    break
+                else:
+                    raise error
+
+        FileStorage.__journal_size = 0
+        FileStorage.__seen_journal = None
+        if os.path.exists(FileStorage.__journal_path):
+            with open(FileStorage.__journal_path, 'rb+') as f:
+                offset = self.__replay_journal(f, 0)
+                # a crash in the middle of an append leaves a truncated last
+                # record behind, drop it so the next appends are not hidden
+                # behind it
+                f.truncate(offset)
+                FileStorage.__seen_journal = (os.fstat(f.fileno()).st_ino,
+                                              offset)
+
+    def __replay_journal(self, f, offset, keep_pending=False):
+        """Apply the records of the journal file f after offset, and return
+        the offset after the last complete record.
+
+        Args:
+            f (file): the journal file, opened in binary mode
+            offset (int): the offset of the first record to apply
+            keep_pending (bool): leave the objects changed since the last
+                save as they are
+        """
+        f.seek(offset)
+        end = offset
+        for end, key, value, record in self.format.read_journal(f):
+            end += offset
+            FileStorage.__journal_size += 1
+            if keep_pending and key in FileStorage.__pending:
+                continue
+            if record is None:
+                FileStorage.__objects.pop(key, None)
+                FileStorage.__cache.pop(key, None)
+                FileStorage.__discard_unloaded(key)
+            else:
+                self._reload_object(key, record, value)
+        return end
+
+    def refresh(self):
+        """Apply the changes other processes saved since the file was last
+        read or written, only building again the objects whose record
+        changed. The objects changed since the last save are left as they
+        are.
+
+        Returns:
+            bool: whether there were changes to apply
+        """
+        with FileStorage.__lock:
+            return self._refresh()
+
+    def _refresh(self):
+        """Apply the changes saved by other processes to the file, only
+        taking the lock on the file when the file or the journal changed
+        since they were last read or written."""
+        if not self.__changed_on_disk():
+            return False
+        with self._file_lock():
+            return self.__merge_changes()
+
+    def __changed_on_disk(self):
+        """Return whether the file or the journal changed since they were
+        last read or written, as `__merge_changes()` tells it."""
+        stat = FileStorage._stat(FileStorage.__file_path)
+        if stat is not None and stat != FileStorage.__seen_file:
+            return True
+        stat = FileStorage._stat(FileStorage.__journal_path)
+        if stat is None:
+            return False
+        seen = FileStorage.__seen_journal
+        return seen is None or seen[0] != stat[0] or stat[2] > seen[1]
+
+    def __merge_changes(self):
+        """Apply the changes saved by other processes, holding the lock on
+        the file, and return whether there were any."""
+        changed = False
+        stat = FileStorage._stat(FileStorage.__file_path)
+        # a missing file is left alone, the objects are written again on
+        # the next save
+        if stat is not None and stat != FileStorage.__seen_file:
+            with open(FileStorage.__file_path,
+                      'rb' if self.format.binary else 'r') as f:
+                self._merge_records(self._read_records(f))
+            FileStorage.__seen_file = stat
+            FileStorage.__seen_journal = None
+            FileStorage.__journal_size = 0
+            changed = True
+
+        stat = FileStorage._stat(FileStorage.__journal_path)
+        if stat is not None:
+            seen = FileStorage.__seen_journal
+            offset = seen[1] if seen is not None and seen[0] == stat[0] \
+                else 0
+            if stat[2] > offset:
+                with open(FileStorage.__journal_path, 'rb') as f:
+                    offset = self.__replay_journal(f, offset, True)
+                FileStorage.__seen_journal = (stat[0], offset)
+                changed = True
+        return changed
+
+    def _merge_records(self, records, name=None):
+        """Merge the (key, record, decoded record or None) of all the
+        objects stored on the disk, or of all the objects of the class name:
+        the objects whose record changed are built again and the objects
+        missing are deleted, except the ones changed since the last save."""
+        pending = FileStorage.__pending
+        keys = set()
+        for key, record, value in records:
+            keys.add(key)
+            if key in pending or self.__is_saved(key, record):
+                continue
+            self._reload_object(key, record, value)
+
+        if name is None:
+            objs = FileStorage.__objects
+            unloaded = list(FileStorage.__unloaded.values())
+        else:
+            objs = FileStorage.__objects.by_class.get(name, {})
+            unloaded = [FileStorage.__unloaded.get(name, {})]
+        for key in [key for key in objs
+                    if key not in keys and key not in pending]:
+            FileStorage.__objects.pop(key)
+            FileStorage.__cache.pop(key, None)
+        for records in unloaded:
+            for key in [key for key in records
+                        if key not in keys and key not in pending]:
+                FileStorage.__discard_unloaded(key)
+
+    def __is_saved(self, key, record):
+        """Return whether record is the record of the object stored under
+        key as last read or written."""
+        cached = FileStorage.__cache.get(key)
+        if cached is not None and cached[1] is self.format:
+            return cached[2] == record and \
+                FileStorage.__objects.get(key) is cached[0]
+        records = FileStorage.__unloaded.get(ObjectMap.class_name(key))
+        return records is not None and records.get(key) == record
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold the advisory lock on the file, if the platform has one. It
+        may be taken again by its holder."""
+        if fcntl is None or FileStorage.__file_lock_depth:
+            FileStorage.__file_lock_depth += 1
+            try:
+                yield
+            finally:
+                FileStorage.__file_lock_depth -= 1
+            return
+
+        with open(self._lock_path(), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            FileStorage.__file_lock_depth += 1
+            try:
+                yield
+            finally:
+                FileStorage.__file_lock_depth -= 1
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _lock_path(self):
+        """Return the path of the file locked by the writes."""
+        return FileStorage.__file_path + '.lock'
+
+    @staticmethod
+    def _stat(path):
+        """Return the (inode, modification time, size) of the file at path,
+        or None if there's no such file."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def __read_snapshot(self, path):
+        """Read the objects of the file at path, or none if it's not valid.
+
+        Raises:
+            ValueError: if the file is not valid
+            KeyError: if an object has no class
+        """
+        keys = []
+        try:
+            with open(path, 'rb' if self.format.binary else 'r') as f:
+                # the file is parsed one object at a time, so the parsed
+                # dict of an object is dropped as soon as it's built
+                for key, record, value in self._read_records(f):
+                    self._reload_object(key, record, value)
+                    keys.append(key)
+        except (ValueError, KeyError):
+            for key in keys:
+                FileStorage.__objects.pop(key, None)
+                FileStorage.__discard_unloaded(key)
+            raise
+
+    def _read_records(self, f):
+        """Yield the (key, record, decoded record or None) of the objects in
+        the file f, the records being only split apart in lazy mode, so
+        they are decoded when their object is built."""
+        if self.lazy:
+            for key, record in self.format.split(f):
+                yield key, record, None
+            return
+        for key, value, record in self.format.read(f):
+            yield key, record, value
+
+    def _reload_object(self, key, record, value=None):
+        """Store the object read by reload, or only its record in lazy
+        mode."""
+        if not self.lazy:
+            self.__load(key, record, value)
+            return
+        FileStorage.__objects.pop(key, None)
+        name = ObjectMap.class_name(key)
+        records = FileStorage.__unloaded.get(name)
+        if records is None:
+            records = FileStorage.__unloaded[name] = {}
+        records[key] = record
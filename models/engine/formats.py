@@ -0,0 +1,750 @@
+#!/usr/bin/python3
+"""This module defines the file formats of the storage engine.
+
+A format encodes every object into a record on its own, so the storage
+engine can cache the record of an object between saves. `JSONFormat` keeps
+the JSON file of the project, `BinaryFormat` packs the records into a
+compact binary file: the dates are kept as microseconds, the UUIDs as 16
+bytes and the model class names as small integer tags, and
+`SnapshotFormat` lays the binary records out to be memory mapped and read
+in place (see `Snapshot`).
+"""
+import json
+import mmap
+import os
+import re
+import struct
+from datetime import datetime, timedelta
+from models.engine.json_stream import iter_json_object, iter_json_texts
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-'
+                   r'[0-9a-f]{12}')
+
+_UINT8 = struct.Struct('<B')
+_UINT16 = struct.Struct('<H')
+_UINT32 = struct.Struct('<I')
+_INT64 = struct.Struct('<q')
+_DOUBLE = struct.Struct('<d')
+# magic and number of objects of a snapshot file
+_SNAPSHOT_HEADER = struct.Struct('<8sQ')
+# offset of the key, size of the key and size of the record of an object
+_SNAPSHOT_ENTRY = struct.Struct('<QII')
+
+# the tag of a model class is its index, other classes are tagged
+# _OTHER_CLASS followed by their name
+CLASS_TAGS = ('BaseModel', 'User', 'Place', 'City', 'Amenity', 'State',
+              'Review')
+_CLASS_TAG = {name: tag for tag, name in enumerate(CLASS_TAGS)}
+_OTHER_CLASS = 255
+
+# the struct format of the fixed size field of every kind of attribute,
+# strings and other values are followed by their bytes
+_FIELDS = {'b': '?', 'i': 'q', 'd': 'd', 'U': '16s', 't': 'q', 's': 'I',
+           'x': 'I'}
+# shape of a record -> its compiled shape, see _shape()
+_SHAPES = {}
+# shape of a record -> where its id is, see _id_field()
+_ID_FIELDS = {}
+
+
+class JSONFormat:
+    """Keep the objects in a JSON object of their dicts by key, and the
+    journal as JSON lines."""
+
+    name = 'json'
+    binary = False
+    extensions = ('.json',)
+
+    def encode(self, obj):
+        """Return the record of obj."""
+        return json.dumps(obj.to_dict())
+
+    def encode_dict(self, value):
+        """Return the record of the dict of an object."""
+        return json.dumps(value, default=_isoformat)
+
+    def decode(self, record):
+        """Return the dict of an object from its record."""
+        return json.loads(record)
+
+    def write(self, f, entries):
+        """Write the (key, record) entries to the text file f."""
+        f.write('{' + ', '.join('{}: {}'.format(json.dumps(key), record)
+                                for key, record in entries) + '}')
+
+    def read(self, f):
+        """Yield the (key, dict, record) of the objects in the text file f.
+
+        Raises:
+            json.JSONDecodeError: if f is not a valid JSON object
+        """
+        return iter_json_object(f)
+
+    def split(self, f):
+        """Yield the (key, record) of the objects in the text file f without
+        decoding the records.
+
+        Raises:
+            json.JSONDecodeError: if f is not a valid JSON object
+        """
+        return iter_json_texts(f)
+
+    def journal_entry(self, key, record=None):
+        """Return the bytes of the journal entry of an upsert, or of a
+        delete when record is None."""
+        if record is None:
+            line = '{{"op": "delete", "key": {}}}\n'.format(json.dumps(key))
+        else:
+            line = '{{"op": "upsert", "key": {}, "value": {}}}\n'.format(
+                json.dumps(key), record)
+        return line.encode('utf-8')
+
+    def read_journal(self, f):
+        """Yield the (offset after the entry, key, dict, record) of the
+        entries of the binary file f, dict and record are None for a
+        delete. It stops at the first truncated entry."""
+        offset = 0
+        for line in f:
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('truncated record')
+                entry = json.loads(line)
+            except ValueError:
+                return
+            offset += len(line)
+            if entry['op'] == 'delete':
+                yield offset, entry['key'], None, None
+            else:
+                value = entry['value']
+                yield offset, entry['key'], value, json.dumps(value)
+
+
+class BinaryFormat:
+    """Keep the objects in a binary file of length prefixed records.
+
+    A record is the tag of the class of the object, its shape, the fixed
+    size fields of its attributes and then the bytes of its strings and
+    other values. The shape is the kinds of the attributes followed by
+    their names: `b` True, `i` a 64 bits int, `d` a float, `U` a UUID
+    string as 16 bytes, `t` a naive datetime as microseconds since the
+    epoch, `s` a string and `x` any other value, with a type byte per
+    value: `N` None, `T` True, `F` False, `i` a 64 bits int, `I` a bigger
+    int as text, `d` a float, `s` a string, `U` a UUID, `t` a naive
+    datetime, `z` another datetime as text, `l` a list and `m` a dict.
+
+    The records of the objects of a class mostly share their shape, which
+    is parsed once and decoded with a single `struct` call.
+    """
+
+    name = 'binary'
+    binary = True
+    extensions = ('.bin', '.hbnb')
+    magic = b'HBNB\x01'
+
+    def encode(self, obj):
+        """Return the record of obj."""
+        return _encode_record(obj.__class__.__name__,
+                              obj._attributes().items())
+
+    def encode_dict(self, value):
+        """Return the record of the dict of an object."""
+        items = []
+        for name, attr in value.items():
+            if name == '__class__':
+                continue
+            if name in ('created_at', 'updated_at') and \
+                    isinstance(attr, str):
+                attr = datetime.fromisoformat(attr)
+            items.append((name, attr))
+        return _encode_record(value['__class__'], items)
+
+    def decode(self, record):
+        """Return the dict of an object from its record."""
+        return _decode_record(record)
+
+    def write(self, f, entries):
+        """Write the (key, record) entries to the binary file f."""
+        f.write(self.magic)
+        for _, record in entries:
+            f.write(_UINT32.pack(len(record)))
+            f.write(record)
+
+    def read(self, f):
+        """Yield the (key, dict, record) of the objects in the binary file
+        f.
+
+        Raises:
+            ValueError: if f is not a binary snapshot or is truncated
+        """
+        for record in self.__records(f):
+            try:
+                value = _decode_record(record)
+            except (IndexError, struct.error) as e:
+                raise ValueError('Invalid record: {}'.format(e)) from None
+            yield '{}.{}'.format(value['__class__'], value['id']), value, \
+                record
+
+    def split(self, f):
+        """Yield the (key, record) of the objects in the binary file f,
+        only decoding the class and the id of every record.
+
+        Raises:
+            ValueError: if f is not a binary snapshot or is truncated
+        """
+        for record in self.__records(f):
+            try:
+                yield _record_key(record), record
+            except (IndexError, struct.error) as e:
+                raise ValueError('Invalid record: {}'.format(e)) from None
+
+    def __records(self, f):
+        """Yield the records of the binary file f."""
+        if f.read(len(self.magic)) != self.magic:
+            raise ValueError('Not a binary snapshot')
+        while True:
+            header = f.read(_UINT32.size)
+            if not header:
+                return
+            if len(header) != _UINT32.size:
+                raise ValueError('Truncated record')
+            size = _UINT32.unpack(header)[0]
+            record = f.read(size)
+            if len(record) != size:
+                raise ValueError('Truncated record')
+            yield record
+
+    def journal_entry(self, key, record=None):
+        """Return the bytes of the journal entry of an upsert, or of a
+        delete when record is None."""
+        key = key.encode('utf-8')
+        if record is None:
+            return b'd' + _UINT16.pack(len(key)) + key
+        return b'u' + _UINT16.pack(len(key)) + key + \
+            _UINT32.pack(len(record)) + record
+
+    def read_journal(self, f):
+        """Yield the (offset after the entry, key, dict, record) of the
+        entries of the binary file f, dict and record are None for a
+        delete. It stops at the first truncated entry."""
+        offset = 0
+        while True:
+            header = f.read(1 + _UINT16.size)
+            if len(header) != 1 + _UINT16.size or header[:1] not in b'ud':
+                return
+            length = _UINT16.unpack_from(header, 1)[0]
+            key = f.read(length)
+            if len(key) != length:
+                return
+            size = len(header) + length
+            if header[:1] == b'd':
+                record = value = None
+            else:
+                length = f.read(_UINT32.size)
+                if len(length) != _UINT32.size:
+                    return
+                length = _UINT32.unpack(length)[0]
+                record = f.read(length)
+                if len(record) != length:
+                    return
+                size += _UINT32.size + length
+                try:
+                    value = _decode_record(record)
+                except (ValueError, IndexError, struct.error):
+                    return
+            offset += size
+            yield offset, key.decode('utf-8'), value, record
+
+
+class SnapshotFormat(BinaryFormat):
+    """Keep the objects in a binary file laid out to be memory mapped, so
+    the objects can be looked up in place (see `Snapshot`).
+
+    The file is a header holding the number of objects, a table of fixed
+    size entries sorted by key, and then the key and the record of every
+    object, the records and the journal entries being the ones of
+    `BinaryFormat`.
+    """
+
+    name = 'snapshot'
+    extensions = ('.snap',)
+    magic = b'HBNBSNP\x01'
+
+    def write(self, f, entries):
+        """Write the (key, record) entries to the snapshot file f."""
+        entries = sorted((key.encode('utf-8'), record)
+                         for key, record in entries)
+        offset = _SNAPSHOT_HEADER.size + len(entries) * _SNAPSHOT_ENTRY.size
+        f.write(_SNAPSHOT_HEADER.pack(self.magic, len(entries)))
+        for key, record in entries:
+            f.write(_SNAPSHOT_ENTRY.pack(offset, len(key), len(record)))
+            offset += len(key) + len(record)
+        for key, record in entries:
+            f.write(key)
+            f.write(record)
+
+    def read(self, f):
+        """Yield the (key, dict, record) of the objects in the snapshot
+        file f.
+
+        Raises:
+            ValueError: if f is not a snapshot or is truncated
+        """
+        for key, record in self.split(f):
+            try:
+                value = _decode_record(record)
+            except (IndexError, struct.error) as e:
+                raise ValueError('Invalid record: {}'.format(e)) from None
+            yield key, value, record
+
+    def split(self, f):
+        """Yield the (key, record) of the objects in the snapshot file f
+        from its table, without decoding the records.
+
+        Raises:
+            ValueError: if f is not a snapshot or is truncated
+        """
+        return Snapshot(f.read()).items()
+
+
+class Snapshot:
+    """The objects of a file of `SnapshotFormat`, the key and the record of
+    an object being read from the file only when it's looked up.
+
+    The file is usually mapped in memory (see `open()`): opening it reads
+    its header only, and the processes reading the same file share its
+    pages in the page cache instead of each holding a copy of the objects.
+    A key is found by a binary search of the table, and the objects of a
+    class are the entries between two keys.
+
+    Example:
+        >>> with Snapshot.open('file.snap') as snapshot:
+        ...     record = snapshot.get('Place.0001')
+        ...     count = snapshot.count('Place')
+    """
+
+    def __init__(self, buffer):
+        """Initiate a Snapshot instance.
+
+        Args:
+            buffer (bytes|mmap): the content of the file
+
+        Raises:
+            ValueError: if buffer is not a snapshot or is truncated
+        """
+        if len(buffer) < _SNAPSHOT_HEADER.size or \
+                buffer[:len(SnapshotFormat.magic)] != SnapshotFormat.magic:
+            raise ValueError('Not a snapshot')
+        self.__size = _SNAPSHOT_HEADER.unpack_from(buffer)[1]
+        if _SNAPSHOT_HEADER.size + self.__size * _SNAPSHOT_ENTRY.size > \
+                len(buffer):
+            raise ValueError('Truncated snapshot')
+        self.buffer = buffer
+
+    @classmethod
+    def open(cls, path):
+        """Return the Snapshot of the file at path mapped in memory.
+
+        Raises:
+            ValueError: if the file is not a snapshot or is truncated
+        """
+        with open(path, 'rb') as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # an empty file can't be mapped
+                raise ValueError('Not a snapshot') from None
+        try:
+            return cls(buffer)
+        except ValueError:
+            buffer.close()
+            raise
+
+    def close(self):
+        """Unmap the file, if it's mapped."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        """Return the snapshot."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Unmap the file."""
+        self.close()
+
+    def __len__(self):
+        """Return the number of objects."""
+        return self.__size
+
+    def __contains__(self, key):
+        """Return whether there's an object stored under key."""
+        return self.__find(key) is not None
+
+    def __entry(self, i):
+        """Return the offset of the key, the size of the key and the size
+        of the record of the i-th object."""
+        offset, key_size, size = _SNAPSHOT_ENTRY.unpack_from(
+            self.buffer, _SNAPSHOT_HEADER.size + i * _SNAPSHOT_ENTRY.size)
+        if offset + key_size + size > len(self.buffer):
+            raise ValueError('Truncated snapshot')
+        return offset, key_size, size
+
+    def __key(self, i):
+        """Return the encoded key of the i-th object."""
+        offset, key_size, _ = self.__entry(i)
+        return self.buffer[offset:offset + key_size]
+
+    def __bisect(self, key):
+        """Return the index of the first object whose encoded key is not
+        less than key."""
+        low, high = 0, self.__size
+        while low < high:
+            middle = (low + high) // 2
+            if self.__key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __find(self, key):
+        """Return the index of the object stored under key, or None."""
+        key = key.encode('utf-8')
+        i = self.__bisect(key)
+        if i < self.__size and self.__key(i) == key:
+            return i
+        return None
+
+    def __range(self, name=None):
+        """Return the range of the indexes of all the objects, or of the
+        objects of the class name."""
+        if name is None:
+            return range(self.__size)
+        prefix = name.encode('utf-8')
+        # '/' follows '.', so the keys of the class are in between
+        return range(self.__bisect(prefix + b'.'),
+                     self.__bisect(prefix + b'/'))
+
+    def get(self, key):
+        """Return the record of the object stored under key, or None."""
+        i = self.__find(key)
+        if i is None:
+            return None
+        offset, key_size, size = self.__entry(i)
+        return self.buffer[offset + key_size:offset + key_size + size]
+
+    def count(self, name=None):
+        """Return the number of objects, or of the objects of the class
+        name, reading the table only."""
+        return len(self.__range(name))
+
+    def items(self, name=None):
+        """Yield the (key, record) of all the objects, or of the objects of
+        the class name, in the order of their keys."""
+        buffer = self.buffer
+        for i in self.__range(name):
+            offset, key_size, size = self.__entry(i)
+            end = offset + key_size
+            yield buffer[offset:end].decode('utf-8'), buffer[end:end + size]
+
+
+FORMATS = {fmt.name: fmt for fmt in (JSONFormat(), BinaryFormat(),
+                                     SnapshotFormat())}
+
+
+def get_format(name):
+    """Return the format called name.
+
+    Raises:
+        ValueError: if there's no such format
+    """
+    try:
+        return FORMATS[name]
+    except KeyError:
+        raise ValueError('Unknown format: {}'.format(name)) from None
+
+
+def format_for(path):
+    """Return the format of the file at path by its extension, JSON for an
+    unknown extension."""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt in FORMATS.values():
+        if extension in fmt.extensions:
+            return fmt
+    return FORMATS['json']
+
+
+def _isoformat(value):
+    """Return the text of the datetimes of a dict for json.dumps."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError('Object of type {} is not JSON serializable'.format(
+        type(value).__name__))
+
+
+def _encode_str(value):
+    """Return the bytes of a string with a length prefix."""
+    data = value.encode('utf-8')
+    return _UINT32.pack(len(data)) + data
+
+
+def _encode_value(value, out):
+    """Append the bytes of value to the list out."""
+    if value is None:
+        out.append(b'N')
+    elif value is True:
+        out.append(b'T')
+    elif value is False:
+        out.append(b'F')
+    elif isinstance(value, int):
+        if -(1 << 63) <= value < 1 << 63:
+            out.append(b'i' + _INT64.pack(value))
+        else:
+            out.append(b'I' + _encode_str(str(value)))
+    elif isinstance(value, float):
+        out.append(b'd' + _DOUBLE.pack(value))
+    elif isinstance(value, str):
+        if len(value) == 36 and _UUID.fullmatch(value):
+            out.append(b'U' + bytes.fromhex(value.replace('-', '')))
+        else:
+            out.append(b's' + _encode_str(value))
+    elif isinstance(value, datetime):
+        if value.tzinfo is None:
+            out.append(b't' + _INT64.pack((value - _EPOCH) // _MICROSECOND))
+        else:
+            out.append(b'z' + _encode_str(value.isoformat()))
+    elif isinstance(value, (list, tuple)):
+        out.append(b'l' + _UINT32.pack(len(value)))
+        for item in value:
+            _encode_value(item, out)
+    elif isinstance(value, dict):
+        out.append(b'm' + _UINT32.pack(len(value)))
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise TypeError('keys must be str, not {}'.format(
+                    type(key).__name__))
+            out.append(_encode_str(key))
+            _encode_value(item, out)
+    else:
+        raise TypeError('Object of type {} is not serializable'.format(
+            type(value).__name__))
+
+
+def _encode_record(class_name, items):
+    """Return the record of an object from its class name and the (name,
+    value) pairs of its attributes. Falsy values are left out, as
+    `to_dict()` does."""
+    tag = _CLASS_TAG.get(class_name)
+    if tag is None:
+        head = _UINT8.pack(_OTHER_CLASS) + _encode_str(class_name)
+    else:
+        head = _UINT8.pack(tag)
+    kinds = []
+    names = []
+    fields = []
+    var = []
+    for name, value in items:
+        if not value:
+            continue
+        names.append(name.encode('utf-8'))
+        if value is True:
+            kinds.append('b')
+            fields.append(True)
+        elif isinstance(value, int) and -(1 << 63) <= value < 1 << 63:
+            kinds.append('i')
+            fields.append(value)
+        elif isinstance(value, float):
+            kinds.append('d')
+            fields.append(value)
+        elif isinstance(value, str):
+            if len(value) == 36 and _UUID.fullmatch(value):
+                kinds.append('U')
+                fields.append(bytes.fromhex(value.replace('-', '')))
+            else:
+                data = value.encode('utf-8')
+                kinds.append('s')
+                fields.append(len(data))
+                var.append(data)
+        elif isinstance(value, datetime) and value.tzinfo is None:
+            kinds.append('t')
+            fields.append((value - _EPOCH) // _MICROSECOND)
+        else:
+            out = []
+            _encode_value(value, out)
+            data = b''.join(out)
+            kinds.append('x')
+            fields.append(len(data))
+            var.append(data)
+    kinds = ''.join(kinds)
+    shape = kinds.encode('ascii') + b'\0' + b'\0'.join(names)
+    return b''.join([head, _UINT16.pack(len(shape)), shape,
+                     _shape(shape)[1].pack(*fields)] + var)
+
+
+def _decode_str(record, pos):
+    """Return a length prefixed string and the position after it."""
+    size = _UINT32.unpack_from(record, pos)[0]
+    pos += _UINT32.size
+    end = pos + size
+    if end > len(record):
+        raise ValueError('Truncated record')
+    return record[pos:end].decode('utf-8'), end
+
+
+def _decode_value(record, pos):
+    """Return the value at pos in record and the position after it."""
+    kind = record[pos]
+    pos += 1
+    if kind == 0x55:  # U
+        h = record[pos:pos + 16].hex()
+        if len(h) != 32:
+            raise ValueError('Truncated record')
+        return '{}-{}-{}-{}-{}'.format(
+            h[:8], h[8:12], h[12:16], h[16:20], h[20:]), pos + 16
+    if kind == 0x73:  # s
+        return _decode_str(record, pos)
+    if kind == 0x74:  # t
+        return _EPOCH + _INT64.unpack_from(record, pos)[0] * _MICROSECOND, \
+            pos + 8
+    if kind == 0x69:  # i
+        return _INT64.unpack_from(record, pos)[0], pos + 8
+    if kind == 0x64:  # d
+        return _DOUBLE.unpack_from(record, pos)[0], pos + 8
+    if kind == 0x4e:  # N
+        return None, pos
+    if kind == 0x54:  # T
+        return True, pos
+    if kind == 0x46:  # F
+        return False, pos
+    if kind == 0x49:  # I
+        text, pos = _decode_str(record, pos)
+        return int(text), pos
+    if kind == 0x7a:  # z
+        text, pos = _decode_str(record, pos)
+        return datetime.fromisoformat(text), pos
+    if kind == 0x6c:  # l
+        count = _UINT32.unpack_from(record, pos)[0]
+        pos += _UINT32.size
+        items = []
+        for _ in range(count):
+            item, pos = _decode_value(record, pos)
+            items.append(item)
+        return items, pos
+    if kind == 0x6d:  # m
+        count = _UINT32.unpack_from(record, pos)[0]
+        pos += _UINT32.size
+        items = {}
+        for _ in range(count):
+            key, pos = _decode_str(record, pos)
+            items[key], pos = _decode_value(record, pos)
+        return items, pos
+    raise ValueError('Unknown value type: {!r}'.format(chr(kind)))
+
+
+def _shape(shape):
+    """Return the compiled shape of the records of the given shape: the
+    names of the attributes, the struct of their fixed size fields and the
+    indexes of the UUIDs, of the dates and of the (kind, index) of the
+    values stored after the fields."""
+    compiled = _SHAPES.get(shape)
+    if compiled is None:
+        kinds, _, names = shape.partition(b'\0')
+        kinds = kinds.decode('ascii')
+        names = [name.decode('utf-8') for name in names.split(b'\0')] \
+            if kinds else []
+        if len(names) != len(kinds) or not set(kinds) <= set(_FIELDS):
+            raise ValueError('Invalid record shape')
+        compiled = _SHAPES[shape] = (
+            names,
+            struct.Struct('<' + ''.join(_FIELDS[kind] for kind in kinds)),
+            [i for i, kind in enumerate(kinds) if kind == 'U'],
+            [i for i, kind in enumerate(kinds) if kind == 't'],
+            [(kind, i) for i, kind in enumerate(kinds) if kind in 'sx'])
+    return compiled
+
+
+def _id_field(shape):
+    """Return where the id of the records of the given shape is: its kind,
+    the offset of its field and the offsets of the size fields of the
+    values stored before it, or None if it's not a UUID or a string."""
+    if shape not in _ID_FIELDS:
+        kinds = shape.partition(b'\0')[0].decode('ascii')
+        names, _, _, _, _ = _shape(shape)
+        field = None
+        if 'id' in names:
+            i = names.index('id')
+            if kinds[i] in 'Us':
+                offsets = [struct.calcsize('<' + ''.join(
+                    _FIELDS[kind] for kind in kinds[:j]))
+                    for j in range(i + 1)]
+                field = (kinds[i], offsets[i],
+                         [offsets[j] for j in range(i) if kinds[j] in 'sx'])
+        _ID_FIELDS[shape] = field
+    return _ID_FIELDS[shape]
+
+
+def _record_key(record):
+    """Return the key of an object from its record, only decoding its class
+    and its id."""
+    tag = record[0]
+    if tag == _OTHER_CLASS:
+        class_name, pos = _decode_str(record, 1)
+    else:
+        class_name, pos = CLASS_TAGS[tag], 1
+    size = _UINT16.unpack_from(record, pos)[0]
+    pos += _UINT16.size
+    shape = record[pos:pos + size]
+    field = _id_field(shape)
+    if field is None:
+        return '{}.{}'.format(class_name, _decode_record(record)['id'])
+    kind, offset, sizes = field
+    pos += size
+    if kind == 'U':
+        h = record[pos + offset:pos + offset + 16].hex()
+        if len(h) != 32:
+            raise ValueError('Truncated record')
+        return '{}.{}-{}-{}-{}-{}'.format(
+            class_name, h[:8], h[8:12], h[12:16], h[16:20], h[20:])
+    # the strings and other values are stored after the fixed size fields
+    start = pos + _shape(shape)[1].size + sum(
+        _UINT32.unpack_from(record, pos + i)[0] for i in sizes)
+    end = start + _UINT32.unpack_from(record, pos + offset)[0]
+    if end > len(record):
+        raise ValueError('Truncated record')
+    return '{}.{}'.format(class_name, record[start:end].decode('utf-8'))
+
+
+def _decode_record(record):
+    """Return the dict of an object from its record, with the dates as
+    datetimes."""
+    tag = record[0]
+    if tag == _OTHER_CLASS:
+        class_name, pos = _decode_str(record, 1)
+    else:
+        class_name, pos = CLASS_TAGS[tag], 1
+    size = _UINT16.unpack_from(record, pos)[0]
+    pos += _UINT16.size
+    names, fixed, uuids, dates, values = _shape(record[pos:pos + size])
+    fields = list(fixed.unpack_from(record, pos + size))
+    pos += size + fixed.size
+    for i in uuids:
+        # 8-4-4-4-12 from the 4 digits groups of hex()
+        h = fields[i].hex('-', 2)
+        fields[i] = h[:4] + h[5:29] + h[30:34] + h[35:]
+    for i in dates:
+        fields[i] = _EPOCH + fields[i] * _MICROSECOND
+    for kind, i in values:
+        end = pos + fields[i]
+        if kind == 's':
+            fields[i] = record[pos:end].decode('utf-8')
+        else:
+            fields[i], pos = _decode_value(record[:end], pos)
+            if pos != end:
+                raise ValueError('Invalid record')
+        pos = end
+    if pos != len(record):
+        raise ValueError('Invalid record length')
+    value = {'__class__': class_name}
+    value.update(zip(names, fields))
+    return value
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""This module defines the secondary indexes of the storage engine."""
+
+
+class AttributeIndex:
+    """Index the stored objects of a class by the value of one attribute.
+
+    It's an `ObjectMap` listener, objects whose value is not hashable
+    (e.g. lists) are left out of the index.
+    """
+
+    def __init__(self, attr):
+        """Initiate an AttributeIndex instance.
+
+        Args:
+            attr (str): the name of the indexed attribute
+        """
+        self.attr = attr
+        # value -> {key: obj}
+        self.values = {}
+
+    def lookup(self, value):
+        """Return the dict of the objects whose attribute equals value.
+
+        Raises:
+            TypeError: if value is not hashable
+        """
+        return self.values.get(value, {})
+
+    def __add(self, key, obj, value):
+        """Add obj under value."""
+        try:
+            objs = self.values.get(value)
+        except TypeError:
+            return
+        if objs is None:
+            objs = self.values[value] = {}
+        objs[key] = obj
+
+    def __remove(self, key, value):
+        """Remove the object stored under key from value."""
+        try:
+            objs = self.values.get(value)
+        except TypeError:
+            return
+        if objs is not None and objs.pop(key, None) is not None:
+            if not objs:
+                del self.values[value]
+
+    def add(self, key, obj):
+        """Index the object stored under key."""
+        self.__add(key, obj, getattr(obj, self.attr, None))
+
+    def remove(self, key, obj):
+        """Remove the object stored under key from the index."""
+        self.__remove(key, getattr(obj, self.attr, None))
+
+    def clear(self):
+        """Remove all the objects from the index."""
+        self.values.clear()
+
+    def changed(self, key, obj, name, old):
+        """Move the object to its new value if the indexed attribute
+        changed."""
+        if name != self.attr:
+            return
+        self.__remove(key, old)
+        self.__add(key, obj, getattr(obj, self.attr, None))
@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""This module defines a streaming reader for the JSON file of the storage
+engine, so the whole file never has to be parsed at once."""
+import json
+import re
+
+_START = re.compile(r'[ \t\n\r]*\{[ \t\n\r]*(\}?)')
+# a key with the colon and the whitespaces around
+_KEY = re.compile(r'[ \t\n\r]*"((?:[^"\\]|\\.)*)"[ \t\n\r]*:[ \t\n\r]*',
+                  re.DOTALL)
+_SEPARATOR = re.compile(r'[ \t\n\r]*([,}])')
+# a JSON object holding no other object, followed by its closing brace if
+# it's complete: a match always succeeds, so it never backtracks
+_FLAT = r'\{[^{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}"]*)*'
+_FLAT_OBJECT = re.compile(_FLAT + r'(\}?)')
+# a key, its flat object value and the separator after it
+_FLAT_ITEM = re.compile(r'[ \t\n\r]*"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\n\r]*:'
+                        r'[ \t\n\r]*(' + _FLAT + r'\})[ \t\n\r]*([,}])')
+
+
+class _Reader:
+    """A buffer over a text file read chunk by chunk."""
+
+    def __init__(self, f, chunk_size):
+        """Initiate a _Reader instance."""
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def more(self):
+        """Read the next chunk, return False at the end of the file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # drop what was already consumed
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def match(self, pattern, expected):
+        """Consume the text matching pattern and return the match."""
+        while True:
+            m = pattern.match(self.buf, self.pos)
+            # the whitespaces of a match may go on in the next chunk
+            if m is not None and m.end() < len(self.buf):
+                break
+            if not self.more():
+                if m is None:
+                    raise json.JSONDecodeError(
+                        'Expecting ' + expected, self.buf, self.pos)
+                break
+        self.pos = m.end()
+        return m
+
+    def decode(self):
+        """Decode the next JSON value, return it with its JSON text."""
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number may go on in the next chunk
+                if end < len(self.buf) or self.eof:
+                    break
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.more()
+        text = self.buf[self.pos:end]
+        self.pos = end
+        return value, text
+
+    def skip(self):
+        """Return the JSON text of the next value without decoding it when
+        it's an object holding no other object, else decode it."""
+        while True:
+            m = _FLAT_OBJECT.match(self.buf, self.pos)
+            if m is None:
+                break
+            if m.group(1):
+                self.pos = m.end()
+                return m.group(0)
+            # the object, or one of its strings, goes on in the next chunk
+            if m.end() < len(self.buf) and self.buf[m.end()] != '"' or \
+                    not self.more():
+                break
+        return self.decode()[1]
+
+
+def iter_json_object(f, chunk_size=1 << 16):
+    """Yield the (key, value, JSON text of the value) items of the JSON
+    object stored in the text file f one at a time, reading chunk_size
+    characters at a time.
+
+    Raises:
+        json.JSONDecodeError: if the file is not a valid JSON object
+    """
+    reader = _Reader(f, chunk_size)
+    if reader.match(_START, "'{'").group(1):
+        return
+    while True:
+        key = reader.match(_KEY, 'property name').group(1)
+        if '\\' in key:
+            key = json.loads('"' + key + '"')
+        value, text = reader.decode()
+        yield key, value, text
+        if reader.match(_SEPARATOR, "',' or '}'").group(1) == '}':
+            return
+
+
+def iter_json_texts(f, chunk_size=1 << 16):
+    """Yield the (key, JSON text of the value) items of the JSON object
+    stored in the text file f, like `iter_json_object()` but without
+    decoding the values which are objects holding no other object.
+
+    Raises:
+        json.JSONDecodeError: if the file is not a valid JSON object, the
+            values not decoded being only checked to be balanced
+    """
+    reader = _Reader(f, chunk_size)
+    if reader.match(_START, "'{'").group(1):
+        return
+    while True:
+        # an item is matched at once, unless it's cut between two chunks
+        # or its value is not a flat object
+        m = _FLAT_ITEM.match(reader.buf, reader.pos)
+        if m is not None:
+            reader.pos = m.end()
+            key, text, end = m.groups()
+        else:
+            key = reader.match(_KEY, 'property name').group(1)
+            text = reader.skip()
+            end = reader.match(_SEPARATOR, "',' or '}'").group(1)
+        if '\\' in key:
+            key = json.loads('"' + key + '"')
+        yield key, text
+        if end == '}':
+            return
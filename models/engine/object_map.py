@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+"""This module defines the `ObjectMap` class used by the storage engine."""
+
+
+class ObjectMap(dict):
+    """A dict of `<class name>.<id>` keys to objects which also keeps the
+    objects indexed by their class name.
+
+    Listeners are notified of every change, they are objects with the
+    methods `add(key, obj)`, `remove(key, obj)`, `clear()` and
+    `changed(key, obj, name, old)`, the last one is called by the storage
+    engine when the attribute `name` of a stored object changes.
+
+    Attributes:
+        by_class (dict[str, dict[str, object]]): class name -> the part of
+            the map holding the objects of that class
+        listeners (dict[str|None, list]): class name -> the listeners
+            notified of the changes to the objects of that class, the
+            listeners under None are notified of all the changes
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initiate an ObjectMap instance."""
+        super().__init__()
+        self.by_class = {}
+        self.listeners = {}
+        self.update(*args, **kwargs)
+
+    def add_listener(self, listener, name=None):
+        """Notify listener of the changes to the objects of the class name,
+        or to all the objects if name is None."""
+        self.listeners.setdefault(name, []).append(listener)
+        objs = self if name is None else self.by_class.get(name, {})
+        for key, obj in objs.items():
+            listener.add(key, obj)
+
+    def remove_listener(self, listener, name=None):
+        """Stop notifying listener."""
+        self.listeners[name].remove(listener)
+
+    def __listeners_of(self, name):
+        """Return the listeners notified of the changes to class name."""
+        return self.listeners.get(name, []) + self.listeners.get(None, [])
+
+    @staticmethod
+    def class_name(key):
+        """Return the class name part of a `<class name>.<id>` key."""
+        return key.partition('.')[0]
+
+    def __setitem__(self, key, obj):
+        """Add obj under key and index it by class name."""
+        if key in self:
+            self.__unindex(key, self[key])
+        super().__setitem__(key, obj)
+        name = ObjectMap.class_name(key)
+        objs = self.by_class.get(name)
+        if objs is None:
+            objs = self.by_class[name] = {}
+        objs[key] = obj
+        for listener in self.__listeners_of(name):
+            listener.add(key, obj)
+
+    def __delitem__(self, key):
+        """Remove the object stored under key."""
+        self.pop(key)
+
+    def __unindex(self, key, obj):
+        """Remove key from the class index and notify the listeners."""
+        name = ObjectMap.class_name(key)
+        objs = self.by_class[name]
+        del objs[key]
+        if not objs:
+            del self.by_class[name]
+        for listener in self.__listeners_of(name):
+            listener.remove(key, obj)
+
+    def pop(self, key, *default):
+        """Remove and return the object stored under key."""
+        if key not in self:
+            return super().pop(key, *default)
+        obj = super().pop(key)
+        self.__unindex(key, obj)
+        return obj
+
+    def popitem(self):
+        """Remove and return the last added (key, object) pair."""
+        key, obj = super().popitem()
+        self.__unindex(key, obj)
+        return key, obj
+
+    def setdefault(self, key, default=None):
+        """Return the object stored under key, adding default if missing."""
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        """Add all the objects of a dict or an iterable of pairs."""
+        for key, obj in dict(*args, **kwargs).items():
+            self[key] = obj
+
+    def clear(self):
+        """Remove all the objects."""
+        super().clear()
+        self.by_class.clear()
+        for listeners in self.listeners.values():
+            for listener in listeners:
+                listener.clear()
+
+    def changed(self, key, name, old):
+        """Notify the listeners that the attribute name of the object stored
+        under key changed from the value old."""
+        obj = self[key]
+        for listener in self.__listeners_of(ObjectMap.class_name(key)):
+            listener.changed(key, obj, name, old)
+
+    def count(self, name=None):
+        """Return the number of objects, or of the objects of a class."""
+        if name is None:
+            return len(self)
+        return len(self.by_class.get(name, ()))
@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+"""This module defines the queries over the stored objects."""
+import heapq
+import operator
+from itertools import islice
+
+OPERATORS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt,
+             '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+
+class Query:
+    """A query over the stored objects of a class, built by chaining its
+    methods, and run when it's iterated.
+
+    The objects are yielded one at a time. The candidates are looked up one
+    at a time by `storage.iter_find()` with the equality conditions, so
+    through the attribute indexes when there are ones, or by the ColumnStore
+    of the class, when it exists, for range conditions on its numeric
+    attributes. They are only all kept in memory to be sorted, or only the
+    first offset + limit ones when there's a limit.
+
+    Example:
+        >>> query = storage.query(Place).where('price_by_night', '<', 100)
+        >>> for place in query.order_by('name').offset(20).limit(20):
+        ...     print(place)
+    """
+
+    def __init__(self, storage, name):
+        """Initiate a Query instance.
+
+        Args:
+            storage (FileStorage): the storage of the objects
+            name (str): the name of the class of the objects
+        """
+        self.storage = storage
+        self.name = name
+        # (attribute, operator, value) the objects must all match
+        self.conditions = []
+        # the attributes selected, None for all of them
+        self.attrs = None
+        self.order = None
+        self.descending = False
+        self.start = 0
+        self.count = None
+
+    def where(self, attr, op, value):
+        """Only keep the objects whose attribute attr compares to value.
+
+        Args:
+            attr (str): the name of the attribute
+            op (str): one of ==, !=, <, <=, > and >=
+            value (object): the value compared to
+
+        Raises:
+            ValueError: if op is not a known operator
+        """
+        if op not in OPERATORS:
+            raise ValueError('unknown operator {}'.format(op))
+        self.conditions.append((attr, op, value))
+        return self
+
+    def select(self, *attrs):
+        """Select the attributes shown of the objects."""
+        self.attrs = list(attrs)
+        return self
+
+    def order_by(self, attr, descending=False):
+        """Sort the objects by the attribute attr, the objects missing it
+        last."""
+        self.order = attr
+        self.descending = descending
+        return self
+
+    def offset(self, start):
+        """Skip the first start objects."""
+        self.start = start
+        return self
+
+    def limit(self, count):
+        """Yield count objects at most."""
+        self.count = count
+        return self
+
+    def matches(self, obj):
+        """Return whether obj matches all the conditions."""
+        for attr, op, value in self.conditions:
+            try:
+                if not OPERATORS[op](getattr(obj, attr, None), value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def values(self, obj):
+        """Return the dict of the selected attributes of obj."""
+        if self.attrs is None:
+            return obj.to_dict()
+        return {attr: getattr(obj, attr, None) for attr in self.attrs}
+
+    def __iter__(self):
+        """Yield the objects matching the query."""
+        objs = (obj for obj in self.__candidates() if self.matches(obj))
+        stop = None if self.count is None else self.start + self.count
+        if self.order is not None:
+            if stop is None:
+                objs = sorted(objs, key=self.__sort_key,
+                              reverse=self.descending)
+            elif self.descending:
+                objs = heapq.nlargest(stop, objs, key=self.__sort_key)
+            else:
+                objs = heapq.nsmallest(stop, objs, key=self.__sort_key)
+        return islice(objs, self.start, stop)
+
+    def __sort_key(self, obj):
+        """Return the key sorting obj, the numbers apart from the strings
+        and the objects missing the attribute last."""
+        value = getattr(obj, self.order, None)
+        if value is None:
+            return (not self.descending, 0, 0)
+        if isinstance(value, str):
+            return (self.descending, 1, value)
+        return (self.descending, 0, value)
+
+    def __candidates(self):
+        """Return an iterator over the objects which may match the
+        conditions."""
+        equalities = {}
+        ranges = {}
+        for attr, op, value in self.conditions:
+            if op == '==':
+                equalities[attr] = value
+            elif op != '!=' and isinstance(value, (int, float)) and \
+                    not isinstance(value, bool):
+                low, high = ranges.get(attr, (None, None))
+                if op in ['<', '<=']:
+                    high = value if high is None else min(high, value)
+                else:
+                    low = value if low is None else max(low, value)
+                ranges[attr] = (low, high)
+
+        if not equalities and ranges:
+            store = self.storage.columns(self.name, create=False)
+            if store is not None and all(attr in store.attrs
+                                         for attr in ranges):
+                # the bounds of the store are inclusive, matches() applies
+                # the strict ones
+                return (store.objs[row]
+                        for row in store.mask(**ranges).nonzero()[0])
+        return self.storage.iter_find(self.name, **equalities)
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""This module defines the relationships between the model classes."""
+
+# what deleting an object does to the objects related to it, chosen by the
+# relationship or by the call to storage.delete()
+CASCADE = 'cascade'
+RESTRICT = 'restrict'
+
+# class -> list of its relationships
+_relationships = {}
+
+
+class Relationship:
+    """The stored objects of a class whose foreign key attribute holds the
+    id of an instance, e.g. the reviews of a place.
+
+    It's declared on the class of the instance and read as an attribute of
+    the instance, which returns the list of the related objects. They are
+    looked up by `storage.find()`, so the foreign key should be one of the
+    `indexed_attrs` of the related class for the lookup to only cost the
+    number of related objects.
+
+    Deleting the instance leaves the related objects as they are, unless
+    the relationship or the call to `storage.delete()` asks for CASCADE or
+    RESTRICT.
+
+    Example:
+        >>> class Place(BaseModel):
+        ...     reviews = Relationship('Review', 'place_id')
+        >>> place.reviews
+        [<models.review.Review object at 0x...>]
+    """
+
+    def __init__(self, class_name, foreign_key, on_delete=None):
+        """Initiate a Relationship instance.
+
+        Args:
+            class_name (str): the name of the class of the related objects
+            foreign_key (str): the attribute of the related objects holding
+                the id of the instance
+            on_delete (str): CASCADE to delete the related objects with the
+                instance, RESTRICT to refuse deleting the instance while
+                there are related objects, None to do what the call to
+                `storage.delete()` asks for
+        """
+        if on_delete not in [None, CASCADE, RESTRICT]:
+            raise ValueError('unknown on_delete {}'.format(on_delete))
+        self.class_name = class_name
+        self.foreign_key = foreign_key
+        self.on_delete = on_delete
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        """Keep the name of the attribute."""
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        """Return the list of the objects related to obj."""
+        if obj is None:
+            return self
+        from models import storage
+
+        return self.related(storage, obj)
+
+    def related(self, storage, obj):
+        """Return the list of the objects of storage related to obj."""
+        return storage.find(self.class_name, **{self.foreign_key: obj.id})
+
+
+def relationships(cls):
+    """Return the list of the relationships declared by cls and its
+    parents."""
+    found = _relationships.get(cls)
+    if found is None:
+        by_name = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Relationship):
+                    by_name[name] = value
+        found = _relationships[cls] = list(by_name.values())
+    return found
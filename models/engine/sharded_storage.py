@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+"""This module defines the sharded storage engine of the project."""
+import os
+from models.engine.file_storage import FileStorage
+from models.engine.object_map import ObjectMap
+
+
+class ShardedStorage(FileStorage):
+    """This class stores the instances in a file per model class.
+
+    The objects are kept in memory as by `FileStorage`, the directory has a
+    file (a shard) per class, `Place.json` for the places, in the file
+    format (JSON by default). A shard is only read the first time the
+    objects of its class are looked up, created or counted, and `save()`
+    only writes the shards of the objects created, updated or deleted since
+    the last save, so updating a review does not write the places again.
+
+    `reload()` reads the shards already read again, the others stay on the
+    disk until their class is used. `refresh()` merges the shards other
+    processes wrote, the writes holding the lock on `<directory>/.lock` as
+    the ones of `FileStorage` do.
+
+    The shards are read in the main process: splitting them in worker
+    processes is slower, since the records are pickled back to the main
+    process which builds the objects (`benchmarks/parallel_reload.py`).
+    """
+
+    def __init__(self, directory='hbnb_storage', lazy=False,
+                 compact_models=False, file_format=None, write_behind=False,
+                 flush_interval=1.0, flush_after=100):
+        """Initiate a ShardedStorage instance.
+
+        Args:
+            directory (str): the path of the directory of the shards,
+                created if missing
+            lazy (bool): build the objects on first access after reload
+            compact_models (bool): build the objects with the compact
+                classes
+            file_format (str): the name of the format of the shards, JSON
+                if it's None
+            write_behind (bool): write the changes from a background
+                thread
+            flush_interval (float): seconds between the background writes
+            flush_after (int): number of changed objects after which they
+                are written without waiting for the interval
+        """
+        super().__init__(lazy=lazy, compact_models=compact_models,
+                         file_format=file_format or 'json',
+                         write_behind=write_behind,
+                         flush_interval=flush_interval,
+                         flush_after=flush_after)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # class name -> (inode, modification time, size) of the shards read
+        # or written, None for the ones missing then
+        self.__loaded = {}
+
+    def shard_path(self, name):
+        """Return the path of the shard of the class name."""
+        return os.path.join(self.directory, name + self.format.extensions[0])
+
+    def shards(self):
+        """Return the sorted list of the class names having a shard."""
+        extension = self.format.extensions[0]
+        return sorted(entry[:-len(extension)]
+                      for entry in os.listdir(self.directory)
+                      if entry.endswith(extension))
+
+    def all(self, cls=None):
+        """Return the dictionary of objects, or a copy of the one holding the
+        objects of cls only, reading the shards needed first."""
+        if cls is None:
+            self.__load_all()
+        return super().all(cls)
+
+    def count(self, cls=None):
+        """Return the number of objects, or of the objects of cls."""
+        if cls is None:
+            self.__load_all()
+        else:
+            self.__load_shard(ShardedStorage._class_name(cls))
+        return super().count(cls)
+
+    def get(self, cls, id):
+        """Return the object of cls with the given id, or None."""
+        self.__load_shard(ShardedStorage._class_name(cls))
+        return super().get(cls, id)
+
+    def _hydrate(self, name):
+        """Read the shard of the class name if it was not read yet, and
+        build the objects of the class not built yet."""
+        self.__load_shard(name)
+        super()._hydrate(name)
+
+    def new(self, obj):
+        """Add the obj to __objects, reading the shard of its class first
+        so the shard is written with the objects already saved in it."""
+        self.__load_shard(obj.__class__.__name__)
+        super().new(obj)
+
+    def _flush(self):
+        """Write the shards of the objects changed since the last save."""
+        with self._file_lock():
+            self.__merge_shards()
+            names = {ObjectMap.class_name(key)
+                     for key, _ in self._pending_records()}
+            for name in names:
+                self.__write_shard(name)
+
+    def compact(self):
+        """Save, then write every shard read again."""
+        with self._file_lock():
+            self._flush()
+            for name in list(self.__loaded.keys()):
+                self.__write_shard(name)
+
+    def __write_shard(self, name):
+        """Write the objects of the class name to its shard."""
+        path = self.shard_path(name)
+        self._write_file(path, self._entries(name))
+        self.__loaded[name] = ShardedStorage._stat(path)
+
+    def _read_objects(self):
+        """Read the shards already read again."""
+        with self._file_lock():
+            for name in list(self.__loaded.keys()):
+                self.__read_shard(name)
+
+    def __load_all(self):
+        """Read the shards not read yet."""
+        for name in self.shards():
+            self.__load_shard(name)
+
+    def __load_shard(self, name):
+        """Read the shard of the class name if it was not read yet."""
+        if name not in self.__loaded:
+            with self._file_lock():
+                self.__read_shard(name)
+
+    def __read_shard(self, name):
+        """Merge the objects of the shard of the class name, holding the
+        lock on the directory."""
+        path = self.shard_path(name)
+        self.__loaded[name] = stat = ShardedStorage._stat(path)
+        if stat is None:
+            return
+        with open(path, 'rb' if self.format.binary else 'r') as f:
+            self._merge_records(self._read_records(f), name)
+
+    def _refresh(self):
+        """Apply the changes saved by other processes to the shards read."""
+        with self._file_lock():
+            return self.__merge_shards()
+
+    def __merge_shards(self):
+        """Merge the shards read that other processes wrote since, holding
+        the lock on the directory, and return whether there were any."""
+        changed = False
+        for name, seen in list(self.__loaded.items()):
+            stat = ShardedStorage._stat(self.shard_path(name))
+            # a missing shard is left alone, its objects are written again
+            # on the next save of the class
+            if stat is not None and stat != seen:
+                self.__read_shard(name)
+                changed = True
+        return changed
+
+    def _lock_path(self):
+        """Return the path of the file locked by the writes."""
+        return os.path.join(self.directory, '.lock')
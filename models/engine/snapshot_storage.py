@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+"""This module defines the read-only storage engine looking the objects up
+in place in a memory mapped snapshot file."""
+from models.engine.file_storage import FileStorage
+from models.engine.formats import Snapshot
+from models.engine.object_map import ObjectMap
+
+
+class ReadOnlyStorageError(PermissionError):
+    """Raised when the changes of a read-only storage are saved."""
+
+
+class SnapshotStorage(FileStorage):
+    """This class reads the objects of a file of `SnapshotFormat`, written
+    by the other engines with `HBNB_STORAGE_FORMAT=snapshot` or to a
+    `.snap` file, without reading the whole file.
+
+    `reload()` maps the file in memory and reads nothing else, so the
+    processes reading the same file share its pages in the page cache. An
+    object is only decoded and built the first time it's looked up:
+    `get()` finds its record by a binary search of the table of the file,
+    `count()` reads the table only, and `all()`, `find()` and the indexes
+    build all the objects of the class they're asked for.
+
+    The objects can be changed in memory, but `save()` raises
+    ReadOnlyStorageError. `refresh()` maps the file again when it was
+    replaced, the objects built from the previous one being built again on
+    their next lookup.
+    """
+
+    read_only = True
+
+    def __init__(self, file_path='file.snap', compact_models=False):
+        """Initiate a SnapshotStorage instance.
+
+        Args:
+            file_path (str): the path of the snapshot file
+            compact_models (bool): build the objects with the compact
+                classes
+        """
+        super().__init__(compact_models=compact_models,
+                         file_format='snapshot')
+        self.file_path = file_path
+        self.__snapshot = None
+        self.__seen_file = None
+        # the class names whose objects were all built
+        self.__hydrated = set()
+
+    def __objects(self):
+        """Return the ObjectMap of the objects built."""
+        return super().all()
+
+    def get(self, cls, id):
+        """Return the object of cls with the given id, or None, building it
+        from its record on its first lookup."""
+        key = '{}.{}'.format(SnapshotStorage._class_name(cls), id)
+        objs = self.__objects()
+        obj = objs.get(key)
+        # deleted since the reload
+        if obj is not None or key in self._pending_keys() or \
+                self.__snapshot is None:
+            return obj
+        record = self.__snapshot.get(key)
+        if record is None:
+            return None
+        self._reload_object(key, record)
+        return objs[key]
+
+    def all(self, cls=None):
+        """Return the dictionary of objects, or a copy of the one holding the
+        objects of cls only, building the objects not built yet."""
+        if cls is None:
+            self._hydrate(None)
+            return self.__objects()
+        return super().all(cls)
+
+    def count(self, cls=None):
+        """Return the number of objects, or of the objects of cls, from the
+        table of the file and the changes since the reload."""
+        name = SnapshotStorage._class_name(cls)
+        if self.__snapshot is None:
+            return self.__objects().count(name)
+        count = self.__snapshot.count(name)
+        objs = self.__objects()
+        for key in self._pending_keys():
+            if name is not None and ObjectMap.class_name(key) != name:
+                continue
+            stored = key in self.__snapshot
+            if key in objs and not stored:
+                count += 1
+            elif key not in objs and stored:
+                count -= 1
+        return count
+
+    def _hydrate(self, name):
+        """Build the objects of the class name, or of all the classes if
+        it's None, not built yet."""
+        if self.__snapshot is None or name in self.__hydrated or \
+                None in self.__hydrated:
+            return
+        objs = self.__objects()
+        pending = self._pending_keys()
+        for key, record in self.__snapshot.items(name):
+            if key not in objs and key not in pending:
+                self._reload_object(key, record)
+        self.__hydrated.add(name)
+
+    def _read_objects(self):
+        """Map the file in memory, forgetting the objects built from the
+        previous one which were not changed since."""
+        if self.__snapshot is not None:
+            self.__snapshot.close()
+            self.__snapshot = None
+        self.__hydrated.clear()
+        pending = self._pending_keys()
+        for key in [key for key in self.__objects() if key not in pending]:
+            self._unload(key)
+        self.__seen_file = SnapshotStorage._stat(self.file_path)
+        if self.__seen_file is not None:
+            self.__snapshot = Snapshot.open(self.file_path)
+
+    def _refresh(self):
+        """Map the file again if it was replaced since it was mapped."""
+        if SnapshotStorage._stat(self.file_path) == self.__seen_file:
+            return False
+        self._read_objects()
+        return True
+
+    def _flush(self):
+        """Refuse to write the changes, the snapshot is read-only.
+
+        Raises:
+            ReadOnlyStorageError: always
+        """
+        raise ReadOnlyStorageError('{} is a read-only snapshot'.format(
+            self.file_path))
+
+    def compact(self):
+        """Refuse to rewrite the file, the snapshot is read-only.
+
+        Raises:
+            ReadOnlyStorageError: always
+        """
+        self._flush()
+
+    def close(self):
+        """Unmap the file."""
+        if self.__snapshot is not None:
+            self.__snapshot.close()
+            self.__snapshot = None
+        self.__seen_file = None
@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""This module defines the spatial index of the stored objects which have a
+latitude and a longitude."""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance between two points in km."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(
+        lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Index the stored objects of a class in a grid of cells of
+    `cell_size` degrees by their coordinates.
+
+    It's an `ObjectMap` listener, so it follows the objects added, updated
+    and deleted through the storage engine. Objects whose coordinates are
+    not numbers are left out of the index.
+    """
+
+    def __init__(self, cell_size=0.1, lat_attr='latitude',
+                 lon_attr='longitude'):
+        """Initiate a GridIndex instance.
+
+        Args:
+            cell_size (float): the size of a cell in degrees
+            lat_attr (str): the name of the latitude attribute
+            lon_attr (str): the name of the longitude attribute
+        """
+        self.cell_size = cell_size
+        self.lat_attr = lat_attr
+        self.lon_attr = lon_attr
+        # (row, column) -> {key: obj}
+        self.cells = {}
+        # key -> (latitude, longitude, cell)
+        self.points = {}
+        self.columns = math.ceil(360 / cell_size)
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.points)
+
+    def __cell(self, lat, lon):
+        """Return the cell of a point."""
+        return (math.floor(lat / self.cell_size),
+                math.floor((lon % 360) / self.cell_size) % self.columns)
+
+    def add(self, key, obj):
+        """Index the object stored under key by its coordinates."""
+        lat = getattr(obj, self.lat_attr, None)
+        lon = getattr(obj, self.lon_attr, None)
+        if not all(isinstance(value, (int, float)) and
+                   not isinstance(value, bool) and math.isfinite(value)
+                   for value in (lat, lon)):
+            return
+        cell = self.__cell(lat, lon)
+        self.cells.setdefault(cell, {})[key] = obj
+        self.points[key] = (lat, lon, cell)
+
+    def remove(self, key, obj):
+        """Remove the object stored under key from the index."""
+        point = self.points.pop(key, None)
+        if point is None:
+            return
+        objs = self.cells[point[2]]
+        del objs[key]
+        if not objs:
+            del self.cells[point[2]]
+
+    def clear(self):
+        """Remove all the objects from the index."""
+        self.cells.clear()
+        self.points.clear()
+
+    def changed(self, key, obj, name, old):
+        """Move the object if its coordinates changed."""
+        if name in (self.lat_attr, self.lon_attr):
+            self.remove(key, obj)
+            self.add(key, obj)
+
+    def __candidates(self, south, west, north, east):
+        """Yield the (key, latitude, longitude, obj) of the objects in the
+        cells overlapping the box, west > east crosses the antimeridian."""
+        first_row = math.floor(max(south, -90) / self.cell_size)
+        last_row = math.floor(min(north, 90) / self.cell_size)
+        if east - west >= 360:
+            columns = range(self.columns)
+        else:
+            first = math.floor((west % 360) / self.cell_size)
+            count = math.floor(((east - west) % 360) / self.cell_size) + 2
+            columns = [(first + i) % self.columns
+                       for i in range(min(count, self.columns))]
+        rows = range(first_row, last_row + 1)
+        if len(rows) * len(columns) <= len(self.cells):
+            cells = ((row, column) for row in rows for column in columns)
+        else:
+            # fewer cells are used than covered by the box
+            columns = set(columns)
+            cells = [cell for cell in self.cells
+                     if cell[0] in rows and cell[1] in columns]
+        for cell in cells:
+            for key, obj in self.cells.get(cell, {}).items():
+                lat, lon, _ = self.points[key]
+                yield key, lat, lon, obj
+
+    def bbox(self, south, west, north, east):
+        """Return the list of the objects inside the box, bounds included.
+        The box crosses the antimeridian when west > east."""
+        found = []
+        for _, lat, lon, obj in self.__candidates(south, west, north, east):
+            if lat < south or lat > north:
+                continue
+            if west <= east:
+                inside = west <= lon <= east
+            else:
+                inside = lon >= west or lon <= east
+            if inside:
+                found.append(obj)
+        return found
+
+    def nearest(self, lat, lon, radius_km, limit=None):
+        """Return the list of the (distance in km, object) pairs of the
+        objects within radius_km of a point, the nearest first."""
+        dlat = radius_km / KM_PER_DEGREE
+        south, north = lat - dlat, lat + dlat
+        cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+        if north >= 90 or south <= -90 or cos_lat <= 0:
+            west, east = -180, 180
+        else:
+            dlon = dlat / cos_lat
+            west, east = lon - dlon, lon + dlon
+            if east - west >= 360:
+                west, east = -180, 180
+
+        found = []
+        for _, plat, plon, obj in self.__candidates(south, west, north,
+                                                    east):
+            distance = distance_km(lat, lon, plat, plon)
+            if distance <= radius_km:
+                found.append((distance, obj))
+        found.sort(key=lambda pair: pair[0])
+        return found[:limit] if limit is not None else found
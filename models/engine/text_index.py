@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""This module defines the full-text index of the text attributes of the
+stored objects."""
+import heapq
+import math
+import re
+from collections import Counter
+
+TOKEN = re.compile(r'\w+')
+# the words too common to tell the documents apart
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if',
+    'in', 'into', 'is', 'it', 'no', 'not', 'of', 'on', 'or', 'such', 'that',
+    'the', 'their', 'then', 'there', 'these', 'they', 'this', 'to', 'was',
+    'will', 'with'))
+
+
+def tokenize(text):
+    """Return the list of the lowercased words of text, without the stop
+    words."""
+    return [word for word in TOKEN.findall(text.lower())
+            if word not in STOP_WORDS]
+
+
+class TextIndex:
+    """Index the stored objects of a class by the words of their text
+    attributes, and rank them against a search with BM25.
+
+    It's an `ObjectMap` listener, so it follows the objects added, updated
+    and deleted through the storage engine. The attributes which are not
+    strings are left out of the index.
+
+    Example:
+        >>> index = TextIndex(('name', 'description'))
+        >>> storage.all().add_listener(index, 'Place')
+        >>> index.search('quiet garden', limit=5)
+        [(2.31, <models.place.Place object at 0x...>), ...]
+    """
+
+    def __init__(self, attrs, k1=1.2, b=0.75):
+        """Initiate a TextIndex instance.
+
+        Args:
+            attrs (tuple): the names of the text attributes
+            k1 (float): how much a word repeated in a document counts
+            b (float): how much the length of a document lowers its score
+        """
+        self.attrs = tuple(attrs)
+        self.k1 = k1
+        self.b = b
+        # word -> {key: number of times the word is in the document}
+        self.postings = {}
+        # key -> (number of words, obj)
+        self.documents = {}
+        self.total_length = 0
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.documents)
+
+    def __words(self, obj, name=None, old=None):
+        """Return the words of the text attributes of obj, taking old as
+        the value of the attribute name."""
+        words = []
+        for attr in self.attrs:
+            value = old if attr == name else getattr(obj, attr, None)
+            if isinstance(value, str):
+                words.extend(tokenize(value))
+        return words
+
+    def __index(self, key, obj, words):
+        """Add the words of the object stored under key."""
+        for word, count in Counter(words).items():
+            self.postings.setdefault(word, {})[key] = count
+        self.documents[key] = (len(words), obj)
+        self.total_length += len(words)
+
+    def __unindex(self, key, words):
+        """Remove the words of the object stored under key."""
+        for word in set(words):
+            keys = self.postings.get(word)
+            if keys is None:
+                continue
+            keys.pop(key, None)
+            if not keys:
+                del self.postings[word]
+        length, _ = self.documents.pop(key)
+        self.total_length -= length
+
+    def add(self, key, obj):
+        """Index the object stored under key by its words."""
+        if key in self.documents:
+            self.remove(key, self.documents[key][1])
+        self.__index(key, obj, self.__words(obj))
+
+    def remove(self, key, obj):
+        """Remove the object stored under key from the index."""
+        if key in self.documents:
+            self.__unindex(key, self.__words(obj))
+
+    def clear(self):
+        """Remove all the objects from the index."""
+        self.postings.clear()
+        self.documents.clear()
+        self.total_length = 0
+
+    def changed(self, key, obj, name, old):
+        """Reindex the object if one of its text attributes changed."""
+        if name in self.attrs and key in self.documents:
+            self.__unindex(key, self.__words(obj, name, old))
+            self.__index(key, obj, self.__words(obj))
+
+    def search(self, terms, limit=10):
+        """Return the list of the (score, object) pairs of the objects
+        having any of the words of terms, the best ranked first.
+
+        Only the postings of the words searched are read, so a search
+        costs the number of objects having them rather than the number of
+        objects indexed.
+
+        Args:
+            terms (str): the words searched
+            limit (int): the number of objects returned at most, None for
+                all of them
+        """
+        if not self.documents:
+            return []
+        average = self.total_length / len(self.documents) or 1
+        scores = {}
+        for word in set(tokenize(terms)):
+            keys = self.postings.get(word)
+            if keys is None:
+                continue
+            idf = math.log(1 + (len(self.documents) - len(keys) + 0.5) /
+                           (len(keys) + 0.5))
+            for key, count in keys.items():
+                length = self.documents[key][0]
+                norm = self.k1 * (1 - self.b + self.b * length / average)
+                scores[key] = scores.get(key, 0) + \
+                    idf * count * (self.k1 + 1) / (count + norm)
+
+        if limit is None:
+            ranked = sorted(scores.items(), key=lambda pair: pair[1],
+                            reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, scores.items(),
+                                    key=lambda pair: pair[1])
+        return [(score, self.documents[key][1]) for key, score in ranked]
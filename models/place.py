@@ -2,11 +2,15 @@
 """This module defines the Place class."""
 
 from models.base_model import BaseModel
+from models.engine.relations import Relationship
 
 
 class Place(BaseModel):
     """Define Place."""
 
+    indexed_attrs = ('city_id', 'user_id')
+    text_attrs = ('name', 'description')
+
     city_id = ''
     user_id = ''
     name = ''
@@ -18,3 +22,5 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    reviews = Relationship('Review', 'place_id')
@@ -7,6 +7,9 @@ from models.base_model import BaseModel
 class Review(BaseModel):
     """Define Review."""
 
+    indexed_attrs = ('place_id', 'user_id')
+    text_attrs = ('text',)
+
     place_id = ''
     user_id = ''
     text = ''
@@ -2,9 +2,12 @@
 """This module defines the State class."""
 
 from models.base_model import BaseModel
+from models.engine.relations import Relationship
 
 
 class State(BaseModel):
     """Define State."""
 
     name = ''
+
+    cities = Relationship('City', 'state_id')
@@ -2,6 +2,7 @@
 """This module defines the User class."""
 
 from models.base_model import BaseModel
+from models.engine.relations import Relationship
 
 
 class User(BaseModel):
@@ -11,3 +12,6 @@ class User(BaseModel):
     password = ''
     first_name = ''
     last_name = ''
+
+    places = Relationship('Place', 'user_id')
+    reviews = Relationship('Review', 'user_id')
@@ -5,7 +5,9 @@ import os
 import sys
 import unittest
 from models import storage
+from models.engine.cached_storage import CachedStorage
 from models.engine.file_storage import FileStorage
+from models.engine.snapshot_storage import SnapshotStorage
 from console import HBNBCommand
 from io import StringIO
 from unittest.mock import patch
@@ -28,7 +30,8 @@ class TestHBNBCommand_help(unittest.TestCase):
     def test_help(self):
         h = ("Documented commands (type help <topic>):\n"
              "========================================\n"
-             "EOF  all  count  create  destroy  help  quit  show  update")
+             "EOF  aggregate  all  count  create  destroy  help  quit  "
+             "search  show  update")
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help"))
             self.assertEqual(h, output.getvalue().strip())
@@ -46,6 +49,55 @@ class TestHBNBCommand_exit(unittest.TestCase):
             self.assertTrue(HBNBCommand().onecmd("EOF"))
 
 
+class TestHBNBCommand_batch(unittest.TestCase):
+    """Unittests for testing the batch mode of the HBNB command
+    interpreter."""
+
+    def test_batch_saves_once(self):
+        """Test that a script is saved once, and every flush_every
+        commands."""
+        lines = ["create BaseModel\n", "\n", "create User\n", "count User\n"]
+        with patch.object(storage, "_flush", wraps=storage._flush) as flush:
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertEqual(HBNBCommand().run_batch(lines), 3)
+            self.assertEqual(flush.call_count, 1)
+            ids = output.getvalue().split()
+            self.assertIn("BaseModel.{}".format(ids[0]), storage.all())
+            self.assertIn("User.{}".format(ids[1]), storage.all())
+            with patch("sys.stdout", new=StringIO()):
+                HBNBCommand().run_batch(lines, flush_every=1)
+            self.assertEqual(flush.call_count, 3)
+
+    def test_batch_stops_at_quit(self):
+        """Test that the commands after quit are not run."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertEqual(HBNBCommand().run_batch(
+                ["count User", "quit", "create User"]), 2)
+        self.assertEqual(len(output.getvalue().split()), 1)
+
+    def test_batch_goes_on_after_error(self):
+        """Test that a failing command is undone and reported, and that the
+        next commands still run and are saved."""
+        def fail(self, _):
+            BaseModel()
+            raise RuntimeError("failed")
+
+        from models.base_model import BaseModel
+        storage.all().clear()
+        with patch.object(HBNBCommand, "do_count", fail), \
+                patch("sys.stderr", new=StringIO()) as errors, \
+                patch("sys.stdout", new=StringIO()):
+            self.assertEqual(HBNBCommand().run_batch(
+                ["create User", "", "count User", "create User"]), 3)
+        self.assertEqual(errors.getvalue(),
+                         "** line 3: count User: failed **\n")
+        self.assertEqual(storage.count("User"), 2)
+        self.assertEqual(storage.count("BaseModel"), 0)
+        storage.all().clear()
+        storage.reload()
+        self.assertEqual(storage.count("User"), 2)
+
+
 class TestHBNBCommand_create(unittest.TestCase):
     """Unittests for testing create from the HBNB command interpreter."""
     def test_create_object(self):
@@ -56,6 +108,74 @@ class TestHBNBCommand_create(unittest.TestCase):
             self.assertIn(testKey, storage.all().keys())
 
 
+class TestHBNBCommand_read_only(unittest.TestCase):
+    """Unittests for testing the writing commands of the HBNB command
+    interpreter over a read-only storage."""
+
+    def setUp(self):
+        """Read an empty snapshot from the console."""
+        storage.all().clear()
+        self.storage = SnapshotStorage("test_console.snap")
+        self.storage.reload()
+        patcher = patch("console.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Unmap the snapshot."""
+        self.storage.close()
+        storage.all().clear()
+
+    def test_refuse_writes(self):
+        """Test that create, update and destroy change nothing."""
+        commands = ["create Place", "Place.create()",
+                    "update Place 1234 name Home",
+                    'Place.update("1234", {"name": "Home"})',
+                    "destroy Place 1234", "Place.destroy(1234)"]
+        with patch("sys.stdout", new=StringIO()) as output:
+            for command in commands:
+                HBNBCommand().onecmd(command)
+        self.assertEqual(output.getvalue(),
+                         "** read-only storage **\n" * len(commands))
+        self.assertEqual(self.storage.count(), 0)
+
+
+class TestHBNBCommand_cached(unittest.TestCase):
+    """Unittests for testing the commands of the HBNB command interpreter
+    needing all the objects of a class in memory, over a storage keeping
+    only a few of them."""
+
+    db_path = "test_console.db"
+
+    def setUp(self):
+        """Read an empty database from the console."""
+        storage.all().clear()
+        self.storage = CachedStorage(self.db_path, cache_size=2)
+        self.storage.reload()
+        patcher = patch("console.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Remove the database files."""
+        self.storage.close()
+        storage.all().clear()
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_refuse_indexes(self):
+        """Test that the commands needing an index print an error, and that
+        the next commands still run."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("search Place wifi")
+            HBNBCommand().onecmd("Place.where(name=\"Home\")")
+            HBNBCommand().onecmd("aggregate Place")
+        self.assertEqual(output.getvalue(),
+                         "** only 2 objects are kept in memory **\n"
+                         "{'count': 0}\n")
+
+
 class TestHBNBCommand_show(unittest.TestCase):
     """Unittests for testing show from the HBNB command interpreter"""
     def test_show_objects_space_notation(self):
@@ -197,6 +317,247 @@ class TestHBNBCommand_destroy(unittest.TestCase):
             HBNBCommand().onecmd(command)
             self.assertNotIn(obj, storage.all())
 
+    def test_destroy_related_objects(self):
+        """Test that destroy leaves the related objects by default, deletes
+        the reviews of a place with on_delete=cascade, and refuses to delete
+        a city with places with on_delete=restrict."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create City")
+            HBNBCommand().onecmd("create Place")
+            HBNBCommand().onecmd("create Review")
+        cityId, placeId, reviewId = output.getvalue().split()
+        HBNBCommand().onecmd('update Place {} city_id "{}"'.format(
+            placeId, cityId))
+        HBNBCommand().onecmd('update Review {} place_id "{}"'.format(
+            reviewId, placeId))
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("destroy City {} on_delete=restrict".format(
+                cityId))
+            HBNBCommand().onecmd("destroy City {} on_delete=all".format(
+                cityId))
+        self.assertEqual(output.getvalue(),
+                         "** City {} has places **\n".format(cityId) +
+                         "** not a valid value **\n")
+        self.assertIsNotNone(storage.get("City", cityId))
+        HBNBCommand().onecmd("destroy Place {} on_delete=cascade".format(
+            placeId))
+        self.assertIsNone(storage.get("Review", reviewId))
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+        placeId = output.getvalue().strip()
+        HBNBCommand().onecmd('update Place {} city_id "{}"'.format(
+            placeId, cityId))
+        HBNBCommand().onecmd("destroy City {}".format(cityId))
+        self.assertIsNone(storage.get("City", cityId))
+        self.assertIsNotNone(storage.get("Place", placeId))
+
+
+class TestHBNBCommand_bulk(unittest.TestCase):
+    """Unittests for testing the bulk commands of the HBNB command
+    interpreter."""
+
+    def create(self, count):
+        """Create count places and return their ids."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place count={}".format(count))
+        return output.getvalue().split()
+
+    def test_bulk_create(self):
+        """Test that create makes count instances with one save."""
+        with patch.object(storage, "_flush", wraps=storage._flush) as flush:
+            ids = self.create(5)
+            self.assertEqual(flush.call_count, 1)
+        self.assertEqual(len(set(ids)), 5)
+        for id in ids:
+            self.assertIsNotNone(storage.get("Place", id))
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place count=0")
+            HBNBCommand().onecmd("create Place count=many")
+        self.assertEqual(output.getvalue(),
+                         "** not a valid value **\n" * 2)
+        # the other words are ignored, as they always were
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place 5 extra")
+        self.assertEqual(len(output.getvalue().split()), 1)
+
+    def test_bulk_update(self):
+        """Test updating several instances with one save."""
+        ids = self.create(3)
+        places = [storage.get("Place", id) for id in ids]
+        with patch.object(storage, "_flush", wraps=storage._flush) as flush:
+            HBNBCommand().onecmd('update Place {},{} {{"name": "Home", '
+                                 '"max_guest": 3}}'.format(ids[0], ids[1]))
+            HBNBCommand().onecmd("update Place {},{} number_rooms 2".format(
+                ids[1], ids[2]))
+            self.assertEqual(flush.call_count, 2)
+        self.assertEqual([p.name for p in places], ["Home", "Home", ""])
+        self.assertEqual([p.max_guest for p in places], [3, 3, 0])
+        self.assertEqual([p.number_rooms for p in places], [0, 2, 2])
+
+    def test_bulk_update_dot_notation(self):
+        """Test the <class>.bulk_update([<id>, ...], ...) syntax."""
+        ids = self.create(2)
+        HBNBCommand().onecmd('Place.bulk_update(["{}", "{}"], '
+                             '{{"name": "Home"}})'.format(*ids))
+        HBNBCommand().onecmd('Place.bulk_update(["{}"], "max_guest", 4)'
+                             .format(ids[1]))
+        self.assertEqual(storage.get("Place", ids[0]).name, "Home")
+        self.assertEqual(storage.get("Place", ids[1]).name, "Home")
+        self.assertEqual(storage.get("Place", ids[1]).max_guest, 4)
+
+    def test_bulk_update_missing_instance(self):
+        """Test that no instance is updated when an id is not found."""
+        ids = self.create(1)
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("update Place {},missing name Home".format(
+                ids[0]))
+        self.assertEqual(output.getvalue(), "** no instance found **\n")
+        self.assertEqual(storage.get("Place", ids[0]).name, "")
+
+    def test_bulk_destroy(self):
+        """Test destroying several instances with one save."""
+        ids = self.create(4)
+        with patch.object(storage, "_flush", wraps=storage._flush) as flush:
+            HBNBCommand().onecmd("destroy Place {},{}".format(ids[0], ids[1]))
+            HBNBCommand().onecmd("destroy Place {},{}".format(ids[2], ids[3]))
+            self.assertEqual(flush.call_count, 2)
+        for id in ids:
+            self.assertIsNone(storage.get("Place", id))
+
+    def test_destroy_extra_words(self):
+        """Test that the words after the id are not taken as more ids."""
+        ids = self.create(2)
+        HBNBCommand().onecmd("destroy Place {} {}".format(ids[0], ids[1]))
+        self.assertIsNone(storage.get("Place", ids[0]))
+        self.assertIsNotNone(storage.get("Place", ids[1]))
+
+
+class TestHBNBCommand_query(unittest.TestCase):
+    """Unittests for testing the queries of the HBNB command interpreter."""
+
+    def setUp(self):
+        """Store three places."""
+        storage.all().clear()
+        self.places = []
+        for i in range(3):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            place = storage.get("Place", output.getvalue().strip())
+            place.name = "place {}".format(i)
+            place.price_by_night = 50 * (i + 1)
+            self.places.append(place)
+
+    def test_query(self):
+        """Test printing the matching instances one per line."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd(
+                "Place.where(price_by_night<150, name!='place 0')")
+        self.assertEqual(output.getvalue(), "{}\n".format(self.places[1]))
+
+    def test_query_select_order_limit(self):
+        """Test selecting, sorting and paginating the instances."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("Place.where(price_by_night>=50)"
+                                 ".select(name).order_by(-price_by_night)"
+                                 ".offset(1).limit(1)")
+        self.assertEqual(output.getvalue(), "[Place] ({}) {}\n".format(
+            self.places[1].id, {"name": "place 1"}))
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd('Place.where(name="place 2").select(id)')
+        self.assertEqual(output.getvalue(), "[Place] ({0}) {{'id': '{0}'}}\n"
+                         .format(self.places[2].id))
+
+    def test_query_errors(self):
+        """Test the messages of the queries not valid."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("MyModel.where(name='x')")
+            HBNBCommand().onecmd("Place.where(name=other)")
+            HBNBCommand().onecmd("Place.limit(-1)")
+        self.assertEqual(output.getvalue(), "** class doesn't exist **\n"
+                         "*** Unknown syntax: Place.where(name=other)\n"
+                         "*** Unknown syntax: Place.limit(-1)\n")
+
+
+class TestHBNBCommand_search(unittest.TestCase):
+    """Unittests for testing search of the HBNB command interpreter."""
+
+    def setUp(self):
+        """Store three places."""
+        storage.all().clear()
+        self.places = []
+        for description in ["quiet garden", "garden", "city loft"]:
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            place = storage.get("Place", output.getvalue().strip())
+            place.description = description
+            self.places.append(place)
+
+    def test_search(self):
+        """Test printing the best matches first."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd('search Place "quiet garden"')
+        self.assertEqual(output.getvalue(), "{}\n{}\n".format(
+            self.places[0], self.places[1]))
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd('search Place "garden loft" 1')
+        self.assertEqual(output.getvalue(), "{}\n".format(self.places[2]))
+
+    def test_search_errors(self):
+        """Test the messages of the searches not valid."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("search")
+            HBNBCommand().onecmd("search MyModel garden")
+            HBNBCommand().onecmd("search Place")
+            HBNBCommand().onecmd("search Place garden 0")
+            HBNBCommand().onecmd('search Place "garden')
+            HBNBCommand().onecmd("search City garden")
+        self.assertEqual(output.getvalue(), "** class name missing **\n"
+                         "** class doesn't exist **\n"
+                         "** words missing **\n"
+                         "** not a valid value **\n"
+                         "** not a valid value **\n"
+                         "** City has no text attributes **\n")
+
+
+class TestHBNBCommand_aggregate(unittest.TestCase):
+    """Unittests for testing aggregate of the HBNB command interpreter."""
+
+    def setUp(self):
+        """Store three places in two cities."""
+        storage.all().clear()
+        for i in range(3):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            place = storage.get("Place", output.getvalue().strip())
+            place.city_id = "city {}".format(i % 2)
+            place.price_by_night = 10 * (i + 1)
+
+    def test_aggregate(self):
+        """Test printing the aggregates of every group."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("aggregate Place city_id avg=price_by_night "
+                                 "max=price_by_night")
+        self.assertEqual(output.getvalue(),
+                         "city 0: {'count': 2, 'avg': 20.0, 'max': 30}\n"
+                         "city 1: {'count': 1, 'avg': 20.0, 'max': 20}\n")
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("aggregate Place sum=price_by_night")
+        self.assertEqual(output.getvalue(), "{'count': 3, 'sum': 60}\n")
+
+    def test_aggregate_errors(self):
+        """Test the messages of the aggregates not valid."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("aggregate")
+            HBNBCommand().onecmd("aggregate MyModel")
+            HBNBCommand().onecmd("aggregate Place city_id user_id")
+            HBNBCommand().onecmd("aggregate Place avg=")
+            HBNBCommand().onecmd("aggregate Place median=price_by_night")
+        self.assertEqual(output.getvalue(), "** class name missing **\n"
+                         "** class doesn't exist **\n"
+                         "** not a valid value **\n"
+                         "** not a valid value **\n"
+                         "** unknown aggregate median **\n")
+
 
 class TestHBNBCommand_all(unittest.TestCase):
     """Unittests for testing all of the HBNB command interpreter."""
@@ -440,7 +801,7 @@ class TestConsole(unittest.TestCase):
         help_out = """
 Documented commands (type help <topic>):
 ========================================
-EOF  all  count  create  destroy  help  quit  show  update
+EOF  aggregate  all  count  create  destroy  help  quit  search  show  update
 
 Quit command to exit the program
 """
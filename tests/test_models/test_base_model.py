@@ -96,3 +96,12 @@ class TestBaseModel(TestCase):
         my_new_model = BaseModel(**my_model_dict)
         self.assertIsInstance(my_new_model.created_at, datetime)
         self.assertIsInstance(my_new_model.updated_at, datetime)
+
+    def test_setting_attr_marks_dirty(self):
+        """Test that setting an attribute marks the stored instance dirty."""
+        from models import storage
+        my_model = BaseModel()
+        key = 'BaseModel.' + my_model.id
+        storage._FileStorage__pending.discard(key)
+        my_model.name = 'dirty'
+        self.assertIn(key, storage._FileStorage__pending)
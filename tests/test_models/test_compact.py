@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Unittest for the compact model classes."""
+
+from unittest import TestCase
+from models.compact import compact_class
+from models.base_model import BaseModel
+from models.place import Place
+from models import storage
+
+
+class TestCompactClass(TestCase):
+    """Test cases for compact_class function"""
+
+    def setUp(self):
+        """Build a compact place with a declared and an extra attribute."""
+        self.CompactPlace = compact_class(Place)
+        self.place = self.CompactPlace()
+        self.place.name = 'home'
+        self.place.extra_attr = 89
+
+    def test_class(self):
+        """Test that the compact class passes for the model class."""
+        self.assertIs(compact_class(Place), self.CompactPlace)
+        self.assertIsInstance(self.place, Place)
+        self.assertIsInstance(self.place, BaseModel)
+        self.assertEqual(self.CompactPlace.__name__, 'Place')
+        self.assertIs(storage.get('Place', self.place.id), self.place)
+
+    def test_no_instance_dict(self):
+        """Test that the attributes are kept out of the instance dict."""
+        self.place.to_dict()
+        str(self.place)
+        self.assertEqual(self.place.__dict__, {})
+        self.assertIsInstance(self.place._id, bytes)
+        self.assertEqual(self.place._extra, ('extra_attr', 89))
+
+    def test_defaults(self):
+        """Test the class defaults of the attributes not set."""
+        self.assertEqual(self.place.number_rooms, 0)
+        self.assertEqual(self.place.amenity_ids, [])
+        with self.assertRaises(AttributeError):
+            self.place.missing
+
+    def test_same_representation(self):
+        """Test that to_dict and __str__ match the model class ones."""
+        place = Place(**self.place.to_dict())
+        self.assertEqual(self.place.to_dict(), place.to_dict())
+        self.assertEqual(str(self.place), str(place))
+        copy = self.CompactPlace(**place.to_dict())
+        self.assertEqual(str(copy), str(place))
+
+    def test_id_not_uuid(self):
+        """Test that ids which are not UUIDs are kept as they are."""
+        place = self.CompactPlace(id='1234')
+        self.assertEqual(place.id, '1234')
+        upper = self.place.id.upper()
+        self.assertEqual(self.CompactPlace(id=upper).id, upper)
+
+    def test_delete_attribute(self):
+        """Test deleting a declared and an extra attribute."""
+        self.place.extra_attr = 90
+        self.assertEqual(self.place.extra_attr, 90)
+        del self.place.name
+        del self.place.extra_attr
+        self.assertEqual(self.place.name, '')
+        with self.assertRaises(AttributeError):
+            del self.place.extra_attr
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""Unittest for Aggregate."""
+
+from unittest import TestCase
+from unittest.mock import patch
+from models import storage
+from models.engine.aggregates import Aggregate
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+import os
+
+
+class TestAggregate(TestCase):
+    """Test cases for Aggregate class"""
+
+    def setUp(self):
+        """Store six places in two cities."""
+        storage.all().clear()
+        self.places = []
+        for i in range(6):
+            place = Place()
+            place.city_id = 'city {}'.format(i % 2)
+            place.price_by_night = (i + 1) * 10
+            self.places.append(place)
+
+    def tearDown(self):
+        """Remove the places."""
+        storage.all().clear()
+
+    def test_group_by(self):
+        """Test the count and aggregates of every group."""
+        self.assertEqual(
+            storage.aggregate(Place, 'city_id', avg='price_by_night',
+                              min='price_by_night', max='max_guest'),
+            {'city 0': {'count': 3, 'avg': 30.0, 'min': 10, 'max': 0},
+             'city 1': {'count': 3, 'avg': 40.0, 'min': 20, 'max': 0}})
+        self.assertEqual(storage.aggregate(Review, 'place_id'), {})
+
+    def test_without_group_by(self):
+        """Test aggregating all the objects together."""
+        self.assertEqual(storage.aggregate(Place, sum='price_by_night'),
+                         {'count': 6, 'sum': 210})
+        self.assertEqual(storage.aggregate(Review, avg='rating'),
+                         {'count': 0, 'avg': None})
+
+    def test_not_numbers(self):
+        """Test that the values which are not numbers are left out, and
+        the objects whose group can't be a dict key."""
+        self.places[0].price_by_night = 'free'
+        self.places[2].price_by_night = True
+        self.places[4].city_id = ['city 0']
+        self.assertEqual(
+            storage.aggregate(Place, 'city_id', avg='price_by_night'),
+            {'city 0': {'count': 2, 'avg': None},
+             'city 1': {'count': 3, 'avg': 40.0}})
+
+    def test_unknown_function(self):
+        """Test that only sum, avg, min and max are known."""
+        with self.assertRaises(ValueError):
+            storage.aggregate(Place, 'city_id', median='price_by_night')
+
+    def test_materialize(self):
+        """Test that a materialized aggregate follows the objects created,
+        updated and deleted, and is not computed again."""
+        spec = {'avg': 'price_by_night', 'min': 'price_by_night',
+                'max': 'price_by_night'}
+        storage.aggregate(Place, 'city_id', materialize=True, **spec)
+        self.places[1].price_by_night = 5
+        self.places[2].city_id = 'city 1'
+        storage.delete(self.places[4])
+        place = Place()
+        place.city_id = 'city 2'
+        with patch.object(Aggregate, 'add') as add:
+            self.assertEqual(storage.aggregate(Place, 'city_id', **spec), {
+                'city 0': {'count': 1, 'avg': 10.0, 'min': 10, 'max': 10},
+                'city 1': {'count': 4, 'avg': 33.75, 'min': 5, 'max': 60},
+                'city 2': {'count': 1, 'avg': 0.0, 'min': 0, 'max': 0}})
+        add.assert_not_called()
+        with storage.batch():
+            storage.delete(self.places[5])
+            self.places[3].price_by_night = 70
+        self.assertEqual(storage.aggregate(Place, 'city_id', **spec)[
+            'city 1'], {'count': 3, 'avg': 35.0, 'min': 5, 'max': 70})
+
+    def test_materialize_lazy(self):
+        """Test that a materialized aggregate counts the objects reloaded
+        lazily."""
+        self.addCleanup(os.remove, storage._FileStorage__file_path)
+        lazy = FileStorage(lazy=True)
+        lazy.save()
+        spec = {'sum': 'price_by_night'}
+        self.assertEqual(lazy.aggregate(Place, materialize=True, **spec),
+                         {'count': 6, 'sum': 210})
+        lazy.reload()
+        self.assertEqual(lazy.aggregate(Place, materialize=True, **spec),
+                         {'count': 6, 'sum': 210})
+
+    def test_batch_rollback(self):
+        """Test that a materialized aggregate follows the changes undone by
+        a batch."""
+        storage.aggregate(Place, materialize=True, max='price_by_night')
+        with self.assertRaises(RuntimeError):
+            with storage.batch():
+                storage.delete(self.places[5])
+                self.places[0].price_by_night = 100
+                raise RuntimeError
+        self.assertEqual(storage.aggregate(Place, max='price_by_night'),
+                         {'count': 6, 'max': 60})
@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+"""Unittest for CachedStorage."""
+
+from unittest import TestCase
+from unittest.mock import patch
+from models import storage
+from models.engine.cached_storage import CachedStorage
+from models.engine.file_storage import FileStorage
+from models.engine.relations import CASCADE
+from models.place import Place
+from models.review import Review
+from models.user import User
+import gc
+import json
+import os
+import sqlite3
+
+
+class TestCachedStorage(TestCase):
+    """Test cases for CachedStorage class"""
+
+    db_path = 'test_hbnb.db'
+
+    def setUp(self):
+        """Start every test from an empty database, the models using the
+        storage tested."""
+        storage.all().clear()
+        self.storage = CachedStorage(self.db_path, cache_size=3)
+        self.storage.reload()
+        for target in ['models.storage', 'models.base_model.storage']:
+            patcher = patch(target, self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Remove the database files."""
+        self.storage.close()
+        storage.all().clear()
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def row(self, obj):
+        """Return the dict of the row of obj, or None."""
+        with sqlite3.connect(self.db_path) as connection:
+            row = connection.execute(
+                'SELECT data FROM objects WHERE class = ? AND id = ?',
+                (type(obj).__name__, obj.id)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def create(self, count):
+        """Create and save count places, and return their ids."""
+        ids = []
+        for _ in range(count):
+            place = Place()
+            place.save()
+            ids.append(place.id)
+        return ids
+
+    def test_bounded(self):
+        """Test that only cache_size objects stay in memory."""
+        ids = self.create(10)
+        self.assertEqual(len(storage.all()), 3)
+        self.assertEqual(self.storage.count(), 10)
+        self.assertEqual(self.storage.count(Place), 10)
+        self.assertEqual(sorted(self.storage.all(Place)), sorted(
+            'Place.{}'.format(id) for id in ids))
+        self.assertEqual(len(storage.all()), 3)
+        self.assertEqual(self.storage.cache_info()['evictions'], 7)
+        with self.assertRaises(ValueError):
+            CachedStorage(self.db_path, cache_size=0)
+
+    def test_lru(self):
+        """Test that the least recently used objects are evicted, and that
+        the counters follow the lookups."""
+        ids = self.create(4)
+        gc.collect()
+        self.assertEqual(self.storage.cache_info(), {
+            'hits': 0, 'misses': 0, 'evictions': 1, 'writebacks': 0,
+            'size': 3, 'cache_size': 3})
+        self.storage.get(Place, ids[1])
+        place = self.storage.get(Place, ids[0])
+        self.assertEqual(place.id, ids[0])
+        self.assertIs(self.storage.get(Place, ids[0]), place)
+        self.assertIsNone(self.storage.get(Place, 'missing'))
+        info = self.storage.cache_info()
+        self.assertEqual((info['hits'], info['misses'], info['evictions']),
+                         (2, 2, 2))
+        self.assertEqual(sorted(storage.all()), sorted(
+            'Place.{}'.format(id) for id in [ids[0], ids[1], ids[3]]))
+
+    def test_write_back(self):
+        """Test that the dirty objects are written back to evict them."""
+        place = Place()
+        place.name = 'Home'
+        self.assertIsNone(self.row(place))
+        for _ in range(3):
+            User()
+        self.assertEqual(self.row(place)['name'], 'Home')
+        # the dirty objects are all written at once
+        self.assertEqual(self.storage.cache_info()['writebacks'], 4)
+        self.assertNotIn('Place.' + place.id, storage.all())
+
+    def test_evicted_instances(self):
+        """Test that an evicted object still referenced is looked up as the
+        same instance, and that its changes are saved."""
+        place = Place()
+        place.save()
+        self.create(3)
+        self.assertNotIn('Place.' + place.id, storage.all())
+        self.assertIs(self.storage.get(Place, place.id), place)
+        self.create(3)
+        place.name = 'Home'
+        place.save()
+        self.assertEqual(self.row(place)['name'], 'Home')
+        self.create(3)
+        self.storage.delete(place)
+        self.storage.save()
+        self.assertIsNone(self.row(place))
+        self.assertIsNone(self.storage.get(Place, place.id))
+
+    def test_batch_pins_dirty_objects(self):
+        """Test that the objects changed in a batch stay in memory until
+        the end of the batch, and that the batch still rolls back."""
+        with self.storage.batch():
+            places = [Place() for _ in range(6)]
+            self.assertEqual(len(storage.all()), 6)
+        self.assertEqual(len(storage.all()), 3)
+        self.assertEqual(self.storage.count(Place), 6)
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                for place in places:
+                    place.name = 'changed'
+                self.storage.delete(places[0])
+                raise RuntimeError
+        self.assertTrue(all(place.name == '' and 'name' not in self.row(place)
+                            for place in places))
+        self.assertEqual(self.storage.count(Place), 6)
+        self.assertIs(self.storage.get(Place, places[0].id), places[0])
+
+    def test_find_and_cascade(self):
+        """Test looking the objects up by attribute in the database, and
+        deleting the related objects evicted."""
+        user = User()
+        user.save()
+        with self.storage.batch():
+            places = [Place() for _ in range(4)]
+            for place in places:
+                place.user_id = user.id
+                place.name = 'Home' if place is places[1] else 'Flat'
+        review = Review()
+        review.place_id = places[1].id
+        review.save()
+        self.assertEqual(self.storage.find(Place, name='Home'), [places[1]])
+        self.assertEqual(len(self.storage.find(Place, user_id=user.id)), 4)
+        self.assertEqual(self.storage.find(
+            Place, user_id=user.id, name='Home'), [places[1]])
+        self.storage.delete(user, on_delete=CASCADE)
+        self.storage.save()
+        self.assertEqual(self.storage.count(), 0)
+
+    def test_refresh(self):
+        """Test that the objects other processes changed are read again."""
+        place = Place()
+        place.save()
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute(
+                'UPDATE objects SET data = ? WHERE id = ?',
+                (json.dumps(dict(place.to_dict(), name='Other')), place.id))
+        self.assertTrue(self.storage.refresh())
+        self.assertEqual(self.storage.get(Place, place.id).name, 'Other')
+        self.assertFalse(self.storage.refresh())
+
+    def test_indexes_of_all_objects(self):
+        """Test that the indexes following all the objects of a class are
+        not available, and that the aggregates are computed in a pass."""
+        # the indexes other tests created are shared by the instances
+        for name in ['column_stores', 'spatial_indexes', 'text_indexes',
+                     'aggregates']:
+            patcher = patch.dict(
+                getattr(FileStorage, '_FileStorage__' + name), clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for method in [self.storage.spatial, self.storage.columns]:
+            with self.assertRaises(ValueError):
+                method(Place)
+        with self.assertRaises(ValueError):
+            self.storage.search(Place, 'home')
+        with self.assertRaises(ValueError):
+            self.storage.aggregate(Place, materialize=True)
+        self.create(5)
+        self.assertEqual(self.storage.aggregate(Place), {'count': 5})
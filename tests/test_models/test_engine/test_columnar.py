@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""Unittest for the columnar view of the stored objects."""
+
+from unittest import TestCase, skipIf
+from models import storage
+from models.engine import columnar
+from models.engine.columnar import numeric_attrs
+from models.engine.object_map import ObjectMap
+from models.place import Place
+
+
+class TestNumericAttrs(TestCase):
+    """Test cases for numeric_attrs function"""
+
+    def test_place(self):
+        """Test the numeric attributes of Place."""
+        self.assertEqual(numeric_attrs(Place), [
+            'number_rooms', 'number_bathrooms', 'max_guest',
+            'price_by_night', 'latitude', 'longitude'])
+
+
+@skipIf(columnar.numpy is None, 'numpy is not installed')
+class TestColumnStore(TestCase):
+    """Test cases for ColumnStore class"""
+
+    def setUp(self):
+        """Store a few places in a map followed by a ColumnStore."""
+        self.objs = ObjectMap()
+        self.store = columnar.ColumnStore(numeric_attrs(Place), capacity=2)
+        self.objs.add_listener(self.store, 'Place')
+        self.places = []
+        for i, (price, guests) in enumerate([(80, 2), (120, 4), (90, 6),
+                                             (60, 4)]):
+            place = Place(id=str(i), price_by_night=price, max_guest=guests)
+            self.objs['Place.' + place.id] = place
+            self.places.append(place)
+
+    def test_select(self):
+        """Test filtering by ranges."""
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(
+            self.store.select(price_by_night=(None, 100), max_guest=(4, None)),
+            [self.places[2], self.places[3]])
+        self.assertEqual(self.store.select(max_guest=(4, 4)),
+                         [self.places[1], self.places[3]])
+
+    def test_order_and_limit(self):
+        """Test sorting and limiting the results."""
+        self.assertEqual(
+            self.store.select(order_by='price_by_night', limit=2),
+            [self.places[3], self.places[0]])
+        self.assertEqual(
+            self.store.select(order_by='price_by_night', descending=True,
+                              limit=1), [self.places[1]])
+
+    def test_update_and_delete(self):
+        """Test that the columns follow the changes of the objects."""
+        self.places[0].price_by_night = 200
+        self.objs.changed('Place.0', 'price_by_night', 80)
+        del self.objs['Place.1']
+        self.assertEqual(self.store.select(price_by_night=(150, None)),
+                         [self.places[0]])
+        self.assertEqual(len(self.store), 3)
+        self.places[2].max_guest = 'many'
+        self.objs.changed('Place.2', 'max_guest', 6)
+        self.assertEqual(self.store.select(max_guest=(0, None)),
+                         [self.places[0], self.places[3]])
+
+    def test_storage_columns(self):
+        """Test the ColumnStore of the storage engine."""
+        place = Place()
+        place.price_by_night = 987654
+        places = storage.columns(Place)
+        self.assertIs(storage.columns('Place'), places)
+        self.assertIn(place, places.select(price_by_night=(987654, None)))
+        storage.delete(place)
+        self.assertNotIn(place, places.select(price_by_night=(987654, None)))
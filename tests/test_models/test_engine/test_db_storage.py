@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""Unittest for DBStorage."""
+
+from unittest import TestCase
+from models import storage
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from models.place import Place
+import json
+import os
+import sqlite3
+
+
+class TestDBStorage(TestCase):
+    """Test cases for DBStorage class"""
+
+    db_path = 'test_hbnb.db'
+
+    def setUp(self):
+        """Start every test from an empty database."""
+        storage.all().clear()
+        self.storage = DBStorage(self.db_path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """Remove the database files."""
+        self.storage.close()
+        storage.all().clear()
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def rows(self):
+        """Return the (class, id) of the rows of the database."""
+        with sqlite3.connect(self.db_path) as connection:
+            return sorted(connection.execute(
+                'SELECT class, id FROM objects').fetchall())
+
+    def test_wal_mode(self):
+        """Test that the database runs in WAL mode."""
+        with sqlite3.connect(self.db_path) as connection:
+            mode = connection.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_save_reload(self):
+        """Test that saved objects are reloaded."""
+        place = Place()
+        place.name = 'Home'
+        place.amenity_ids = ['a']
+        new_model = BaseModel()
+        self.storage.save()
+        self.assertEqual(self.rows(), sorted([('Place', place.id),
+                                              ('BaseModel', new_model.id)]))
+        storage.all().clear()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(Place, place.id).to_dict(),
+                         place.to_dict())
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_save_writes_changed_rows(self):
+        """Test that save only writes the rows of the changed objects."""
+        models = [BaseModel() for _ in range(5)]
+        self.storage.save()
+        connection = self.storage._DBStorage__connection
+        changes = connection.total_changes
+        models[0].name = 'changed'
+        self.storage.delete(models[1])
+        self.storage.save()
+        self.assertEqual(connection.total_changes - changes, 2)
+        self.assertEqual(len(self.rows()), 4)
+        self.storage.save()
+        self.assertEqual(connection.total_changes - changes, 2)
+
+    def test_binary_records(self):
+        """Test storing the records in the binary format."""
+        self.storage.close()
+        self.storage = DBStorage(self.db_path, file_format='binary')
+        place = Place()
+        place.max_guest = 3
+        self.storage.save()
+        storage.all().clear()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(Place, place.id).max_guest, 3)
+
+    def test_refresh(self):
+        """Test that refresh applies the changes of other connections."""
+        kept, changed = BaseModel(), BaseModel()
+        self.storage.save()
+        self.assertFalse(self.storage.refresh())
+        changed_dict = changed.to_dict()
+        changed_dict['name'] = 'changed'
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute(
+                'UPDATE objects SET data = ? WHERE id = ?',
+                (json.dumps(changed_dict), changed.id))
+        self.assertTrue(self.storage.refresh())
+        self.assertIs(self.storage.get(BaseModel, kept.id), kept)
+        self.assertEqual(self.storage.get(BaseModel, changed.id).name,
+                         'changed')
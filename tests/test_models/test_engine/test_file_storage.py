@@ -5,7 +5,14 @@ from unittest import TestCase
 from models import storage
 from models.base_model import BaseModel
 from models.engine.file_storage import FileStorage
+from unittest.mock import patch
+from io import StringIO
+import json
 import os
+import subprocess
+import sys
+import tempfile
+import time
 
 
 class TestFileStorage(TestCase):
@@ -16,6 +23,49 @@ class TestFileStorage(TestCase):
         all_objs = storage.all()
         self.assertIsInstance(all_objs, dict)
 
+    def test_all_by_class(self):
+        """Test filtering all() and count() by class."""
+        from models.user import User
+        user = User()
+        BaseModel()
+        users = storage.all(User)
+        self.assertEqual(users, storage.all('User'))
+        self.assertIs(users['User.' + user.id], user)
+        self.assertTrue(all(key.startswith('User.') for key in users))
+        self.assertEqual(storage.count(User), len(users))
+        self.assertEqual(storage.count(), len(storage.all()))
+        self.assertIs(storage.get(User, user.id), user)
+        self.assertIsNone(storage.get('User', 'missing'))
+
+    def test_find(self):
+        """Test finding objects by attribute values."""
+        from models.place import Place
+        place = Place()
+        place.city_id, place.max_guest = 'find-city', 4
+        other = Place()
+        other.city_id = 'find-city'
+        self.assertEqual(storage.find(Place, city_id='find-city',
+                                      max_guest=4), [place])
+        self.assertEqual(storage.find('Place', max_guest=4,
+                                      city_id='find-city'), [place])
+        place.city_id = 'find-other-city'
+        self.assertEqual(storage.find(Place, city_id='find-city'), [other])
+        storage.delete(other)
+        self.assertEqual(storage.find(Place, city_id='find-city'), [])
+
+    def test_find_after_reload(self):
+        """Test that the indexes are rebuilt by reload()."""
+        from models.place import Place
+        place = Place()
+        place.city_id = 'reload-city'
+        storage.save()
+        storage.all().clear()
+        self.assertEqual(storage.find(Place, city_id='reload-city'), [])
+        storage.reload()
+        self.assertEqual([p.id for p in storage.find(
+            Place, city_id='reload-city')], [place.id])
+        os.remove(storage._FileStorage__file_path)
+
     def test_call_for_new(self):
         """Test calling the new() method."""
         new_model = BaseModel()
@@ -49,3 +99,448 @@ class TestFileStorage(TestCase):
     def test_storage_type(self):
         """Test if 'storage' is an instance of FileStorage."""
         self.assertIsInstance(storage, FileStorage)
+
+    def test_delete(self):
+        """Test calling the delete() method."""
+        new_model = BaseModel()
+        key = '{}.{}'.format(new_model.__class__.__name__, new_model.id)
+        storage.delete(new_model)
+        self.assertNotIn(key, storage.all())
+        storage.delete(None)
+
+    def test_save_serializes_dirty_objects_only(self):
+        """Test that save() only calls to_dict() on the modified objects."""
+        models = [BaseModel() for _ in range(3)]
+        storage.save()
+        models[1].name = 'dirty'
+        with patch.object(BaseModel, 'to_dict', autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            storage.save()
+        to_dict.assert_called_once_with(models[1])
+        with open(storage._FileStorage__file_path) as f:
+            key = 'BaseModel.' + models[1].id
+            self.assertEqual(json.load(f)[key]['name'], 'dirty')
+        os.remove(storage._FileStorage__file_path)
+
+    def test_mark_dirty(self):
+        """Test that only stored objects are marked dirty."""
+        new_model = BaseModel()
+        storage.save()
+        copy = BaseModel(**new_model.to_dict())
+        storage.mark_dirty(copy)
+        self.assertNotIn('BaseModel.' + new_model.id,
+                         storage._FileStorage__pending)
+        storage.mark_dirty(new_model)
+        self.assertIn('BaseModel.' + new_model.id,
+                      storage._FileStorage__pending)
+        os.remove(storage._FileStorage__file_path)
+
+
+class TestFileStorageJournal(TestCase):
+    """Test cases for the journal mode of FileStorage"""
+
+    def setUp(self):
+        """Start every test from an empty store."""
+        self.storage = FileStorage(journal=True, compact_threshold=3)
+        self.file_path = storage._FileStorage__file_path
+        self.journal_path = storage._FileStorage__journal_path
+        storage.all().clear()
+        self.storage.compact()
+
+    def tearDown(self):
+        """Remove the files written by the tests."""
+        for path in [self.file_path, self.journal_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_appends_to_journal(self):
+        """Test that save only appends the changes to the journal."""
+        new_model = BaseModel()
+        self.storage.save()
+        with open(self.file_path) as f:
+            self.assertEqual(f.read(), '{}')
+        with open(self.journal_path) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn(new_model.id, lines[0])
+
+    def test_reload_replays_journal(self):
+        """Test that reload applies the journal on top of the snapshot."""
+        kept, deleted = BaseModel(), BaseModel()
+        self.storage.save()
+        kept.name = 'kept'
+        self.storage.new(kept)
+        self.storage.delete(deleted)
+        self.storage.save()
+        storage.all().clear()
+        self.storage.reload()
+        objs = storage.all()
+        self.assertEqual(list(objs.keys()), ['BaseModel.' + kept.id])
+        self.assertEqual(objs['BaseModel.' + kept.id].name, 'kept')
+
+    def test_compaction(self):
+        """Test that the journal is folded into the snapshot."""
+        for _ in range(3):
+            BaseModel()
+            self.storage.save()
+        self.assertFalse(os.path.exists(self.journal_path))
+        storage.all().clear()
+        self.storage.reload()
+        self.assertEqual(len(storage.all()), 3)
+
+    def test_truncated_record(self):
+        """Test that a truncated last record is ignored by reload."""
+        new_model = BaseModel()
+        self.storage.save()
+        with open(self.journal_path, 'a') as f:
+            f.write('{"op": "delete", "ke')
+        storage.all().clear()
+        self.storage.reload()
+        self.assertIn('BaseModel.' + new_model.id, storage.all())
+
+
+class TestFileStorageLazy(TestCase):
+    """Test cases for the lazy mode of FileStorage"""
+
+    def setUp(self):
+        """Reload a few saved objects lazily."""
+        from models.user import User
+        self.storage = FileStorage(lazy=True)
+        self.file_path = storage._FileStorage__file_path
+        storage.all().clear()
+        self.models = [BaseModel(), BaseModel(), User()]
+        self.storage.save()
+        storage._FileStorage__objects.clear()
+        self.storage.reload()
+
+    def tearDown(self):
+        """Remove the file written by the tests."""
+        storage.all().clear()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def test_nothing_built_by_reload(self):
+        """Test that reload and count do not build any object."""
+        self.assertEqual(len(storage._FileStorage__objects), 0)
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(BaseModel), 2)
+        self.assertEqual(len(storage._FileStorage__objects), 0)
+
+    def test_records_not_decoded_by_reload(self):
+        """Test that reload splits the records apart without decoding
+        them."""
+        fmt = type(self.storage.format)
+        with patch.object(fmt, 'read') as read, \
+                patch.object(fmt, 'decode') as decode:
+            self.storage.reload()
+        read.assert_not_called()
+        decode.assert_not_called()
+        self.assertEqual(self.storage.count(), 3)
+        user = self.storage.get('User', self.models[2].id)
+        self.assertEqual(user.to_dict(), self.models[2].to_dict())
+
+    def test_get_builds_one_object(self):
+        """Test that get only builds the object looked up."""
+        user = self.storage.get('User', self.models[2].id)
+        self.assertEqual(user.to_dict(), self.models[2].to_dict())
+        self.assertIs(self.storage.get('User', user.id), user)
+        self.assertEqual(len(storage._FileStorage__objects), 1)
+        self.assertEqual(self.storage.count(), 3)
+
+    def test_all_builds_objects(self):
+        """Test that all builds the objects of a class, or all of them."""
+        self.assertEqual(len(self.storage.all(BaseModel)), 2)
+        self.assertEqual(len(storage._FileStorage__objects), 2)
+        self.assertEqual(len(self.storage.all()), 3)
+
+    def test_save_keeps_objects_not_built(self):
+        """Test that save writes the objects that were not built."""
+        new_model = BaseModel()
+        self.storage.save()
+        with open(self.file_path) as f:
+            objs = json.load(f)
+        self.assertEqual(len(objs), 4)
+        self.assertIn('BaseModel.' + new_model.id, objs)
+        self.assertEqual(len(storage._FileStorage__objects), 1)
+
+
+class TestFileStorageBatch(TestCase):
+    """Test cases for the batches of FileStorage"""
+
+    def setUp(self):
+        """Start every test from a saved store."""
+        from models.place import Place
+        storage.all().clear()
+        self.place = Place()
+        self.place.city_id = 'batch-city'
+        self.other = BaseModel()
+        storage.save()
+
+    def tearDown(self):
+        """Remove the file written by the tests."""
+        storage.all().clear()
+        if os.path.exists(storage._FileStorage__file_path):
+            os.remove(storage._FileStorage__file_path)
+
+    def test_batch_saves_once(self):
+        """Test that the saves of a batch are done once at its end."""
+        with patch.object(FileStorage, '_flush', autospec=True) as flush:
+            with storage.batch():
+                for _ in range(3):
+                    BaseModel().save()
+                with storage.batch():
+                    self.place.save()
+                flush.assert_not_called()
+        flush.assert_called_once_with(storage)
+
+    def test_rollback(self):
+        """Test that the changes of a failed batch are undone."""
+        with self.assertRaises(ValueError):
+            with storage.batch():
+                self.place.city_id = 'other-city'
+                self.place.name = 'renamed'
+                self.place.extra = 'added'
+                new_model = BaseModel()
+                storage.delete(self.other)
+                raise ValueError('failed')
+        self.assertEqual(self.place.city_id, 'batch-city')
+        self.assertEqual(self.place.name, '')
+        self.assertFalse(hasattr(self.place, 'extra'))
+        self.assertNotIn('BaseModel.' + new_model.id, storage.all())
+        self.assertIs(storage.all()['BaseModel.' + self.other.id], self.other)
+        self.assertEqual(storage.find('Place', city_id='batch-city'),
+                         [self.place])
+        self.assertEqual(storage.find('Place', city_id='other-city'), [])
+
+    def test_nested_rollback(self):
+        """Test that a failed inner batch only undoes its own changes."""
+        with storage.batch():
+            self.place.name = 'outer'
+            try:
+                with storage.batch():
+                    self.place.name = 'inner'
+                    raise KeyError('failed')
+            except KeyError:
+                pass
+            self.assertEqual(self.place.name, 'outer')
+        storage.all().clear()
+        storage.reload()
+        self.assertEqual(storage.get('Place', self.place.id).name, 'outer')
+
+
+class TestFileStorageWriteBehind(TestCase):
+    """Test cases for the write-behind mode of FileStorage"""
+
+    def setUp(self):
+        """Start every test from an empty store without any file."""
+        self.file_path = storage._FileStorage__file_path
+        storage.all().clear()
+        storage.flush()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+        self.storage = None
+
+    def tearDown(self):
+        """Stop the flusher thread and remove the file."""
+        if self.storage is not None:
+            self.storage.close()
+        storage.all().clear()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def wait_for_file(self, count):
+        """Wait for the file to hold count objects."""
+        for _ in range(500):
+            if os.path.exists(self.file_path):
+                with open(self.file_path) as f:
+                    if len(json.load(f)) == count:
+                        return
+            time.sleep(0.01)
+        self.fail('the file was not written')
+
+    def test_flush_after(self):
+        """Test that the changes are written after flush_after changes."""
+        self.storage = FileStorage(write_behind=True, flush_interval=60,
+                                   flush_after=3)
+        for _ in range(2):
+            BaseModel()
+            self.storage.save()
+        self.assertFalse(os.path.exists(self.file_path))
+        BaseModel()
+        self.storage.save()
+        self.wait_for_file(3)
+
+    def test_flush_interval(self):
+        """Test that the changes are written after flush_interval."""
+        self.storage = FileStorage(write_behind=True, flush_interval=0.05)
+        BaseModel()
+        self.storage.save()
+        self.wait_for_file(1)
+
+    def test_close(self):
+        """Test that close writes the changes not written yet."""
+        self.storage = FileStorage(write_behind=True, flush_interval=60)
+        BaseModel()
+        self.storage.save()
+        self.storage.close()
+        self.assertIsNone(self.storage._FileStorage__flusher)
+        with open(self.file_path) as f:
+            self.assertEqual(len(json.load(f)), 1)
+
+
+class TestFileStorageSnapshots(TestCase):
+    """Test cases for the snapshots of FileStorage"""
+
+    def setUp(self):
+        """Save the store three times, keeping two snapshots."""
+        self.storage = FileStorage(keep_snapshots=2)
+        self.file_path = storage._FileStorage__file_path
+        storage.all().clear()
+        self.models = []
+        for _ in range(3):
+            self.models.append(BaseModel())
+            self.storage.save()
+
+    def tearDown(self):
+        """Remove the files written by the tests."""
+        storage.all().clear()
+        for suffix in ['', '.1', '.2', '.3', '.corrupt']:
+            if os.path.exists(self.file_path + suffix):
+                os.remove(self.file_path + suffix)
+
+    def count(self, path):
+        """Return the number of objects in the file at path."""
+        with open(path) as f:
+            return len(json.load(f))
+
+    def test_rotation(self):
+        """Test that the previous files are kept as snapshots."""
+        self.assertEqual(self.count(self.file_path), 3)
+        self.assertEqual(self.count(self.file_path + '.1'), 2)
+        self.assertEqual(self.count(self.file_path + '.2'), 1)
+        self.assertFalse(os.path.exists(self.file_path + '.3'))
+        self.assertFalse(os.path.exists(self.file_path + '.tmp'))
+
+    def test_recovery(self):
+        """Test that reload falls back to the newest valid snapshot."""
+        with open(self.file_path, 'w') as f:
+            f.write('{"BaseModel.1": {"__class__": "BaseModel", "id": "1"}, ')
+        storage.all().clear()
+        with patch('sys.stderr', new=StringIO()) as output:
+            self.storage.reload()
+        self.assertEqual(set(storage.all().keys()), {
+            'BaseModel.' + model.id for model in self.models[:2]})
+        self.assertIn('recovered 2 objects from {}.1'.format(self.file_path),
+                      output.getvalue())
+        self.assertTrue(os.path.exists(self.file_path + '.corrupt'))
+        self.storage.save()
+        self.assertEqual(self.count(self.file_path + '.1'), 2)
+
+    def test_recovery_kept(self):
+        """Test that the recovered snapshot replaces the file, so the next
+        reload reads it too."""
+        with open(self.file_path, 'w') as f:
+            f.write('{"BaseModel.1": ')
+        for _ in range(2):
+            storage.all().clear()
+            with patch('sys.stderr', new=StringIO()):
+                self.storage.reload()
+            self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.count(self.file_path), 2)
+        BaseModel()
+        self.storage.save()
+        self.assertEqual(self.count(self.file_path), 3)
+
+    def test_no_valid_snapshot(self):
+        """Test that reload raises when no snapshot is valid."""
+        for suffix in ['', '.1', '.2']:
+            with open(self.file_path + suffix, 'w') as f:
+                f.write('{"BaseModel.1": ')
+        storage.all().clear()
+        with self.assertRaises(ValueError):
+            self.storage.reload()
+        self.assertEqual(len(storage.all()), 0)
+
+
+class TestFileStorageProcesses(TestCase):
+    """Test cases for FileStorage shared by several processes"""
+
+    def setUp(self):
+        """Save a few objects."""
+        self.file_path = storage._FileStorage__file_path
+        storage.all().clear()
+        self.models = [BaseModel(), BaseModel()]
+        storage.save()
+
+    def tearDown(self):
+        """Remove the files written by the tests."""
+        storage.all().clear()
+        for suffix in ['', '.journal']:
+            if os.path.exists(self.file_path + suffix):
+                os.remove(self.file_path + suffix)
+
+    def run_process(self, code, cwd=None, **env):
+        """Run code in another process sharing the file, or using the file
+        of the directory cwd."""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        env = dict(os.environ, PYTHONPATH=root, **env)
+        subprocess.run([sys.executable, '-c', 'from models import storage\n'
+                        'from models.base_model import BaseModel\n' + code],
+                       env=env, check=True, cwd=cwd)
+
+    def test_no_lock_without_changes(self):
+        """Test that the lock file is only created by a write, and that
+        refresh does not lock the file when it did not change."""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.run_process('storage.all()\nstorage.refresh()', cwd=tmp)
+            self.assertEqual(os.listdir(tmp), [])
+            self.run_process('BaseModel().save()\nstorage.refresh()\n',
+                             cwd=tmp)
+            self.assertEqual(sorted(os.listdir(tmp)),
+                             ['file.json', 'file.json.lock'])
+        with patch.object(FileStorage, '_file_lock') as lock:
+            self.assertFalse(storage.refresh())
+        lock.assert_not_called()
+
+    def test_refresh(self):
+        """Test that refresh only builds the objects changed by another
+        process."""
+        kept, deleted = self.models
+        self.assertFalse(storage.refresh())
+        self.run_process(
+            'from models.user import User\n'
+            'User().save()\n'
+            'storage.delete(storage.get("BaseModel", "{}"))\n'
+            'storage.save()'.format(deleted.id))
+        self.assertTrue(storage.refresh())
+        self.assertFalse(storage.refresh())
+        self.assertIs(storage.all()['BaseModel.' + kept.id], kept)
+        self.assertNotIn('BaseModel.' + deleted.id, storage.all())
+        self.assertEqual(storage.count('User'), 1)
+
+    def test_save_merges_changes(self):
+        """Test that a save keeps the objects another process saved."""
+        self.run_process('from models.user import User\nUser().save()')
+        new_model = BaseModel()
+        self.models[0].name = 'changed'
+        storage.save()
+        with open(self.file_path) as f:
+            objs = json.load(f)
+        self.assertEqual(len(objs), 4)
+        self.assertIn('BaseModel.' + new_model.id, objs)
+        self.assertEqual(objs['BaseModel.' + self.models[0].id]['name'],
+                         'changed')
+
+    def test_refresh_journal(self):
+        """Test that refresh reads the records appended to the journal."""
+        kept = self.models[0]
+        self.run_process(
+            'storage.get("BaseModel", "{}").name = "renamed"\n'
+            'storage.save()'.format(self.models[1].id),
+            HBNB_STORAGE_JOURNAL='1')
+        self.assertTrue(os.path.exists(self.file_path + '.journal'))
+        self.assertTrue(storage.refresh())
+        self.assertIs(storage.all()['BaseModel.' + kept.id], kept)
+        self.assertEqual(
+            storage.all()['BaseModel.' + self.models[1].id].name, 'renamed')
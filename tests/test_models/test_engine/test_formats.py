@@ -0,0 +1,242 @@
+#!/usr/bin/python3
+"""Unittest for the file formats of the storage engine."""
+
+from unittest import TestCase
+from datetime import datetime
+from io import BytesIO
+from models import storage
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.engine import formats
+from models.engine.convert import convert
+from models.place import Place
+import json
+import os
+
+
+class TestBinaryFormat(TestCase):
+    """Test cases for BinaryFormat class"""
+
+    def setUp(self):
+        """Create a format and a dict of a place."""
+        self.format = formats.get_format('binary')
+        self.value = {
+            '__class__': 'Place',
+            'id': '0f1e2d3c-4b5a-4968-8776-a5b4c3d2e1f0',
+            'created_at': datetime(2024, 5, 1, 10, 30, 0, 123456),
+            'updated_at': datetime(2024, 5, 2),
+            'name': 'Nile view é', 'number_rooms': 3, 'latitude': 30.04,
+            'big': 1 << 70, 'has_wifi': True,
+            'amenity_ids': ['a', 2, None, [1.5]], 'extra': {'k': False}}
+
+    def test_round_trip(self):
+        """Test that decode returns the dict encoded."""
+        record = self.format.encode_dict(self.value)
+        self.assertEqual(self.format.decode(record), self.value)
+
+    def test_packed_values(self):
+        """Test that UUIDs, dates and class names are packed."""
+        value = {'__class__': 'Place', 'id': self.value['id'],
+                 'created_at': self.value['created_at']}
+        record = self.format.encode_dict(value)
+        self.assertNotIn(b'Place', record)
+        self.assertNotIn(b'0f1e2d3c', record)
+        self.assertLess(len(record), 50)
+
+    def test_iso_dates_and_other_classes(self):
+        """Test that ISO dates are decoded as datetimes and that other
+        classes keep their name."""
+        value = {'__class__': 'Other', 'id': 'not-a-uuid',
+                 'created_at': '2024-05-01T10:30:00'}
+        decoded = self.format.decode(self.format.encode_dict(value))
+        self.assertEqual(decoded['__class__'], 'Other')
+        self.assertEqual(decoded['id'], 'not-a-uuid')
+        self.assertEqual(decoded['created_at'], datetime(2024, 5, 1, 10, 30))
+
+    def test_encode_matches_to_dict(self):
+        """Test that an encoded object decodes to its dict."""
+        place = Place()
+        place.name = 'Home'
+        place.price_by_night = 80
+        decoded = self.format.decode(self.format.encode(place))
+        self.assertEqual(Place(**decoded).to_dict(), place.to_dict())
+
+    def test_read(self):
+        """Test reading a written file, and a truncated one."""
+        record = self.format.encode_dict(self.value)
+        f = BytesIO()
+        self.format.write(f, [('Place.' + self.value['id'], record)])
+        items = list(self.format.read(BytesIO(f.getvalue())))
+        self.assertEqual(items, [('Place.' + self.value['id'], self.value,
+                                  record)])
+        with self.assertRaises(ValueError):
+            list(self.format.read(BytesIO(f.getvalue()[:-1])))
+        with self.assertRaises(ValueError):
+            list(self.format.read(BytesIO(b'{}')))
+
+    def test_split(self):
+        """Test that split finds the key of every record, whatever the
+        kind of its id."""
+        values = [self.value, dict(self.value, __class__='Other', id='a-b'),
+                  {'__class__': 'User', 'name': 'é', 'id': 'é-1'},
+                  {'__class__': 'User', 'id': 12}]
+        records = [self.format.encode_dict(value) for value in values]
+        f = BytesIO()
+        self.format.write(f, [(None, record) for record in records])
+        self.assertEqual(list(self.format.split(BytesIO(f.getvalue()))), [
+            ('{}.{}'.format(value['__class__'], value['id']), record)
+            for value, record in zip(values, records)])
+        with self.assertRaises(ValueError):
+            list(self.format.split(BytesIO(f.getvalue()[:-1])))
+
+    def test_read_journal(self):
+        """Test that reading the journal stops at a truncated entry."""
+        record = self.format.encode_dict(self.value)
+        data = self.format.journal_entry('Place.1', record) + \
+            self.format.journal_entry('Place.2')
+        entries = list(self.format.read_journal(BytesIO(data + b'u\x05')))
+        self.assertEqual(entries, [
+            (len(data) - 10, 'Place.1', self.value, record),
+            (len(data), 'Place.2', None, None)])
+
+
+class TestSnapshotFormat(TestCase):
+    """Test cases for SnapshotFormat and Snapshot classes"""
+
+    def setUp(self):
+        """Write a snapshot of three places and a user."""
+        self.format = formats.get_format('snapshot')
+        self.models = [Place(), Place(), Place(), BaseModel()]
+        self.models[0].name = 'Nile view'
+        self.entries = {'{}.{}'.format(type(m).__name__, m.id):
+                        self.format.encode(m) for m in self.models}
+        f = BytesIO()
+        self.format.write(f, list(self.entries.items()))
+        self.data = f.getvalue()
+
+    def test_read(self):
+        """Test that read yields the objects written, by key."""
+        read = list(self.format.read(BytesIO(self.data)))
+        self.assertEqual([key for key, _, _ in read], sorted(self.entries))
+        for key, value, record in read:
+            self.assertEqual(record, self.entries[key])
+            self.assertEqual(value, self.format.decode(record))
+        self.assertEqual(formats.format_for('file.snap').name, 'snapshot')
+
+    def test_lookups(self):
+        """Test looking objects up and counting them by class."""
+        snapshot = formats.Snapshot(self.data)
+        key = 'Place.' + self.models[0].id
+        self.assertEqual(len(snapshot), 4)
+        self.assertEqual(snapshot.get(key), self.entries[key])
+        self.assertIn(key, snapshot)
+        self.assertIsNone(snapshot.get('Place.missing'))
+        self.assertNotIn('User.' + self.models[0].id, snapshot)
+        self.assertEqual(snapshot.count('Place'), 3)
+        self.assertEqual(snapshot.count('BaseModel'), 1)
+        self.assertEqual(snapshot.count('User'), 0)
+        self.assertEqual(snapshot.count(), 4)
+        self.assertEqual(dict(snapshot.items('Place')), {
+            k: r for k, r in self.entries.items() if k.startswith('Place.')})
+        empty = BytesIO()
+        self.format.write(empty, [])
+        self.assertEqual(formats.Snapshot(empty.getvalue()).count('Place'),
+                         0)
+
+    def test_not_valid(self):
+        """Test that a file which is not a snapshot, or is truncated, is
+        refused."""
+        for data in [b'', b'HBNB\x01', self.data[:40], self.data[:-1]]:
+            with self.assertRaises(ValueError):
+                list(self.format.read(BytesIO(data)))
+
+
+class TestFormats(TestCase):
+    """Test cases for the format lookup and the convert function"""
+
+    def tearDown(self):
+        """Remove the files written by the tests."""
+        for path in ['formats.json', 'formats.bin', 'formats2.json',
+                     'formats.bin.journal']:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_format_for(self):
+        """Test that the format is picked by extension."""
+        self.assertEqual(formats.format_for('file.json').name, 'json')
+        self.assertEqual(formats.format_for('a/file.BIN').name, 'binary')
+        self.assertEqual(formats.format_for('file.hbnb').name, 'binary')
+        self.assertEqual(formats.format_for('file').name, 'json')
+        with self.assertRaises(ValueError):
+            formats.get_format('xml')
+
+    def test_convert(self):
+        """Test converting a JSON file to binary and back."""
+        json_format = formats.get_format('json')
+        models = [BaseModel(), Place()]
+        models[1].amenity_ids = ['a', 'b']
+        with open('formats.json', 'w') as f:
+            json_format.write(f, [
+                ('{}.{}'.format(type(m).__name__, m.id),
+                 json_format.encode(m)) for m in models])
+        self.assertEqual(convert('formats.json', 'formats.bin'), 2)
+        self.assertEqual(convert('formats.bin', 'formats2.json'), 2)
+        with open('formats.json') as f, open('formats2.json') as f2:
+            self.assertEqual(f.read(), f2.read())
+
+    def test_convert_journal(self):
+        """Test that the changes of the journal are converted."""
+        binary = formats.get_format('binary')
+        kept, changed, deleted, created = [Place() for _ in range(4)]
+        with open('formats.bin', 'wb') as f:
+            binary.write(f, [('Place.' + p.id, binary.encode(p))
+                             for p in [kept, changed, deleted]])
+        changed.name = 'changed'
+        with open('formats.bin.journal', 'wb') as f:
+            for place in [changed, created]:
+                f.write(binary.journal_entry('Place.' + place.id,
+                                             binary.encode(place)))
+            f.write(binary.journal_entry('Place.' + deleted.id))
+        self.assertEqual(convert('formats.bin', 'formats.json'), 3)
+        with open('formats.json') as f:
+            objs = json.load(f)
+        self.assertEqual(objs, {'Place.' + p.id: p.to_dict()
+                                for p in [kept, changed, created]})
+
+
+class TestFileStorageBinary(TestCase):
+    """Test cases for FileStorage with a binary file"""
+
+    def setUp(self):
+        """Use a binary file."""
+        self.file_path = storage._FileStorage__file_path
+        self.journal_path = storage._FileStorage__journal_path
+        storage.all().clear()
+
+    def tearDown(self):
+        """Restore the JSON file and remove the binary ones."""
+        storage.all().clear()
+        FileStorage._FileStorage__file_path = self.file_path
+        FileStorage._FileStorage__journal_path = self.journal_path
+        for path in ['file.bin', 'file.bin.journal']:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_reload(self):
+        """Test that objects are saved to and reloaded from the binary
+        file, journal included."""
+        binary = FileStorage(journal=True, file_path='file.bin')
+        self.assertEqual(binary.format.name, 'binary')
+        kept, deleted = Place(), BaseModel()
+        kept.name = 'kept'
+        binary.compact()
+        with open('file.bin', 'rb') as f:
+            self.assertEqual(f.read(5), b'HBNB\x01')
+        kept.max_guest = 4
+        binary.delete(deleted)
+        binary.save()
+        storage.all().clear()
+        binary.reload()
+        self.assertEqual(list(storage.all().keys()), ['Place.' + kept.id])
+        self.assertEqual(storage.all()['Place.' + kept.id].to_dict(),
+                         kept.to_dict())
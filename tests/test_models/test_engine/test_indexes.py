@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Unittest for the attribute indexes."""
+
+from unittest import TestCase
+from models.engine.indexes import AttributeIndex
+from models.engine.object_map import ObjectMap
+from models.place import Place
+
+
+class TestAttributeIndex(TestCase):
+    """Test cases for AttributeIndex class"""
+
+    def setUp(self):
+        """Index a map of places by city_id."""
+        self.objs = ObjectMap()
+        self.index = AttributeIndex('city_id')
+        self.objs.add_listener(self.index, 'Place')
+        self.place = Place(id='1', city_id='c1')
+        self.objs['Place.1'] = self.place
+
+    def test_lookup(self):
+        """Test looking objects up by value."""
+        self.assertEqual(self.index.lookup('c1'), {'Place.1': self.place})
+        self.assertEqual(self.index.lookup('c2'), {})
+        with self.assertRaises(TypeError):
+            self.index.lookup([])
+
+    def test_existing_objects_are_indexed(self):
+        """Test that objects stored before the index was added are in it."""
+        index = AttributeIndex('city_id')
+        self.objs.add_listener(index, 'Place')
+        self.assertEqual(index.lookup('c1'), {'Place.1': self.place})
+
+    def test_changed(self):
+        """Test moving an object when its attribute changes."""
+        self.place.city_id = 'c2'
+        self.objs.changed('Place.1', 'city_id', 'c1')
+        self.assertEqual(self.index.lookup('c1'), {})
+        self.assertEqual(self.index.lookup('c2'), {'Place.1': self.place})
+
+    def test_remove_and_clear(self):
+        """Test removing objects from the index."""
+        del self.objs['Place.1']
+        self.assertEqual(self.index.values, {})
+        self.objs['Place.1'] = self.place
+        self.objs.clear()
+        self.assertEqual(self.index.values, {})
+
+    def test_unhashable_value(self):
+        """Test that unhashable values are not indexed."""
+        self.objs['Place.2'] = Place(id='2', city_id=['c1'])
+        self.assertEqual(self.index.lookup('c1'), {'Place.1': self.place})
+        del self.objs['Place.2']
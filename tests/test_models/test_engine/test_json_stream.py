@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""Unittest for the streaming JSON reader."""
+
+from unittest import TestCase
+from io import StringIO
+from unittest.mock import patch
+from models.engine.json_stream import iter_json_object, iter_json_texts
+import json
+
+
+class TestIterJsonObject(TestCase):
+    """Test cases for iter_json_object function"""
+
+    def read(self, text, chunk_size=4):
+        """Return the list of items read from text."""
+        return list(iter_json_object(StringIO(text), chunk_size))
+
+    def test_empty_object(self):
+        """Test reading an empty object."""
+        self.assertEqual(self.read('{}'), [])
+        self.assertEqual(self.read(' \n{ \n} '), [])
+
+    def test_pairs_across_chunks(self):
+        """Test reading values split between chunks."""
+        data = {'User.1': {'id': '1', 'name': 'a, "b" }'},
+                'Place.2': {'number_rooms': 12345, 'amenity_ids': [1, 2]}}
+        for chunk_size in [1, 3, 7, 1 << 16]:
+            items = self.read(json.dumps(data, indent=2), chunk_size)
+            self.assertEqual([key for key, _, _ in items], list(data.keys()))
+            for key, value, text in items:
+                self.assertEqual(value, data[key])
+                self.assertEqual(json.loads(text), data[key])
+
+    def test_number_at_chunk_boundary(self):
+        """Test that a number is not cut at the end of a chunk."""
+        self.assertEqual(self.read('{"a": 123456}', 8),
+                         [('a', 123456, '123456')])
+
+    def test_invalid_json(self):
+        """Test that invalid files raise JSONDecodeError."""
+        for text in ['', '[]', '{"a" 1}', '{"a": 1', '{"a": 1,}', '{1: 2}']:
+            with self.assertRaises(json.JSONDecodeError):
+                self.read(text)
+
+
+class TestIterJsonTexts(TestCase):
+    """Test cases for iter_json_texts function"""
+
+    def test_texts_across_chunks(self):
+        """Test that the texts of the values are split apart, the nested
+        objects included."""
+        data = {'User.1': {'id': '1', 'name': 'a, "b\\" {}'},
+                'Place.2': {'amenity_ids': [1, [2]], 'extra': {'k': {}}},
+                'City.3': {}}
+        text = json.dumps(data, indent=2)
+        for chunk_size in [1, 3, 7, 1 << 16]:
+            items = list(iter_json_texts(StringIO(text), chunk_size))
+            self.assertEqual([key for key, _ in items], list(data.keys()))
+            for key, value in items:
+                self.assertEqual(json.loads(value), data[key])
+
+    def test_not_decoded(self):
+        """Test that the objects holding no other object are not
+        decoded."""
+        with patch.object(json.JSONDecoder, 'raw_decode') as raw_decode:
+            items = list(iter_json_texts(StringIO('{"a": {"b": [1]}}')))
+        raw_decode.assert_not_called()
+        self.assertEqual(items, [('a', '{"b": [1]}')])
+
+    def test_invalid_json(self):
+        """Test that invalid files raise JSONDecodeError."""
+        for text in ['', '{"a": {"b": 1}', '{"a": {"b": "}', '{"a": 1,}']:
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_texts(StringIO(text), 4))
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""Unittest for ObjectMap."""
+
+from unittest import TestCase
+from models.engine.object_map import ObjectMap
+
+
+class TestObjectMap(TestCase):
+    """Test cases for ObjectMap class"""
+
+    def setUp(self):
+        """Fill a map with objects of two classes."""
+        self.objs = ObjectMap({'User.1': 'u1', 'User.2': 'u2',
+                               'UserProfile.1': 'p1'})
+
+    def test_class_index(self):
+        """Test that objects are indexed by their exact class name."""
+        self.assertEqual(self.objs.by_class['User'],
+                         {'User.1': 'u1', 'User.2': 'u2'})
+        self.assertEqual(self.objs.by_class['UserProfile'],
+                         {'UserProfile.1': 'p1'})
+
+    def test_count(self):
+        """Test counting all objects or the objects of a class."""
+        self.assertEqual(self.objs.count(), 3)
+        self.assertEqual(self.objs.count('User'), 2)
+        self.assertEqual(self.objs.count('Place'), 0)
+
+    def test_removal(self):
+        """Test that every way of removing objects updates the index."""
+        del self.objs['User.1']
+        self.assertEqual(self.objs.pop('User.2'), 'u2')
+        self.assertIsNone(self.objs.pop('User.3', None))
+        self.assertNotIn('User', self.objs.by_class)
+        self.objs.popitem()
+        self.assertEqual(self.objs.by_class, {})
+        self.objs['State.1'] = 's1'
+        self.objs.clear()
+        self.assertEqual(self.objs.count('State'), 0)
+
+    def test_replace(self):
+        """Test replacing the object stored under a key."""
+        self.objs['User.1'] = 'new'
+        self.assertEqual(self.objs.count('User'), 2)
+        self.assertEqual(self.objs.by_class['User']['User.1'], 'new')
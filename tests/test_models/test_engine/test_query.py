@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+"""Unittest for Query."""
+
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+from models import storage
+from models.engine import columnar
+from models.place import Place
+
+
+class TestQuery(TestCase):
+    """Test cases for Query class"""
+
+    def setUp(self):
+        """Store ten places."""
+        storage.all().clear()
+        self.places = []
+        for i in range(10):
+            place = Place()
+            place.name = 'place {}'.format(i)
+            place.price_by_night = i * 20
+            place.max_guest = i % 5
+            place.city_id = 'city {}'.format(i % 2)
+            self.places.append(place)
+
+    def tearDown(self):
+        """Remove the places."""
+        storage.all().clear()
+
+    def test_where(self):
+        """Test that only the objects matching all the conditions are
+        yielded."""
+        query = storage.query(Place).where('price_by_night', '<', 100) \
+            .where('max_guest', '>=', 2)
+        self.assertEqual(list(query), self.places[2:5])
+        query = storage.query(Place).where('max_guest', '!=', 0) \
+            .where('name', '>', 'place 7')
+        self.assertEqual(list(query), self.places[8:10])
+        with self.assertRaises(ValueError):
+            storage.query(Place).where('name', '=', 'place 1')
+
+    def test_where_uses_find(self):
+        """Test that the equality conditions are looked up by iter_find."""
+        with patch.object(storage, 'iter_find',
+                          wraps=storage.iter_find) as find:
+            query = storage.query(Place).where('city_id', '==', 'city 1') \
+                .where('max_guest', '<', 3)
+            self.assertEqual(list(query), [self.places[1], self.places[5],
+                                           self.places[7]])
+        find.assert_called_once_with('Place', city_id='city 1')
+
+    def test_missing_and_mistyped_attributes(self):
+        """Test that an object missing the attribute, or holding a value
+        not comparable, does not match."""
+        self.places[0].price_by_night = 'free'
+        query = storage.query(Place).where('price_by_night', '<', 30)
+        self.assertEqual(list(query), [self.places[1]])
+        self.places[3].rating = 2
+        self.places[4].rating = 1
+        query = storage.query(Place).where('rating', '>', 0)
+        self.assertEqual(list(query), self.places[3:5])
+        query = storage.query(Place).order_by('rating').limit(3)
+        self.assertEqual(list(query), [self.places[4], self.places[3],
+                                       self.places[0]])
+        query = storage.query(Place).order_by('rating', True)
+        self.assertEqual(list(query)[:3], [self.places[3], self.places[4],
+                                           self.places[0]])
+
+    def test_order_offset_limit(self):
+        """Test sorting and paginating the objects."""
+        query = storage.query(Place).order_by('price_by_night', True)
+        self.assertEqual(list(query), self.places[::-1])
+        query.offset(2).limit(3)
+        self.assertEqual(list(query), self.places[7:4:-1])
+        query = storage.query(Place).offset(8)
+        self.assertEqual(list(query), self.places[8:])
+        query = storage.query(Place).order_by('max_guest').limit(4)
+        self.assertEqual(list(query), [self.places[0], self.places[5],
+                                       self.places[1], self.places[6]])
+
+    def test_limit_is_lazy(self):
+        """Test that the candidates are only matched until the limit is
+        reached."""
+        query = storage.query(Place).where('max_guest', '>=', 0).limit(2)
+        with patch.object(query, 'matches', wraps=query.matches) as matches:
+            self.assertEqual(list(query), self.places[:2])
+        self.assertEqual(matches.call_count, 2)
+
+    def test_select(self):
+        """Test the values of the selected attributes."""
+        query = storage.query(Place).select('name', 'number_rooms')
+        self.assertEqual(query.values(self.places[3]),
+                         {'name': 'place 3', 'number_rooms': 0})
+        query = storage.query(Place)
+        self.assertEqual(query.values(self.places[3]),
+                         self.places[3].to_dict())
+
+    @skipIf(columnar.numpy is None, 'numpy is not installed')
+    def test_ranges_use_columns(self):
+        """Test that the ranges are looked up in the ColumnStore of the
+        class when it exists."""
+        store = storage.columns(Place)
+        with patch.object(store, 'mask', wraps=store.mask) as mask:
+            query = storage.query(Place).where('price_by_night', '>', 100) \
+                .where('price_by_night', '<=', 160)
+            self.assertEqual(list(query), self.places[6:9])
+        mask.assert_called_once_with(price_by_night=(100, 160))
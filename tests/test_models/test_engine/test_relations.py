@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+"""Unittest for the relationships between the model classes."""
+
+from unittest import TestCase
+from unittest.mock import patch
+from models import storage
+from models.base_model import BaseModel
+from models.city import City
+from models.compact import compact_class
+from models.engine.relations import CASCADE, RESTRICT, Relationship
+from models.engine.relations import relationships
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+class TestRelationships(TestCase):
+    """Test cases for Relationship class"""
+
+    def setUp(self):
+        """Store a state, a city, a user, two places and three reviews."""
+        storage.all().clear()
+        self.state = State()
+        self.city = City()
+        self.city.state_id = self.state.id
+        self.user = User()
+        self.places = [Place(), Place()]
+        for place in self.places:
+            place.city_id = self.city.id
+            place.user_id = self.user.id
+        self.reviews = [Review() for _ in range(3)]
+        for review, place in zip(self.reviews, self.places * 2):
+            review.place_id = place.id
+            review.user_id = self.user.id
+
+    def tearDown(self):
+        """Remove the objects."""
+        storage.all().clear()
+
+    def test_accessors(self):
+        """Test that the related objects are looked up by the foreign
+        key."""
+        self.assertEqual(self.places[0].reviews,
+                         [self.reviews[0], self.reviews[2]])
+        self.assertEqual(self.user.places, self.places)
+        self.assertEqual(self.user.reviews, self.reviews)
+        self.assertEqual(self.city.places, self.places)
+        self.assertEqual(self.state.cities, [self.city])
+        self.reviews[0].place_id = self.places[1].id
+        self.assertEqual(self.places[0].reviews, [self.reviews[2]])
+        self.assertEqual(len(self.places[1].reviews), 2)
+
+    def test_accessors_use_index(self):
+        """Test that the related objects are looked up by find."""
+        with patch.object(storage, 'find', wraps=storage.find) as find:
+            self.places[1].reviews
+        find.assert_called_once_with('Review', place_id=self.places[1].id)
+
+    def test_no_cascade_by_default(self):
+        """Test that deleting an object leaves its related objects as they
+        are, unless asked otherwise."""
+        storage.delete(self.city)
+        storage.delete(self.user)
+        self.assertEqual(storage.count(), 6)
+        with self.assertRaises(ValueError):
+            storage.delete(self.state, on_delete='set null')
+        self.assertIs(storage.get(State, self.state.id), self.state)
+
+    def test_cascade(self):
+        """Test that deleting a user deletes its places and reviews, and
+        deleting a place its reviews."""
+        storage.delete(self.places[0], on_delete=CASCADE)
+        self.assertEqual(storage.count(Review), 1)
+        storage.delete(self.user, on_delete=CASCADE)
+        self.assertEqual(storage.count(User), 0)
+        self.assertEqual(storage.count(Place), 0)
+        self.assertEqual(storage.count(Review), 0)
+        self.assertEqual(storage.count(City), 1)
+
+    def test_restrict(self):
+        """Test that a city with places, or a state with cities, is not
+        deleted."""
+        with self.assertRaises(ValueError):
+            storage.delete(self.city, on_delete=RESTRICT)
+        with self.assertRaises(ValueError):
+            storage.delete(self.state, on_delete=RESTRICT)
+        self.assertEqual(storage.count(), 8)
+        storage.delete(self.user, on_delete=CASCADE)
+        storage.delete(self.city, on_delete=RESTRICT)
+        storage.delete(self.state, on_delete=RESTRICT)
+        self.assertEqual(storage.count(), 0)
+
+    def test_restrict_through_cascade(self):
+        """Test that nothing is deleted when an object the deletion
+        cascades to is restricted, the relationship declaring its on_delete
+        taking precedence."""
+        class Owner(BaseModel):
+            """A class deleting its cities along with it."""
+            cities = Relationship('City', 'name', CASCADE)
+
+        owner = Owner()
+        self.city.name = owner.id
+        with self.assertRaises(ValueError):
+            storage.delete(owner, on_delete=RESTRICT)
+        self.assertIs(storage.get(Owner, owner.id), owner)
+        self.assertEqual(storage.count(City), 1)
+
+    def test_batch_rollback(self):
+        """Test that a batch failing on a restricted deletion undoes the
+        cascaded ones."""
+        with self.assertRaises(ValueError):
+            with storage.batch():
+                storage.delete(self.places[0], on_delete=CASCADE)
+                storage.delete(self.city, on_delete=RESTRICT)
+        self.assertEqual(storage.count(Place), 2)
+        self.assertEqual(storage.count(Review), 3)
+
+    def test_compact_classes(self):
+        """Test that the compact classes keep the relationships."""
+        compact = compact_class(Place)
+        self.assertEqual(relationships(compact), relationships(Place))
+        self.assertNotIn('reviews', compact.__slots__)
+        place = compact(**self.places[1].to_dict())
+        self.assertEqual(place.reviews, [self.reviews[1]])
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""Unittest for ShardedStorage."""
+
+from unittest import TestCase
+from models import storage
+from models.base_model import BaseModel
+from models.engine.sharded_storage import ShardedStorage
+from models.place import Place
+from models.user import User
+import json
+import os
+import shutil
+
+
+class TestShardedStorage(TestCase):
+    """Test cases for ShardedStorage class"""
+
+    directory = 'test_hbnb_storage'
+
+    def setUp(self):
+        """Start every test from an empty directory."""
+        storage.all().clear()
+        self.storage = ShardedStorage(self.directory)
+        self.storage.reload()
+
+    def tearDown(self):
+        """Remove the directory."""
+        self.storage.close()
+        storage.all().clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_save_reload(self):
+        """Test that the objects are saved to a shard per class and
+        reloaded."""
+        place, user = Place(), User()
+        place.name = 'Home'
+        self.storage.save()
+        self.assertEqual(self.storage.shards(), ['Place', 'User'])
+        storage.all().clear()
+        self.storage = ShardedStorage(self.directory)
+        self.storage.reload()
+        self.assertEqual(self.storage.get(Place, place.id).to_dict(),
+                         place.to_dict())
+        self.assertEqual(self.storage.get(User, user.id).to_dict(),
+                         user.to_dict())
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_save_writes_dirty_shards(self):
+        """Test that save only writes the shards of the changed objects."""
+        place = Place()
+        User()
+        self.storage.save()
+        user_stat = os.stat(self.storage.shard_path('User'))
+        place_stat = os.stat(self.storage.shard_path('Place'))
+        place.name = 'changed'
+        self.storage.save()
+        self.assertEqual(os.stat(self.storage.shard_path('User')).st_ino,
+                         user_stat.st_ino)
+        self.assertNotEqual(os.stat(self.storage.shard_path('Place')).st_ino,
+                            place_stat.st_ino)
+
+    def test_load_on_demand(self):
+        """Test that a shard is only read when its class is used."""
+        place, user = Place(), User()
+        self.storage.save()
+        storage.all().clear()
+        self.storage = ShardedStorage(self.directory)
+        self.storage.reload()
+        self.assertIsNotNone(self.storage.get(User, user.id))
+        self.assertEqual(list(storage._FileStorage__objects.keys()),
+                         ['User.' + user.id])
+        self.assertEqual(list(self.storage._ShardedStorage__loaded.keys()),
+                         ['User'])
+        self.assertIn('Place.' + place.id, self.storage.all())
+
+    def test_lazy_count(self):
+        """Test counting the objects of a shard in lazy mode."""
+        models = [BaseModel() for _ in range(3)]
+        self.storage.save()
+        storage.all().clear()
+        self.storage = ShardedStorage(self.directory, lazy=True)
+        self.storage.reload()
+        self.assertEqual(self.storage.count(BaseModel), 3)
+        self.assertEqual(len(storage._FileStorage__objects), 0)
+        self.assertEqual(self.storage.get(BaseModel, models[0].id).id,
+                         models[0].id)
+
+    def test_refresh(self):
+        """Test that refresh applies the changes written by another
+        process to a shard."""
+        kept, changed = BaseModel(), BaseModel()
+        self.storage.save()
+        self.assertFalse(self.storage.refresh())
+        changed_dict = changed.to_dict()
+        changed_dict['name'] = 'changed'
+        with open(self.storage.shard_path('BaseModel'), 'w') as f:
+            json.dump({'BaseModel.' + kept.id: kept.to_dict(),
+                       'BaseModel.' + changed.id: changed_dict}, f)
+        self.assertTrue(self.storage.refresh())
+        self.assertIs(self.storage.get(BaseModel, kept.id), kept)
+        self.assertEqual(self.storage.get(BaseModel, changed.id).name,
+                         'changed')
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""Unittest for SnapshotStorage."""
+
+from unittest import TestCase
+from unittest.mock import patch
+from models import storage
+from models.engine.formats import get_format
+from models.engine.snapshot_storage import ReadOnlyStorageError
+from models.engine.snapshot_storage import SnapshotStorage
+from models.place import Place
+from models.user import User
+import os
+
+
+class TestSnapshotStorage(TestCase):
+    """Test cases for SnapshotStorage class"""
+
+    file_path = 'test_hbnb.snap'
+
+    def setUp(self):
+        """Write a snapshot of four places and two users, and read it with
+        the storage tested."""
+        storage.all().clear()
+        self.places = [Place() for _ in range(4)]
+        self.places[0].name = 'Home'
+        self.users = [User() for _ in range(2)]
+        self.write()
+        self.storage = SnapshotStorage(self.file_path)
+        self.storage.reload()
+        for target in ['models.storage', 'models.base_model.storage']:
+            patcher = patch(target, self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Remove the snapshot file."""
+        self.storage.close()
+        storage.all().clear()
+        storage._pending_keys().clear()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def write(self):
+        """Write the objects in memory to the snapshot file, as another
+        process would, and forget them."""
+        fmt = get_format('snapshot')
+        with open(self.file_path + '.tmp', 'wb') as f:
+            fmt.write(f, [(key, fmt.encode(obj))
+                          for key, obj in storage.all().items()])
+        os.replace(self.file_path + '.tmp', self.file_path)
+        storage.all().clear()
+        storage._pending_keys().clear()
+
+    def test_lazy(self):
+        """Test that the objects are built on their first lookup only, and
+        counted without being built."""
+        self.assertEqual(len(storage.all()), 0)
+        self.assertEqual(self.storage.count(), 6)
+        self.assertEqual(self.storage.count(Place), 4)
+        self.assertEqual(self.storage.count('User'), 2)
+        place = self.storage.get(Place, self.places[0].id)
+        self.assertEqual(place.to_dict(), self.places[0].to_dict())
+        self.assertIs(self.storage.get(Place, place.id), place)
+        self.assertIsNone(self.storage.get(Place, self.users[0].id))
+        self.assertEqual(len(storage.all()), 1)
+
+    def test_all_and_find(self):
+        """Test that all() and find() build the objects of their class."""
+        self.assertEqual(sorted(self.storage.all(Place)), sorted(
+            'Place.' + place.id for place in self.places))
+        self.assertEqual(len(storage.all()), 4)
+        self.assertEqual([place.id for place in self.storage.find(
+            Place, name='Home')], [self.places[0].id])
+        self.assertEqual(len(self.storage.all()), 6)
+
+    def test_read_only(self):
+        """Test that the objects change in memory only, and that they
+        can't be saved."""
+        self.storage.delete(self.storage.get(Place, self.places[0].id))
+        user = User()
+        self.assertIsNone(self.storage.get(Place, self.places[0].id))
+        self.assertEqual(self.storage.count(Place), 3)
+        self.assertEqual(self.storage.count(User), 3)
+        self.assertEqual(len(self.storage.all(Place)), 3)
+        self.assertIs(self.storage.get(User, user.id), user)
+        with self.assertRaises(ReadOnlyStorageError):
+            user.save()
+        with self.assertRaises(ReadOnlyStorageError):
+            self.storage.compact()
+        with self.assertRaises(PermissionError):
+            self.storage.save()
+
+    def test_refresh(self):
+        """Test that the file is mapped again once it's replaced."""
+        place = self.storage.get(Place, self.places[1].id)
+        self.assertFalse(self.storage.refresh())
+        place.name = 'Other'
+        user = User()
+        # the new file only has the objects in memory
+        self.write()
+        self.assertTrue(self.storage.refresh())
+        self.assertEqual(len(storage.all()), 0)
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.get(Place, place.id).name, 'Other')
+        self.assertIsNotNone(self.storage.get(User, user.id))
+
+    def test_indexes_after_refresh(self):
+        """Test that the indexes and the materialized aggregates built
+        before the file is mapped again find the objects of the new one."""
+        self.assertEqual(len(self.storage.search(Place, 'home')), 1)
+        self.assertEqual(self.storage.aggregate(Place, materialize=True),
+                         {'count': 4})
+        place = Place()
+        place.name = 'Home'
+        self.write()
+        self.assertTrue(self.storage.refresh())
+        self.assertEqual(len(self.storage.search(Place, 'home')), 2)
+        self.assertEqual(self.storage.aggregate(Place, materialize=True),
+                         {'count': 5})
+
+    def test_missing_file(self):
+        """Test that there are no objects without a file."""
+        self.storage.close()
+        os.remove(self.file_path)
+        self.storage.reload()
+        self.assertEqual(self.storage.count(), 0)
+        self.assertIsNone(self.storage.get(Place, self.places[0].id))
+        self.assertEqual(self.storage.all(Place), {})
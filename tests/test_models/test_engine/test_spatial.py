@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""Unittest for the spatial index."""
+
+from unittest import TestCase
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.object_map import ObjectMap
+from models.engine.spatial import GridIndex, distance_km
+from models.place import Place
+import os
+
+
+class TestDistance(TestCase):
+    """Test cases for distance_km function"""
+
+    def test_distance(self):
+        """Test known distances."""
+        self.assertAlmostEqual(distance_km(0, 0, 0, 1), 111.195, places=2)
+        self.assertEqual(distance_km(30, 31, 30, 31), 0)
+        self.assertAlmostEqual(distance_km(0, 179.5, 0, -179.5),
+                               distance_km(0, 0, 0, 1))
+
+
+class TestGridIndex(TestCase):
+    """Test cases for GridIndex class"""
+
+    def setUp(self):
+        """Index a few places."""
+        self.objs = ObjectMap()
+        self.index = GridIndex(cell_size=1)
+        self.objs.add_listener(self.index, 'Place')
+        self.places = {}
+        for name, lat, lon in [('cairo', 30.04, 31.24), ('giza', 30.01, 31.21),
+                               ('alex', 31.2, 29.92), ('fiji', -17.7, 179.9),
+                               ('samoa', -13.8, -171.8)]:
+            place = Place(id=name, latitude=lat, longitude=lon)
+            self.objs['Place.' + name] = place
+            self.places[name] = place
+
+    def names(self, objs):
+        """Return the sorted ids of objs."""
+        return sorted(obj.id for obj in objs)
+
+    def test_bbox(self):
+        """Test bounding box queries."""
+        self.assertEqual(self.names(self.index.bbox(29, 30, 31, 32)),
+                         ['cairo', 'giza'])
+        self.assertEqual(self.names(self.index.bbox(-90, -180, 90, 180)),
+                         sorted(self.places))
+        self.assertEqual(self.names(self.index.bbox(-20, 170, -10, -170)),
+                         ['fiji', 'samoa'])
+
+    def test_nearest(self):
+        """Test radius queries."""
+        found = self.index.nearest(30.04, 31.24, 10)
+        self.assertEqual([obj.id for _, obj in found], ['cairo', 'giza'])
+        self.assertEqual(found[0][0], 0)
+        self.assertEqual(len(self.index.nearest(30, 31, 250)), 3)
+        self.assertEqual(len(self.index.nearest(30, 31, 250, limit=1)), 1)
+        self.assertEqual(len(self.index.nearest(0, 0, 30000)), 5)
+
+    def test_update_and_delete(self):
+        """Test that the index follows the changes of the objects."""
+        cairo = self.places['cairo']
+        cairo.latitude = 31.2
+        self.objs.changed('Place.cairo', 'latitude', 30.04)
+        self.assertEqual(self.names(self.index.bbox(29, 30, 31, 32)),
+                         ['giza'])
+        del self.objs['Place.giza']
+        self.assertEqual(self.index.bbox(29, 30, 31, 32), [])
+        cairo.longitude = 'unknown'
+        self.objs.changed('Place.cairo', 'longitude', 31.24)
+        self.assertEqual(len(self.index), 3)
+
+    def test_storage_spatial(self):
+        """Test the GridIndex of the storage engine."""
+        place = Place()
+        place.latitude, place.longitude = 89.9, 10.0
+        index = storage.spatial(Place)
+        self.assertIs(storage.spatial('Place'), index)
+        self.assertIn(place, [obj for _, obj in index.nearest(89.9, 10, 1)])
+        storage.delete(place)
+        self.assertEqual(index.nearest(89.9, 10, 1), [])
+
+    def test_storage_spatial_lazy(self):
+        """Test that the GridIndex finds the objects reloaded lazily."""
+        storage.all().clear()
+        self.addCleanup(storage.all().clear)
+        self.addCleanup(os.remove, storage._FileStorage__file_path)
+        lazy = FileStorage(lazy=True)
+        place = Place()
+        place.latitude, place.longitude = 89.9, 10.0
+        lazy.save()
+        index = lazy.spatial(Place)
+        lazy.reload()
+        self.assertIs(lazy.spatial(Place), index)
+        self.assertEqual([obj.id for _, obj in index.nearest(89.9, 10, 1)],
+                         [place.id])
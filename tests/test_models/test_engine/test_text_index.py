@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+"""Unittest for TextIndex."""
+
+from unittest import TestCase
+from models import storage
+from models.city import City
+from models.engine.file_storage import FileStorage
+from models.engine.text_index import TextIndex, tokenize
+from models.place import Place
+from models.review import Review
+import os
+
+
+class TestTextIndex(TestCase):
+    """Test cases for TextIndex class"""
+
+    def setUp(self):
+        """Store four places."""
+        storage.all().clear()
+        texts = [('Garden flat', 'A quiet flat with a garden'),
+                 ('Loft', 'Bright loft in the city centre'),
+                 ('Garden house', 'A house, garden and pool, garden view'),
+                 ('Studio', 'Small studio near the station')]
+        self.places = []
+        for name, description in texts:
+            place = Place()
+            place.name = name
+            place.description = description
+            self.places.append(place)
+
+    def tearDown(self):
+        """Remove the places."""
+        storage.all().clear()
+
+    def objects(self, found):
+        """Return the objects of the (score, object) pairs found."""
+        return [obj for _, obj in found]
+
+    def test_tokenize(self):
+        """Test that the words are lowercased without the stop words."""
+        self.assertEqual(tokenize("The Café's garden, and 2 pools!"),
+                         ['café', 's', 'garden', '2', 'pools'])
+
+    def test_search(self):
+        """Test that the objects having the words are ranked by BM25."""
+        found = storage.search(Place, 'garden')
+        self.assertEqual(self.objects(found),
+                         [self.places[2], self.places[0]])
+        self.assertGreater(found[0][0], found[1][0])
+        found = storage.search(Place, 'quiet STATION')
+        self.assertEqual(set(self.objects(found)),
+                         {self.places[0], self.places[3]})
+        self.assertEqual(storage.search(Place, 'garden', limit=1),
+                         storage.search(Place, 'garden')[:1])
+        self.assertEqual(storage.search(Place, 'the'), [])
+        self.assertEqual(storage.search(Place, 'castle'), [])
+
+    def test_rare_words_rank_higher(self):
+        """Test that a word in fewer objects counts more."""
+        found = storage.search(Place, 'garden loft')
+        self.assertIs(found[0][1], self.places[1])
+
+    def test_incremental(self):
+        """Test that the index follows the objects created, updated and
+        deleted."""
+        storage.search(Place, 'garden')
+        self.places[2].description = 'A house with a pool'
+        self.places[2].name = 'House'
+        self.places[1].description = 'Loft over a roof garden'
+        self.assertEqual(self.objects(storage.search(Place, 'garden')),
+                         [self.places[0], self.places[1]])
+        storage.delete(self.places[0])
+        place = Place()
+        place.name = 'Garden cottage'
+        self.assertEqual(set(self.objects(storage.search(Place, 'garden'))),
+                         {self.places[1], place})
+        self.assertEqual(self.objects(storage.search(Place, 'pool')),
+                         [self.places[2]])
+
+    def test_batch_rollback(self):
+        """Test that the index follows the changes undone by a batch."""
+        storage.search(Place, 'garden')
+        with self.assertRaises(RuntimeError):
+            with storage.batch():
+                self.places[1].name = 'Garden loft'
+                storage.delete(self.places[0])
+                raise RuntimeError
+        self.assertEqual(self.objects(storage.search(Place, 'garden')),
+                         [self.places[2], self.places[0]])
+
+    def test_text_attrs(self):
+        """Test the text attributes searched, and the classes without
+        any."""
+        review = Review()
+        review.text = 'Lovely garden'
+        self.assertEqual(self.objects(storage.search(Review, 'garden')),
+                         [review])
+        with self.assertRaises(ValueError):
+            storage.search(City, 'garden')
+
+    def test_storage_search_lazy(self):
+        """Test that the TextIndex finds the objects reloaded lazily."""
+        self.addCleanup(os.remove, storage._FileStorage__file_path)
+        lazy = FileStorage(lazy=True)
+        lazy.save()
+        self.assertEqual(len(lazy.search(Place, 'garden')), 2)
+        lazy.reload()
+        self.assertEqual([obj.id for _, obj in lazy.search(Place, 'garden')],
+                         [self.places[2].id, self.places[0].id])
+
+    def test_not_strings(self):
+        """Test that the text attributes which are not strings are left
+        out."""
+        index = TextIndex(('name', 'description'))
+        place = Place()
+        place.name = 42
+        index.add('Place.{}'.format(place.id), place)
+        self.assertEqual(index.search('42'), [])
+        self.assertEqual(index.search('garden'), [])
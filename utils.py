@@ -23,7 +23,7 @@ def find_class_by_name(classes, name):
 
 
 def validate_args(args, classes, hasId=False, hasAttrs=False,
-                  validateInstance=False):
+                  validateInstance=False, many=False):
     """validates the class name
     Args:
         args (list[str]): the arguments as a list of strings
@@ -31,10 +31,12 @@ def validate_args(args, classes, hasId=False, hasAttrs=False,
         hasId (bool): whether the class has an id argument at index 1
         hasAttrs (bool): whether the class has attributes arguments at 2 and 3
         validateInstance (bool): whether to search for the instance and return
+        many (bool): whether the id argument is a comma separated list of
+            ids, the instance returned is the list of the instances then
 
     Returns:
-        None|tuple(str, dict[str, object], object|None, str|None, str|None)
-        class_name, storage_objects, instance, attribute_key, attribute_val
+        None|tuple(str, object|list|None, str|None, str|None)
+        class_name, instance, attribute_key, attribute_val
         """
 
     if type(args) is not list:
@@ -44,20 +46,24 @@ def validate_args(args, classes, hasId=False, hasAttrs=False,
     if type(classname) is not str or len(classname) == 0:
         print("** class name missing **")
         return
-    if classname not in classes_to_str(classes):
+    if find_class_by_name(classes, classname) is None:
         print("** class doesn't exist **")
         return
     if hasId and len(args) < 2:
         print("** instance id missing **")
         return
 
-    objs, obj = storage.all(), None
-    if validateInstance:
-        key = f'{classname}.{args[1]}'
-        if key not in objs.keys():
+    obj = None
+    if validateInstance and many:
+        obj = [storage.get(classname, id) for id in args[1].split(',')]
+        if any(instance is None for instance in obj):
+            print("** no instance found **")
+            return
+    elif validateInstance:
+        obj = storage.get(classname, args[1])
+        if obj is None:
             print("** no instance found **")
             return
-        obj = objs[key]
 
     attr_key, attr_val = None, None
     if hasAttrs:
@@ -69,7 +75,7 @@ def validate_args(args, classes, hasId=False, hasAttrs=False,
             return
         attr_key, attr_val = args[2], args[3]
 
-    return (classname, objs, obj, attr_key, attr_val)
+    return (classname, obj, attr_key, attr_val)
 
 
 def cast_str_value(value):
@@ -108,6 +114,9 @@ def parse_command_syntax(line):
         >>>         '"BaseModel.show("d9a1b3bc-c104-4347-8432-33971115763c")')
         ('BaseModel', 'show', ['d9a1b3bc-c104-4347-8432-33971115763c'])
 
+        >>> parse_command_syntax('Place.bulk_update(["id1", "id2"], {"a": 1})')
+        ('Place', 'bulk_update', [['id1', 'id2'], {'a': 1}])
+
     Return: tuple|None"""
     try:
         expr = cast(ast.Expr, ast.parse(line).body[0])
@@ -129,6 +138,10 @@ def parse_command_syntax(line):
                     d[cast(ast.Constant, k).value] = cast(
                         ast.Constant, v).value
                 args.append(d)
+            elif isinstance(arg, ast.List):
+                if not all(isinstance(e, ast.Constant) for e in arg.elts):
+                    raise Exception()
+                args.append([cast(ast.Constant, e).value for e in arg.elts])
             else:
                 raise Exception()
         return className, action, args
@@ -145,3 +158,87 @@ def parse_str_dict(line):
             yield cast(ast.Constant, k).value, cast(ast.Constant, v).value
     except Exception:
         return None
+
+
+# the AST comparison operators of the where conditions
+_COMPARE_OPS = {ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=',
+                ast.Gt: '>', ast.GtE: '>='}
+
+
+def parse_query(line):
+    """Parses a query syntax into a class name and the list of the
+    (method, args) calls to make on a storage Query
+    Args:
+        line (str): the query syntax, a chain of where, select, order_by,
+            offset and limit calls
+
+    Example:
+        >>> parse_query('Place.where(price_by_night<100, city_id="1")'
+        >>>             '.order_by(-name).limit(20)')
+        ('Place', [('where', ('price_by_night', '<', 100)),
+                   ('where', ('city_id', '==', '1')),
+                   ('order_by', ('name', True)), ('limit', (20,))])
+
+    Return: tuple|None"""
+    try:
+        node = cast(ast.Expr, ast.parse(line).body[0]).value
+        calls = []
+        while isinstance(node, ast.Call):
+            method = cast(ast.Attribute, node.func).attr
+            calls[:0] = _parse_query_call(method, node)
+            node = cast(ast.Attribute, node.func).value
+        if not calls:
+            return None
+        return cast(ast.Name, node).id, calls
+    except Exception:
+        return None
+
+
+def _parse_query_call(method, call):
+    """Returns the list of the (method, args) calls of a query call node
+
+    Raises:
+        Exception: if the call is not a valid query call"""
+    if method == 'where' and (call.args or call.keywords):
+        calls = []
+        for arg in call.args:
+            compare = cast(ast.Compare, arg)
+            if len(compare.ops) != 1:
+                raise Exception()
+            calls.append(('where', (
+                cast(ast.Name, compare.left).id,
+                _COMPARE_OPS[type(compare.ops[0])],
+                _constant(compare.comparators[0]))))
+        for keyword in call.keywords:
+            calls.append(('where', (
+                keyword.arg, '==', _constant(keyword.value))))
+        return calls
+    if call.keywords:
+        raise Exception()
+    if method == 'select' and call.args:
+        return [('select', tuple(cast(ast.Name, arg).id
+                                 for arg in call.args))]
+    if method == 'order_by' and len(call.args) == 1:
+        arg = call.args[0]
+        if isinstance(arg, ast.UnaryOp) and isinstance(arg.op, ast.USub):
+            return [('order_by', (cast(ast.Name, arg.operand).id, True))]
+        return [('order_by', (cast(ast.Name, arg).id, False))]
+    if method in ['offset', 'limit'] and len(call.args) == 1:
+        value = cast(ast.Constant, call.args[0]).value
+        if type(value) is not int or value < 0:
+            raise Exception()
+        return [(method, (value,))]
+    raise Exception()
+
+
+def _constant(node):
+    """Returns the value of a constant node, which may be a negative number
+
+    Raises:
+        Exception: if the node is not a constant"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = cast(ast.Constant, node.operand).value
+        if type(value) not in [int, float]:
+            raise Exception()
+        return -value
+    return cast(ast.Constant, node).value